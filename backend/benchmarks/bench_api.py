@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""
+End-to-end API benchmark for the Novatech backend.
+
+Runs the FastAPI app in-process over ASGI against a local Mongo stand-in
+(mongomock-motor by default, or a throwaway mongod via --mongo-url), loads a
+synthetic dataset, drives a weighted mix of public and admin routes and
+reports p50/p95/p99 latency and requests/s per route as JSON.
+
+Examples:
+    python backend/benchmarks/bench_api.py --scale 0.01 --requests 2000
+    python backend/benchmarks/bench_api.py --output bench.json --save-baseline baseline.json
+    python backend/benchmarks/bench_api.py --baseline baseline.json --tolerance 0.2
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import re
+import sys
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+# Per-request query counts come back in Server-Timing (populated against a real mongod;
+# mongomock bypasses pymongo command monitoring so counts read as zero there)
+os.environ.setdefault("SERVER_TIMING", "true")
+
+import httpx  # noqa: E402
+
+import server  # noqa: E402
+
+# One INFO line per request would dominate the measurement
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+CATEGORIES = ["development", "design", "marketing", "office", "kids"]
+PAGES = ["/", "/courses", "/about", "/blog", "/contact", "/vacancies", "/internships"]
+DEVICES = ["desktop", "mobile", "tablet"]
+COUNTRIES = ["Azerbaijan", "Turkey", "Russia", "Georgia", "Germany", "Unknown"]
+CHUNK_SIZE = 10000
+BROWSER_UA = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+SERVER_TIMING_DB = re.compile(r'db;dur=([0-9.]+);desc="(\d+) queries"')
+
+
+def localized(text: str) -> dict:
+    return {"en": text, "az": text, "ru": text}
+
+
+# ==================== SYNTHETIC DATASET ====================
+
+def make_course(i: int, now: datetime) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "title": localized(f"Course {i}"),
+        "description": localized(f"Synthetic course number {i} " * 4),
+        "duration": f"{1 + i % 6} months",
+        "format": "Hybrid",
+        "level": "Beginner",
+        "certificate": True,
+        "category": CATEGORIES[i % len(CATEGORIES)],
+        "outcomes": [localized("Outcome A"), localized("Outcome B")],
+        "curriculum": [localized("Module 1"), localized("Module 2"), localized("Module 3")],
+        "price": f"{100 + i % 500} AZN",
+        "image_url": "https://images.unsplash.com/photo-1551402991-6e4b5fc0b01c?w=800",
+        "is_popular": i % 7 == 0,
+        "is_active": i % 10 != 0,
+        "created_at": (now - timedelta(minutes=i)).isoformat(),
+    }
+
+
+def make_event(rng: random.Random, now: datetime, span_days: int) -> dict:
+    return server.analytics_event(
+        now - timedelta(seconds=rng.randrange(span_days * 86400)),
+        rng.choice(PAGES), rng.choice(DEVICES), rng.choice(COUNTRIES),
+        page_title="Novatech",
+        browser="Chrome",
+        os="Windows",
+        session_id=f"s{rng.randrange(50000)}",
+    )
+
+
+def make_submission(i: int, rng: random.Random, now: datetime) -> dict:
+    sub_type = "contact" if i % 3 else "application"
+    return {
+        "id": str(uuid.uuid4()),
+        "type": sub_type,
+        "data": {"name": f"Visitor {i}", "email": f"visitor{i}@example.com", "message": "Hello " * 20},
+        "created_at": (now - timedelta(minutes=i)).isoformat(),
+        "is_read": rng.random() < 0.7,
+        "ip_address": "0" * 16,
+    }
+
+
+async def insert_chunked(collection, factory, count: int):
+    for start in range(0, count, CHUNK_SIZE):
+        batch = [factory(i) for i in range(start, min(count, start + CHUNK_SIZE))]
+        if batch:
+            await collection.insert_many(batch)
+
+
+async def load_dataset(db, args, rng: random.Random) -> dict:
+    """Populate the database and return ids the route mix needs."""
+    now = datetime.now(timezone.utc)
+    n_courses = max(1, int(args.courses * args.scale))
+    n_events = int(args.events * args.scale)
+    n_submissions = max(1, int(args.submissions * args.scale))
+
+    await server.seed_database()
+    await insert_chunked(db.courses, lambda i: make_course(i, now), n_courses)
+    span_days = server.AppSettings().analytics_retention_days
+    await insert_chunked(db[server.ANALYTICS_EVENTS], lambda i: make_event(rng, now, span_days), n_events)
+    # Steady state: everything but the current hour already rolled up
+    await server.downsample_analytics()
+    await insert_chunked(db.submissions, lambda i: make_submission(i, rng, now), n_submissions)
+    await server.reconcile_inbox_counters()
+    await insert_chunked(db.blogs, lambda i: {
+        "id": str(uuid.uuid4()),
+        "title": localized(f"Post {i}"),
+        "excerpt": localized(f"Excerpt for post {i}"),
+        "slug": f"post-{i}",
+        "content_blocks": [{"type": "text", "text": localized("Body " * 200), "order": 0}],
+        "meta_title": None,
+        "meta_description": None,
+        "is_published": True,
+        "show_on_homepage": i < 6,
+        "created_at": (now - timedelta(days=i)).isoformat(),
+        "updated_at": (now - timedelta(days=i)).isoformat(),
+    }, 100)
+
+    course_ids = [c["id"] async for c in db.courses.find({}, {"_id": 0, "id": 1}).limit(1000)]
+    submission_ids = [s["id"] async for s in db.submissions.find({}, {"_id": 0, "id": 1}).limit(1000)]
+    blog_slugs = [b["slug"] async for b in db.blogs.find({}, {"_id": 0, "slug": 1}).limit(100)]
+    admin = await db.users.find_one({"email": server.ADMIN1_EMAIL}, {"_id": 0})
+
+    return {
+        "course_ids": course_ids,
+        "submission_ids": submission_ids,
+        "blog_slugs": blog_slugs,
+        "token": server.create_token(admin["id"], admin["email"], admin["role"]),
+        "sizes": {"courses": n_courses, "analytics": n_events, "submissions": n_submissions},
+    }
+
+
+# ==================== ROUTE MIX ====================
+
+def make_beacon_batch(rng: random.Random) -> list:
+    """What one visitor's queue holds at a flush: a few page views, a click and heartbeats."""
+    session_id = f"s{rng.randrange(50000)}"
+    events = [{
+        "type": "pageview", "page_path": rng.choice(PAGES), "page_title": "Novatech",
+        "device_type": rng.choice(DEVICES), "session_id": session_id, "age_ms": rng.randrange(15000),
+    } for _ in range(rng.randint(1, 4))]
+    events.append({"type": "cta_click", "page_path": "/", "target": "hero", "session_id": session_id})
+    events.append({"type": "heartbeat", "page_path": "/", "session_id": session_id})
+    return events
+
+
+def build_route_mix(fixtures: dict):
+    """Weighted (label, weight, request_factory) entries; factories return (method, url, kwargs)."""
+    auth = {"Authorization": f"Bearer {fixtures['token']}"}
+    course_ids = fixtures["course_ids"]
+    submission_ids = fixtures["submission_ids"]
+    blog_slugs = fixtures["blog_slugs"]
+    images = [p.name for p in server.UPLOADS_DIR.iterdir() if p.is_file()] or ["missing.png"]
+
+    return [
+        ("GET /api/courses", 20, lambda r: ("GET", "/api/courses", {})),
+        ("GET /api/courses/{id}", 15, lambda r: ("GET", f"/api/courses/{r.choice(course_ids)}", {})),
+        ("GET /api/faqs/{course_id}", 5, lambda r: ("GET", f"/api/faqs/{r.choice(course_ids)}", {})),
+        ("GET /api/blogs", 8, lambda r: ("GET", "/api/blogs", {})),
+        ("GET /api/blogs/{slug}", 6, lambda r: ("GET", f"/api/blogs/{r.choice(blog_slugs)}", {})),
+        ("GET /api/slides", 8, lambda r: ("GET", "/api/slides", {})),
+        ("GET /api/settings", 10, lambda r: ("GET", "/api/settings", {})),
+        ("GET /api/testimonials", 4, lambda r: ("GET", "/api/testimonials", {})),
+        ("GET /api/teachers", 4, lambda r: ("GET", "/api/teachers", {})),
+        ("GET /api/cta-sections", 3, lambda r: ("GET", "/api/cta-sections", {})),
+        ("GET /api/uploads/images/{filename}", 6, lambda r: ("GET", f"/api/uploads/images/{r.choice(images)}", {})),
+        ("POST /api/analytics/pageview", 12, lambda r: ("POST", "/api/analytics/pageview", {"json": {
+            "page_path": r.choice(PAGES),
+            "page_title": "Novatech",
+            "device_type": r.choice(DEVICES),
+            "session_id": f"s{r.randrange(50000)}",
+        }})),
+        ("POST /api/analytics/batch", 4, lambda r: ("POST", "/api/analytics/batch", {
+            "headers": {"Content-Type": "text/plain"},
+            "content": json.dumps(make_beacon_batch(r)),
+        })),
+        ("GET /api/analytics/summary", 1, lambda r: ("GET", "/api/analytics/summary", {"headers": auth})),
+        ("GET /api/submissions", 1, lambda r: ("GET", "/api/submissions", {"headers": auth})),
+        ("GET /api/submissions/stats", 2, lambda r: ("GET", "/api/submissions/stats", {"headers": auth})),
+        ("PUT /api/submissions/{id}/read", 1, lambda r: (
+            "PUT", f"/api/submissions/{r.choice(submission_ids)}/read", {"headers": auth})),
+        ("PUT /api/courses/{id}", 1, lambda r: ("PUT", f"/api/courses/{r.choice(course_ids)}", {
+            "headers": auth, "json": {"price": f"{r.randrange(100, 900)} AZN"}})),
+    ]
+
+
+# ==================== DRIVER ====================
+
+async def drive(app, mix, total_requests: int, concurrency: int, seed: int):
+    """Issue total_requests across `concurrency` workers; returns (samples, queries, errors, wall_seconds)."""
+    labels = [m[0] for m in mix]
+    weights = [m[1] for m in mix]
+    factories = {m[0]: m[2] for m in mix}
+    samples = defaultdict(list)
+    queries = defaultdict(list)
+    errors = defaultdict(int)
+    issued = 0
+
+    transport = httpx.ASGITransport(app=app)
+    # A browser User-Agent: httpx's default one is classified as a bot and analytics would be dropped
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers={"User-Agent": BROWSER_UA}) as http:
+        async def worker(worker_id: int):
+            nonlocal issued
+            rng = random.Random(seed + worker_id)
+            while issued < total_requests:
+                seq = issued
+                issued += 1
+                label = rng.choices(labels, weights)[0]
+                method, url, kwargs = factories[label](rng)
+                # Spread requests over many client IPs so the per-IP rate limiter
+                # behaves as it would for real traffic instead of throttling the bench
+                headers = {**kwargs.pop("headers", {}), "X-Forwarded-For": f"10.{seq >> 16 & 255}.{seq >> 8 & 255}.{seq & 255}"}
+                started = time.perf_counter()
+                response = await http.request(method, url, headers=headers, **kwargs)
+                samples[label].append(time.perf_counter() - started)
+                timing = SERVER_TIMING_DB.search(response.headers.get("server-timing", ""))
+                if timing:
+                    queries[label].append(int(timing.group(2)))
+                if response.status_code >= 400:
+                    errors[label] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        wall = time.perf_counter() - started
+
+    return samples, queries, errors, wall
+
+
+def summarize(samples, queries, errors, wall: float, count_queries: bool) -> dict:
+    routes = {}
+    for label, values in sorted(samples.items()):
+        ms = np.asarray(values) * 1000.0
+        p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+        routes[label] = {
+            "count": len(values),
+            "errors": errors.get(label, 0),
+            "mean_ms": round(float(ms.mean()), 3),
+            "p50_ms": round(float(p50), 3),
+            "p95_ms": round(float(p95), 3),
+            "p99_ms": round(float(p99), 3),
+            "rps": round(len(values) / wall, 2),
+        }
+        if count_queries and queries.get(label):
+            routes[label]["db_queries_mean"] = round(float(np.mean(queries[label])), 2)
+            routes[label]["db_queries_max"] = int(max(queries[label]))
+    total = sum(r["count"] for r in routes.values())
+    return {
+        "routes": routes,
+        "total": {
+            "count": total,
+            "errors": sum(r["errors"] for r in routes.values()),
+            "wall_seconds": round(wall, 3),
+            "rps": round(total / wall, 2) if wall else 0.0,
+        },
+    }
+
+
+def counts_queries(report: dict) -> bool:
+    return report.get("meta", {}).get("backend") == "mongod"
+
+
+def compare_to_baseline(report: dict, baseline: dict, tolerance: float) -> list:
+    """Return human-readable regressions of p95 latency, throughput or DB round trips.
+
+    Round trips are only compared when both runs used a real mongod (see SERVER_TIMING above).
+    """
+    regressions = []
+    compare_queries = counts_queries(report) and counts_queries(baseline)
+    for label, base in baseline.get("routes", {}).items():
+        current = report["routes"].get(label)
+        if not current:
+            continue
+        if current["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{label}: p95 {base['p95_ms']}ms -> {current['p95_ms']}ms")
+        if current["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{label}: rps {base['rps']} -> {current['rps']}")
+        if compare_queries and "db_queries_max" in base and current.get("db_queries_max", 0) > base["db_queries_max"]:
+            regressions.append(f"{label}: db queries {base['db_queries_max']} -> {current['db_queries_max']}")
+    return regressions
+
+
+async def make_app(args):
+    """Build the app through create_app(); mongomock is injected as the client unless --mongo-url."""
+    settings = server.AppSettings(db_name=args.db_name, warm_pool=False, analytics_rollup_interval_seconds=0,
+                                   inbox_reconcile_interval_seconds=0)
+    if args.mongo_url:
+        settings.mongo_url = args.mongo_url
+        mongo_client = server.build_mongo_client(settings)
+        await mongo_client.drop_database(args.db_name)
+    else:
+        from mongomock_motor import AsyncMongoMockClient
+        mongo_client = AsyncMongoMockClient()
+    return server.create_app(settings, mongo_client=mongo_client), mongo_client
+
+
+async def run(args) -> int:
+    rng = random.Random(args.seed)
+    app, mongo_client = await make_app(args)
+    async with app.router.lifespan_context(app):
+        return await run_with_app(app, mongo_client, args, rng)
+
+
+async def run_with_app(app, mongo_client, args, rng: random.Random) -> int:
+    database = server.db
+    load_started = time.perf_counter()
+    fixtures = await load_dataset(database, args, rng)
+    load_seconds = time.perf_counter() - load_started
+
+    mix = build_route_mix(fixtures)
+    if args.warmup:
+        await drive(app, mix, args.warmup, args.concurrency, args.seed + 1)
+    samples, queries, errors, wall = await drive(app, mix, args.requests, args.concurrency, args.seed)
+
+    report = summarize(samples, queries, errors, wall, count_queries=bool(args.mongo_url))
+    report["meta"] = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "backend": "mongod" if args.mongo_url else "mongomock",
+        "concurrency": args.concurrency,
+        "requests": args.requests,
+        "dataset": fixtures["sizes"],
+        "load_seconds": round(load_seconds, 2),
+    }
+
+    if args.mongo_url:
+        await mongo_client.drop_database(args.db_name)
+        mongo_client.close()
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output)
+    else:
+        print(output)
+
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(output)
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressions = compare_to_baseline(report, baseline, args.tolerance)
+        if not (counts_queries(report) and counts_queries(baseline)):
+            print("NOTE db query counts not compared: needs --mongo-url for both runs", file=sys.stderr)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Novatech API in-process")
+    parser.add_argument("--courses", type=int, default=10000)
+    parser.add_argument("--events", type=int, default=1000000, help="Analytics events to preload")
+    parser.add_argument("--submissions", type=int, default=100000)
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier applied to all dataset sizes")
+    parser.add_argument("--requests", type=int, default=5000, help="Measured requests")
+    parser.add_argument("--warmup", type=int, default=200, help="Unmeasured warmup requests")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--mongo-url", default=None, help="Use a throwaway mongod instead of mongomock")
+    parser.add_argument("--db-name", default="novatech_bench")
+    parser.add_argument("--output", default=None, help="Write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", default=None, help="Compare against a stored JSON report")
+    parser.add_argument("--save-baseline", default=None, help="Store this run as a baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative regression")
+    return parser.parse_args(argv)
+
+
+def main():
+    return asyncio.run(run(parse_args()))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Middleware overhead benchmark: legacy BaseHTTPMiddleware stack vs SecurityMiddleware.
+
+Drives two otherwise identical FastAPI apps with raw ASGI calls (no HTTP client in the
+loop) and reports per-request latency for a small JSON route and time-to-first-byte for
+a streaming route, so buffering or extra task hops in the middleware show up directly.
+
+Example:
+    python backend/benchmarks/bench_middleware.py --requests 5000
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from fastapi import FastAPI, HTTPException, Request  # noqa: E402
+from fastapi.responses import StreamingResponse  # noqa: E402
+
+import server  # noqa: E402
+
+STREAM_CHUNKS = 5
+STREAM_DELAY = 0.01
+
+
+def add_routes(app: FastAPI):
+    @app.get("/ping")
+    async def ping():
+        return {"message": "pong"}
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for _ in range(STREAM_CHUNKS):
+                yield b"x" * 1024
+                await asyncio.sleep(STREAM_DELAY)
+        return StreamingResponse(chunks(), media_type="application/octet-stream")
+
+
+def legacy_app() -> FastAPI:
+    """The pre-refactor pair of @app.middleware("http") functions"""
+    app = FastAPI()
+    add_routes(app)
+
+    @app.middleware("http")
+    async def security_headers_middleware(request: Request, call_next):
+        response = await call_next(request)
+        for name, value in server.SECURITY_HEADERS:
+            response.headers[name.decode()] = value.decode()
+        return response
+
+    @app.middleware("http")
+    async def rate_limit_middleware(request: Request, call_next):
+        client_ip = server.get_client_ip(request)
+        if server.is_ip_blacklisted(client_ip):
+            raise HTTPException(status_code=429, detail="Too many requests. Please try again later.")
+        if not server.check_rate_limit(client_ip):
+            raise HTTPException(status_code=429, detail="Too many requests. Please slow down.")
+        return await call_next(request)
+
+    return app
+
+
+def asgi_app() -> FastAPI:
+    app = FastAPI()
+    add_routes(app)
+    app.add_middleware(server.SecurityMiddleware)
+    return app
+
+
+async def call(app, path: str, seq: int) -> tuple:
+    """Run one request; returns (total_seconds, first_body_seconds)."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"bench")], "client": (f"10.{seq >> 16 & 255}.{seq >> 8 & 255}.{seq & 255}", 1234),
+        "server": ("bench", 80),
+    }
+    first_body = None
+    request_sent = False
+    finished = asyncio.Event()
+    started = time.perf_counter()
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # Like a real server: nothing more arrives until the client goes away
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal first_body
+        if message["type"] == "http.response.body":
+            if message.get("body") and first_body is None:
+                first_body = time.perf_counter() - started
+            if not message.get("more_body", False):
+                finished.set()
+
+    await app(scope, receive, send)
+    return time.perf_counter() - started, first_body
+
+
+async def measure(app, path: str, count: int, metric: int) -> dict:
+    # Warm up route compilation and middleware stack construction
+    for i in range(50):
+        await call(app, path, 1_000_000 + i)
+    values = []
+    for i in range(count):
+        values.append((await call(app, path, i))[metric])
+    us = np.asarray(values) * 1e6
+    p50, p95, p99 = np.percentile(us, [50, 95, 99])
+    return {"p50_us": round(float(p50), 1), "p95_us": round(float(p95), 1), "p99_us": round(float(p99), 1)}
+
+
+async def run(args) -> dict:
+    report = {}
+    for name, factory in (("base_http_middleware", legacy_app), ("pure_asgi", asgi_app)):
+        app = factory()
+        server.rate_limit_store.clear()
+        report[name] = {
+            "json_total": await measure(app, "/ping", args.requests, 0),
+            "stream_ttfb": await measure(app, "/stream", args.stream_requests, 1),
+        }
+    legacy = report["base_http_middleware"]["json_total"]["p50_us"]
+    current = report["pure_asgi"]["json_total"]["p50_us"]
+    report["json_p50_overhead_saved_us"] = round(legacy - current, 1)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare middleware overhead")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--stream-requests", type=int, default=100)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,462 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, Body, status, Request, UploadFile, File
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Body, Query, status, Request, Response, UploadFile, File
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.staticfiles import StaticFiles
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
+from starlette.convertors import PathConvertor, register_url_convertor
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring, read_preferences, ReplaceOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
 import os
 import logging
 import secrets
 import hashlib
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict, EmailStr, field_validator
-from typing import List, Optional, Dict, Any
+from contextlib import asynccontextmanager
+from pydantic import BaseModel, Field, ConfigDict, EmailStr, TypeAdapter, field_validator
+from typing import List, Optional, Dict, Any, Literal, Union, Annotated, NamedTuple
+from functools import lru_cache
 import uuid
 from datetime import datetime, timezone, timedelta
 import jwt
 import bcrypt
 import re
-from collections import defaultdict
+from collections import OrderedDict, defaultdict, deque
 import time
 import html
+from email.utils import format_datetime
 import shutil
+import bisect
+import ipaddress
+import threading
+import json
+import asyncio
+import contextvars
+import random
+import sys
+import math
+import zlib
+import numpy as np
 
 ROOT_DIR = Path(__file__).parent
 UPLOADS_DIR = ROOT_DIR / "uploads" / "images"
 UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# ==================== METRICS PRIMITIVES ====================
+
+# Bearer token for /api/metrics; without it the endpoint is disabled (403)
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _format_labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for v in values)
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, escaped)) + "}"
+
+class Counter:
+    """Monotonic counter keyed by a fixed tuple of label values (thread-safe)"""
+    def __init__(self, name: str, help_text: str, label_names: tuple = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] += amount
+
+    def expose(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in sorted(items):
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {value:g}")
+        return lines
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+    def dec(self, *labels, amount: float = 1.0):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels, value: float):
+        with self._lock:
+            self._values[labels] = value
+
+    def expose(self) -> List[str]:
+        lines = super().expose()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus exposition format (thread-safe)"""
+    def __init__(self, name: str, help_text: str, label_names: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._counts = {}
+        self._sums = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def observe(self, *labels, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(labels)
+            if counts is None:
+                counts = self._counts[labels] = [0] * (len(self.buckets) + 1)
+            counts[index] += 1
+            self._sums[labels] += value
+
+    def expose(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(labels, list(counts), self._sums[labels]) for labels, counts in self._counts.items()]
+        for labels, counts, total in sorted(items):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                bucket_labels = _format_labels(self.label_names + ("le",), labels + (le,))
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            label_str = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{label_str} {total:.6f}")
+            lines.append(f"{self.name}_count{label_str} {cumulative}")
+        return lines
+
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests by route and status.", ("method", "route", "status"))
+HTTP_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency by route.", ("method", "route"))
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests currently being served.")
+MONGO_COMMAND_LATENCY = Histogram("mongodb_command_duration_seconds", "MongoDB command latency by collection.", ("collection", "command"))
+MONGO_COMMAND_FAILURES = Counter("mongodb_command_failures_total", "Failed MongoDB commands by collection.", ("collection", "command"))
+MONGO_POOL_WAIT = Histogram("mongodb_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection.")
+MONGO_POOL_CHECKOUT_FAILURES = Counter("mongodb_pool_checkout_failures_total", "Failed connection checkouts by reason.", ("reason",))
+
+# ==================== QUERY LEDGER ====================
+
+# Requests over either budget are logged as slow / N+1 suspects
+QUERY_BUDGET_COUNT = int(os.environ.get('QUERY_BUDGET_COUNT', '8'))
+QUERY_BUDGET_MS = float(os.environ.get('QUERY_BUDGET_MS', '200'))
+SERVER_TIMING_ENABLED = os.environ.get('SERVER_TIMING', 'false').lower() in ('1', 'true', 'yes')
+
+class QueryLedger:
+    """Mongo commands issued while serving one request.
+
+    Motor runs pymongo on executor threads with a copy of the request context, so the
+    listener appends to this shared object; list.append is atomic, no lock needed.
+    """
+    __slots__ = ("commands",)
+
+    def __init__(self):
+        self.commands = []
+
+    def record(self, collection: str, command: str, seconds: float):
+        self.commands.append((collection, command, seconds))
+
+    @property
+    def count(self) -> int:
+        return len(self.commands)
+
+    @property
+    def db_ms(self) -> float:
+        return sum(c[2] for c in self.commands) * 1000.0
+
+    def breakdown(self) -> str:
+        tally = defaultdict(int)
+        for collection, command, _ in self.commands:
+            tally[f"{collection}.{command}"] += 1
+        return ", ".join(f"{k} x{v}" for k, v in sorted(tally.items(), key=lambda kv: -kv[1]))
+
+current_query_ledger: contextvars.ContextVar[Optional[QueryLedger]] = contextvars.ContextVar("current_query_ledger", default=None)
+
+# ==================== SAMPLING PROFILER ====================
+
+PROFILER_MAX_STACKS = 20000  # Distinct collapsed stacks kept before new ones are dropped
+
+class SamplingProfiler:
+    """Wall-clock stack sampler for selected live requests.
+
+    A daemon thread snapshots the event loop thread's stack every `interval`. Each
+    profiled request registers its middleware frame; a sample is charged to the request
+    whose frame appears on the stack, and requests in flight but not on the stack are
+    charged an "[awaiting I/O]" sample. Output is collapsed-stack text for flamegraph.pl
+    or speedscope.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.sample_rate = 0.0
+        self.route = None
+        self.interval = 0.005
+        self.expires_at = 0.0
+        self.profiled_requests = 0
+        self.dropped_stacks = 0
+        self._stacks = defaultdict(int)
+        self._active = {}  # middleware frame -> root label
+        self._loop_thread_id = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def configure(self, sample_rate: float, route: Optional[str], interval_ms: float, duration_seconds: int):
+        with self._lock:
+            self.sample_rate = sample_rate
+            self.route = route
+            self.interval = interval_ms / 1000.0
+            self.expires_at = time.time() + duration_seconds
+            self.enabled = True
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self._stacks.clear()
+            self.profiled_requests = 0
+            self.dropped_stacks = 0
+
+    def should_profile(self, path: str) -> bool:
+        if not self.enabled:
+            return False
+        if time.time() > self.expires_at:
+            self.enabled = False
+            return False
+        if self.route and not (path == self.route or path.startswith(self.route.rstrip("/") + "/")):
+            return False
+        return random.random() < self.sample_rate
+
+    def begin(self, frame, label: str):
+        with self._lock:
+            self._loop_thread_id = threading.get_ident()
+            self._active[frame] = label
+            self.profiled_requests += 1
+
+    def end(self, frame):
+        with self._lock:
+            self._active.pop(frame, None)
+
+    def _record(self, stack: str):
+        if stack in self._stacks or len(self._stacks) < PROFILER_MAX_STACKS:
+            self._stacks[stack] += 1
+        else:
+            self.dropped_stacks += 1
+
+    def _sample(self):
+        with self._lock:
+            if not self._active or self._loop_thread_id is None:
+                return
+            active = dict(self._active)
+        frame = sys._current_frames().get(self._loop_thread_id)
+        names = []
+        on_stack = None
+        while frame is not None:
+            if frame in active:
+                on_stack = frame
+                break
+            code = frame.f_code
+            names.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+            frame = frame.f_back
+        with self._lock:
+            for request_frame, label in active.items():
+                if request_frame is on_stack:
+                    self._record(";".join([label] + names[::-1]))
+                else:
+                    self._record(f"{label};[awaiting I/O]")
+
+    def _run(self):
+        while self.enabled:
+            self._sample()
+            time.sleep(self.interval)
+
+    def collapsed(self) -> str:
+        with self._lock:
+            items = sorted(self._stacks.items())
+        return "".join(f"{stack} {count}\n" for stack, count in items)
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled and time.time() <= self.expires_at,
+                "sample_rate": self.sample_rate,
+                "route": self.route,
+                "interval_ms": self.interval * 1000.0,
+                "expires_at": datetime.fromtimestamp(self.expires_at, timezone.utc).isoformat() if self.expires_at else None,
+                "profiled_requests": self.profiled_requests,
+                "distinct_stacks": len(self._stacks),
+                "total_samples": sum(self._stacks.values()),
+                "dropped_stacks": self.dropped_stacks,
+            }
+
+request_profiler = SamplingProfiler()
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Record per-collection command latency from pymongo command monitoring"""
+    def __init__(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        if not isinstance(collection, str):
+            collection = "admin"
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = collection
+
+    def _finish(self, event) -> str:
+        with self._lock:
+            return self._pending.pop((event.connection_id, event.request_id), "unknown")
+
+    def _observe(self, event) -> str:
+        collection = self._finish(event)
+        seconds = event.duration_micros / 1e6
+        MONGO_COMMAND_LATENCY.observe(collection, event.command_name, value=seconds)
+        ledger = current_query_ledger.get()
+        if ledger is not None:
+            ledger.record(collection, event.command_name, seconds)
+        return collection
+
+    def succeeded(self, event):
+        self._observe(event)
+
+    def failed(self, event):
+        collection = self._observe(event)
+        MONGO_COMMAND_FAILURES.inc(collection, event.command_name)
+
+class MongoPoolMetrics(monitoring.ConnectionPoolListener):
+    """Measure pool checkout wait; check-out events fire on the same executor thread"""
+    def __init__(self):
+        self._local = threading.local()
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        started = getattr(self._local, "started", None)
+        if started is not None:
+            MONGO_POOL_WAIT.observe(value=time.perf_counter() - started)
+            self._local.started = None
+
+    def connection_check_out_failed(self, event):
+        MONGO_POOL_CHECKOUT_FAILURES.inc(str(event.reason))
+        self._local.started = None
+
+    def pool_created(self, event): pass
+    def pool_ready(self, event): pass
+    def pool_cleared(self, event): pass
+    def pool_closed(self, event): pass
+    def connection_created(self, event): pass
+    def connection_ready(self, event): pass
+    def connection_closed(self, event): pass
+    def connection_checked_in(self, event): pass
+
+# ==================== APPLICATION SETTINGS ====================
+
+def _env_list(name: str, default: str = "") -> List[str]:
+    return [item.strip() for item in os.environ.get(name, default).split(",") if item.strip()]
+
+class AppSettings(BaseModel):
+    """Deployment settings consumed by create_app(); from_env() reads the process environment"""
+    mongo_url: str = "mongodb://localhost:27017"
+    db_name: str = "novatech_db"
+    max_pool_size: int = 100
+    min_pool_size: int = 0
+    max_idle_time_ms: Optional[int] = None
+    server_selection_timeout_ms: int = 30000
+    compressors: List[str] = []  # e.g. ["zstd", "snappy"]; needs the zstandard / python-snappy packages
+    read_preference: str = "primary"
+    # Anonymous content reads; max staleness must be >= 90s (or -1 for no bound)
+    public_read_preference: str = "secondaryPreferred"
+    public_max_staleness_seconds: int = 90
+    cors_origins: List[str] = ["*"]
+    warm_pool: bool = True
+    # Raw pageviews expire after this; hourly/daily rollups are kept forever
+    analytics_retention_days: int = 90
+    analytics_rollup_interval_seconds: int = 300  # 0 disables the background rollup job
+    session_idle_minutes: int = 30
+    geoip_path: Optional[str] = None  # defaults to backend/data/geoip-country.npy when present
+    analytics_export_dir: Optional[str] = None  # defaults to backend/exports/analytics
+    inbox_reconcile_interval_seconds: int = 3600  # 0 disables rebuilding inbox counters from the collections
+    sync_tombstone_days: int = 30  # deletions older than this are purged; older sync cursors get a full reset
+    public_site_url: Optional[str] = None  # e.g. https://novatech.az; sitemap, feed and SEO shell answer 503 without it
+    frontend_index_path: Optional[str] = None  # built SPA shell; defaults to frontend/build/index.html
+
+    @classmethod
+    def from_env(cls) -> "AppSettings":
+        max_idle = os.environ.get('MONGO_MAX_IDLE_TIME_MS')
+        return cls(
+            mongo_url=os.environ.get('MONGO_URL', cls.model_fields['mongo_url'].default),
+            db_name=os.environ.get('DB_NAME', cls.model_fields['db_name'].default),
+            max_pool_size=int(os.environ.get('MONGO_MAX_POOL_SIZE', '100')),
+            min_pool_size=int(os.environ.get('MONGO_MIN_POOL_SIZE', '0')),
+            max_idle_time_ms=int(max_idle) if max_idle else None,
+            server_selection_timeout_ms=int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', '30000')),
+            compressors=_env_list('MONGO_COMPRESSORS'),
+            read_preference=os.environ.get('MONGO_READ_PREFERENCE', 'primary'),
+            public_read_preference=os.environ.get('MONGO_PUBLIC_READ_PREFERENCE', 'secondaryPreferred'),
+            public_max_staleness_seconds=int(os.environ.get('MONGO_PUBLIC_MAX_STALENESS_SECONDS', '90')),
+            cors_origins=_env_list('CORS_ORIGINS', '*'),
+            warm_pool=os.environ.get('MONGO_WARM_POOL', 'true').lower() in ('1', 'true', 'yes'),
+            analytics_retention_days=int(os.environ.get('ANALYTICS_RETENTION_DAYS', '90')),
+            analytics_rollup_interval_seconds=int(os.environ.get('ANALYTICS_ROLLUP_INTERVAL_SECONDS', '300')),
+            session_idle_minutes=int(os.environ.get('SESSION_IDLE_MINUTES', '30')),
+            geoip_path=os.environ.get('GEOIP_DB_PATH') or None,
+            analytics_export_dir=os.environ.get('ANALYTICS_EXPORT_DIR') or None,
+            inbox_reconcile_interval_seconds=int(os.environ.get('INBOX_RECONCILE_INTERVAL_SECONDS', '3600')),
+            sync_tombstone_days=int(os.environ.get('SYNC_TOMBSTONE_DAYS', '30')),
+            public_site_url=os.environ.get('PUBLIC_SITE_URL') or None,
+            frontend_index_path=os.environ.get('FRONTEND_INDEX_PATH') or None,
+        )
+
+def build_mongo_client(settings: AppSettings) -> AsyncIOMotorClient:
+    options = {
+        "maxPoolSize": settings.max_pool_size,
+        "minPoolSize": settings.min_pool_size,
+        "serverSelectionTimeoutMS": settings.server_selection_timeout_ms,
+        "readPreference": settings.read_preference,
+        "event_listeners": [MongoCommandMetrics(), MongoPoolMetrics()],
+    }
+    if settings.max_idle_time_ms is not None:
+        options["maxIdleTimeMS"] = settings.max_idle_time_ms
+    if settings.compressors:
+        options["compressors"] = ",".join(settings.compressors)
+    return AsyncIOMotorClient(settings.mongo_url, **options)
+
+READ_PREFERENCES = {
+    "primary": read_preferences.Primary,
+    "primaryPreferred": read_preferences.PrimaryPreferred,
+    "secondary": read_preferences.Secondary,
+    "secondaryPreferred": read_preferences.SecondaryPreferred,
+    "nearest": read_preferences.Nearest,
+}
+
+def build_public_read_preference(settings: AppSettings):
+    mode = READ_PREFERENCES.get(settings.public_read_preference)
+    if mode is None:
+        raise ValueError(f"Unknown read preference: {settings.public_read_preference}")
+    if mode is read_preferences.Primary:
+        return mode()
+    return mode(max_staleness=settings.public_max_staleness_seconds)
+
+# MongoDB connection - assigned by the application lifespan (see create_app).
+# `db` reads and writes on the primary; `public_db` serves anonymous content reads
+# from secondaries within the staleness bound so read capacity scales with replicas.
+client: Optional[AsyncIOMotorClient] = None
+db = None
+public_db = None
+
+def reader_for(request: Request, admin_view: bool = False):
+    """Database handle for a read: primary for admin listings, authenticated callers
+    (so admins always read their own writes) and versioned reads, secondaries for
+    anonymous visitors"""
+    if admin_view or "authorization" in request.headers or getattr(request.state, "read_primary", False):
+        return db
+    return public_db
 
 # JWT Configuration - Use environment variable or generate secure random key
 JWT_SECRET = os.environ.get('JWT_SECRET', secrets.token_hex(32))
@@ -49,14 +475,9 @@ LOGIN_MAX_ATTEMPTS = 5  # Max 5 failed login attempts per 15 minutes
 ip_blacklist = defaultdict(lambda: {"blocked_until": 0, "attempts": 0})
 BLACKLIST_DURATION = 3600  # 1 hour block
 
-# Create the main app with security settings
-app = FastAPI(
-    title="Novatech Education Center API",
-    docs_url=None,  # Disable Swagger UI in production
-    redoc_url=None,  # Disable ReDoc in production
-    openapi_url=None  # Disable OpenAPI schema in production
-)
 api_router = APIRouter(prefix="/api")
+# Routes served at the site root (e.g. /sitemap.xml) rather than under /api
+site_router = APIRouter()
 security = HTTPBearer()
 
 # Configure logging
@@ -130,12 +551,17 @@ def reset_login_attempts(ip: str):
     if ip in ip_blacklist:
         del ip_blacklist[ip]
 
+def client_ip_from_scope(scope) -> str:
+    """Get real client IP from an ASGI scope considering proxy headers"""
+    for name, value in scope.get("headers", ()):
+        if name == b"x-forwarded-for":
+            return value.decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
 def get_client_ip(request: Request) -> str:
     """Get real client IP considering proxy headers"""
-    forwarded = request.headers.get("X-Forwarded-For")
-    if forwarded:
-        return forwarded.split(",")[0].strip()
-    return request.client.host if request.client else "unknown"
+    return client_ip_from_scope(request.scope)
 
 # ==================== MODELS WITH VALIDATION ====================
 
@@ -286,6 +712,11 @@ class FAQResponse(BaseModel):
     answer: LocalizedContent
     order: int
 
+class CoursePage(BaseModel):
+    course: CourseResponse
+    faqs: List[FAQResponse]
+    related: List[CourseResponse]  # other active courses in the same category
+
 # Blog Models
 class ContentBlock(BaseModel):
     type: str  # "image" or "text"
@@ -337,6 +768,14 @@ class BlogResponse(BaseModel):
     created_at: datetime
     updated_at: Optional[datetime]
 
+class BlogSummary(BaseModel):
+    id: str
+    slug: str
+    title: LocalizedContent
+    excerpt: LocalizedContent
+    image_url: Optional[str] = None  # first image block
+    created_at: datetime
+
 # Testimonial Models
 class TestimonialCreate(BaseModel):
     name: str
@@ -445,7 +884,7 @@ class SubmissionResponse(BaseModel):
 class PageViewEvent(BaseModel):
     page_path: str
     page_title: str
-    device_type: str
+    device_type: Optional[str] = None  # ignored: derived from the User-Agent header
     country: Optional[str] = "Unknown"
     user_agent: Optional[str] = None
     session_id: Optional[str] = None
@@ -454,6 +893,51 @@ class PageViewEvent(BaseModel):
     @classmethod
     def sanitize_analytics(cls, v):
         return sanitize_input(v)[:500] if v else v
+    
+    @field_validator('session_id', mode='before')
+    @classmethod
+    def sanitize_session(cls, v):
+        return sanitize_input(v)[:100] if v else v
+
+class HeartbeatEvent(BaseModel):
+    session_id: str
+    page_path: Optional[str] = None
+    leave: bool = False  # sent on pagehide
+    
+    @field_validator('session_id', mode='before')
+    @classmethod
+    def sanitize_session(cls, v):
+        return sanitize_input(v)[:100] if v else v
+
+# Beacon batch events: `type` selects the model, age_ms is how long the event sat in the client queue
+class PageViewBeacon(PageViewEvent):
+    type: Literal["pageview"]
+    age_ms: int = Field(0, ge=0)
+
+class CtaClickBeacon(BaseModel):
+    type: Literal["cta_click"]
+    page_path: str
+    target: str  # which CTA, e.g. "hero", "header"
+    link: Optional[str] = None
+    session_id: Optional[str] = None
+    age_ms: int = Field(0, ge=0)
+    
+    @field_validator('page_path', 'target', 'link', 'session_id', mode='before')
+    @classmethod
+    def sanitize_click(cls, v):
+        return sanitize_input(v)[:500] if v else v
+
+class HeartbeatBeacon(HeartbeatEvent):
+    type: Literal["heartbeat"]
+    age_ms: int = Field(0, ge=0)
+
+ANALYTICS_BATCH_MAX_EVENTS = 50
+ANALYTICS_BATCH_MAX_BYTES = 64 * 1024
+BEACON_MAX_AGE_MS = 10 * 60 * 1000  # older queued events are stamped as this old
+BEACON_BATCH = TypeAdapter(Annotated[
+    List[Annotated[Union[PageViewBeacon, CtaClickBeacon, HeartbeatBeacon], Field(discriminator="type")]],
+    Field(max_length=ANALYTICS_BATCH_MAX_EVENTS)
+])
 
 # Trial Lesson Models
 class TrialLessonCreate(BaseModel):
@@ -484,6 +968,20 @@ class TrialLessonResponse(BaseModel):
     course: str
     created_at: datetime
 
+class SubmissionCounts(BaseModel):
+    total: int = 0
+    unread: int = 0
+
+class TrialLessonStats(BaseModel):
+    total: int = 0
+    by_course: Dict[str, int] = {}
+    by_day: Dict[str, int] = {}  # YYYY-MM-DD (UTC) -> requests, for the requested window
+
+class InboxStats(BaseModel):
+    unread: int
+    submissions: Dict[str, SubmissionCounts]
+    trial_lessons: TrialLessonStats
+
 class AnalyticsSummary(BaseModel):
     total_visits: int
     visits_today: int
@@ -493,6 +991,56 @@ class AnalyticsSummary(BaseModel):
     device_breakdown: Dict[str, int]
     country_breakdown: Dict[str, int]
     top_pages: List[Dict[str, Any]]
+    unique_visitors_today: int = 0
+    unique_visitors_this_week: int = 0
+    unique_visitors_this_month: int = 0
+    unique_sessions_today: int = 0
+    unique_sessions_this_week: int = 0
+    unique_sessions_this_month: int = 0
+    # Seconds, over sessions closed in the last 30 days
+    median_time_on_site: float = 0
+    p90_time_on_site: float = 0
+    cta_clicks_this_month: Dict[str, int] = {}
+
+class UniqueVisitorsResponse(BaseModel):
+    from_date: str
+    to_date: str
+    page_path: str
+    unique_visitors: int
+    unique_sessions: int
+
+class TimeseriesSeries(BaseModel):
+    key: str  # page path / device / country, or "total" when ungrouped
+    total: int
+    values: List[int]
+
+class TimeseriesResponse(BaseModel):
+    granularity: str
+    group_by: Optional[str] = None
+    buckets: List[datetime]  # start of each bucket (UTC), aligned with every series' values
+    series: List[TimeseriesSeries]
+
+class AnalyticsExportFile(BaseModel):
+    path: str  # relative to the export directory, e.g. "day=2024-05-01/part-20240501T000000.parquet"
+    day: str
+    size_bytes: int
+
+class AnalyticsExportStatus(BaseModel):
+    running: bool
+    exported_until: Optional[datetime] = None
+    files: List[AnalyticsExportFile]
+
+class CollectionManifest(BaseModel):
+    versions: Dict[str, str]  # collection -> opaque version, changes on every write
+
+class SyncDelta(BaseModel):
+    collection: str
+    key: str  # field that identifies a document; `deleted` lists values of it
+    revision: int  # pass back as ?since= for the next delta
+    reset: bool = False  # `changed` is the whole collection: drop the local copy first
+    has_more: bool = False
+    changed: List[Dict[str, Any]] = []
+    deleted: List[str] = []
 
 # ==================== HERO SLIDE MODELS ====================
 
@@ -720,38 +1268,159 @@ def check_rate_limit(client_ip: str, limit: int = RATE_LIMIT_MAX_REQUESTS) -> bo
 
 # ==================== SECURITY MIDDLEWARE ====================
 
-@app.middleware("http")
-async def security_headers_middleware(request: Request, call_next):
-    response = await call_next(request)
-    # Add security headers
-    response.headers["X-Content-Type-Options"] = "nosniff"
-    response.headers["X-Frame-Options"] = "DENY"
-    response.headers["X-XSS-Protection"] = "1; mode=block"
-    response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-    response.headers["Content-Security-Policy"] = "default-src 'self'; script-src 'self' 'unsafe-inline'; style-src 'self' 'unsafe-inline'; img-src 'self' https: data:; font-src 'self' https:;"
-    response.headers["Permissions-Policy"] = "geolocation=(), microphone=(), camera=()"
-    return response
-
-@app.middleware("http")
-async def rate_limit_middleware(request: Request, call_next):
-    client_ip = get_client_ip(request)
-    
-    # Check if IP is blacklisted
-    if is_ip_blacklisted(client_ip):
-        raise HTTPException(
-            status_code=429, 
-            detail="Too many requests. Please try again later."
-        )
-    
-    # Apply rate limiting
-    if not check_rate_limit(client_ip):
-        logger.warning(f"Rate limit exceeded for IP: {client_ip}")
-        raise HTTPException(
-            status_code=429, 
-            detail="Too many requests. Please slow down."
-        )
-    
-    return await call_next(request)
+class ProfilerMiddleware:
+    """Pure ASGI middleware that enrols sampled requests with request_profiler"""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not request_profiler.should_profile(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        frame = sys._getframe()
+        request_profiler.begin(frame, f"{scope['method']} {scope['path']}")
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_profiler.end(frame)
+
+SECURITY_HEADERS = [
+    (b"x-content-type-options", b"nosniff"),
+    (b"x-frame-options", b"DENY"),
+    (b"x-xss-protection", b"1; mode=block"),
+    (b"referrer-policy", b"strict-origin-when-cross-origin"),
+    (b"content-security-policy", b"default-src 'self'; script-src 'self' 'unsafe-inline'; style-src 'self' 'unsafe-inline'; img-src 'self' https: data:; font-src 'self' https:;"),
+    (b"permissions-policy", b"geolocation=(), microphone=(), camera=()"),
+]
+SECURITY_HEADER_NAMES = frozenset(name for name, _ in SECURITY_HEADERS)
+# Security headers a response may set for itself; the HTML shell needs a wider
+# Content-Security-Policy (web fonts, a cross-origin API) than the JSON endpoints
+RESPONSE_SECURITY_HEADERS = frozenset({b"content-security-policy"})
+
+def _build_429(detail: str) -> tuple:
+    body = json.dumps({"detail": detail}).encode("utf-8")
+    start = {
+        "type": "http.response.start",
+        "status": 429,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("latin-1")),
+            (b"retry-after", str(RATE_LIMIT_WINDOW).encode("latin-1")),
+        ] + SECURITY_HEADERS,
+    }
+    return start, {"type": "http.response.body", "body": body}
+
+BLACKLISTED_RESPONSE = _build_429("Too many requests. Please try again later.")
+RATE_LIMITED_RESPONSE = _build_429("Too many requests. Please slow down.")
+
+class SecurityMiddleware:
+    """Pure ASGI middleware: global rate limit / blacklist check plus security headers.
+
+    Rejections are sent as prebuilt 429 messages, and the header block is appended to
+    the response start message as-is, so bodies (file and streaming responses included)
+    pass straight through without an extra task or buffering.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        client_ip = client_ip_from_scope(scope)
+        rejection = None
+        if is_ip_blacklisted(client_ip):
+            rejection = BLACKLISTED_RESPONSE
+        elif not check_rate_limit(client_ip):
+            logger.warning(f"Rate limit exceeded for IP: {client_ip}")
+            rejection = RATE_LIMITED_RESPONSE
+        if rejection:
+            await send(rejection[0])
+            await send(rejection[1])
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = message.get("headers", [])
+                added = SECURITY_HEADERS
+                if any(name.lower() in SECURITY_HEADER_NAMES for name, _ in headers):
+                    own = {name.lower() for name, _ in headers} & RESPONSE_SECURITY_HEADERS
+                    headers = [h for h in headers if h[0].lower() not in SECURITY_HEADER_NAMES - own]
+                    added = [h for h in SECURITY_HEADERS if h[0] not in own]
+                message["headers"] = list(headers) + added
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording per-route counts, latency and in-flight requests.
+
+    Latency covers the full response including streamed bodies. Routes are labelled by
+    their path template so ids don't explode label cardinality.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            HTTP_IN_FLIGHT.dec()
+            route = scope.get("route")
+            route_label = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUESTS.inc(scope["method"], route_label, str(status_code))
+            HTTP_LATENCY.observe(scope["method"], route_label, value=elapsed)
+
+class QueryLedgerMiddleware:
+    """Pure ASGI middleware counting Mongo round trips and DB time per request.
+
+    Logs requests over QUERY_BUDGET_COUNT / QUERY_BUDGET_MS and, when SERVER_TIMING is
+    enabled, reports the totals in a Server-Timing header.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        ledger = QueryLedger()
+        token = current_query_ledger.set(ledger)
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            if SERVER_TIMING_ENABLED and message["type"] == "http.response.start":
+                app_ms = (time.perf_counter() - started) * 1000.0
+                timing = f'db;dur={ledger.db_ms:.3f};desc="{ledger.count} queries", app;dur={app_ms:.3f}'
+                message["headers"] = list(message.get("headers", [])) + [(b"server-timing", timing.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_query_ledger.reset(token)
+            if ledger.count > QUERY_BUDGET_COUNT or ledger.db_ms > QUERY_BUDGET_MS:
+                logger.warning(
+                    f"Query budget exceeded: {scope['method']} {scope['path']} made {ledger.count} queries "
+                    f"in {ledger.db_ms:.1f}ms ({ledger.breakdown()})"
+                )
 
 # ==================== AUTH ROUTES ====================
 
@@ -998,6 +1667,603 @@ async def get_admin2_info(current_user: dict = Depends(get_current_user)):
         "created_at": admin2.get("created_at")
     }
 
+# ==================== DELTA SYNC ====================
+
+# Every content write stamps the document with a per-collection revision taken from
+# a counter in sync_revisions, and every delete leaves a tombstone carrying its own
+# revision (the document is marked deleted under that revision first, so a crash
+# can't lose the deletion). GET /sync/{collection}?since=<rev> then returns only
+# what changed after <rev>, so clients that keep a local copy pull small deltas
+# instead of whole lists. Tombstones are purged after SYNC_TOMBSTONE_DAYS. The purge
+# raises the collection's horizon, and a cursor below the horizon gets a full
+# reset, since deletions it never saw are gone.
+#
+# Revisions are reserved before the write they stamp, so writes can land out of
+# order. A reservation is one find_one_and_update that advances the counter and
+# pushes an entry onto its `pending` list. The entry carries a floor, the counter
+# value this process last saw plus one: never above the revisions it reserved, as
+# the counter only grows, though lower when other workers wrote in between. Cursors
+# handed out by /sync stop at the settled revision, just below the lowest pending
+# floor. Releasing is off the request path: a finished lease is queued, this
+# process stops counting it at once, and a background task pulls queued entries
+# with one update per collection. `landed` is the last revision whose write went
+# through, so a reservation given up by a failed write moves no version. An entry
+# older than SYNC_LEASE_SECONDS is taken to be abandoned (its process died mid-write).
+SYNC_REVISIONS = "sync_revisions"
+SYNC_TOMBSTONES = "sync_tombstones"
+SYNC_PAGE_SIZE = 500
+SYNC_PURGE_INTERVAL_SECONDS = 3600
+SYNC_LEASE_SECONDS = 60
+SYNC_COLLECTIONS = {  # collection -> field that identifies a document
+    "courses": "id",
+    "faqs": "id",
+    "blogs": "id",
+    "testimonials": "id",
+    "teachers": "id",
+    "slides": "id",
+    "cta_sections": "id",
+    "vacancies": "id",
+    "internships": "id",
+    "page_seo": "page_key",
+    "settings": "id",
+}
+
+class RevisionLease(NamedTuple):
+    collection: str
+    token: str
+    revision: int  # last of the reserved revisions
+    state: dict  # counter document as left by the reservation
+
+known_revisions: Dict[str, tuple] = {}  # collection -> (epoch, highest counter value seen)
+released_leases: Dict[str, dict] = {}  # collection -> {"tokens", "landed"} waiting to be pulled
+released_tokens: set = set()  # released in this process, maybe still listed in the counter
+revision_release_task: Optional[asyncio.Task] = None
+
+def observe_revision(state: dict):
+    if "_id" not in state:
+        return
+    epoch, revision = state.get("epoch", ""), state.get("revision", 0)
+    known = known_revisions.get(state["_id"])
+    if known is None or known[0] != epoch or known[1] < revision:
+        known_revisions[state["_id"]] = (epoch, revision)
+
+async def reserve_revisions(collection: str, count: int) -> RevisionLease:
+    """Advance the counter by `count` and add a pending entry for the range in one round trip"""
+    token = uuid.uuid4().hex
+    floor = known_revisions.get(collection, ("", 0))[1] + 1
+    while True:
+        try:
+            state = await db[SYNC_REVISIONS].find_one_and_update(
+                {"_id": collection},
+                {
+                    "$inc": {"revision": count},
+                    "$push": {"pending": {"token": token, "floor": floor, "at": time.time()}},
+                    # The epoch tells a recreated counter apart from the one clients cached against
+                    "$setOnInsert": {"epoch": uuid.uuid4().hex, "landed": 0}
+                },
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            break
+        except DuplicateKeyError:
+            continue  # lost the race to create the counter
+    first = state["revision"] - count + 1
+    if floor > first:
+        # Only after the counter was recreated below what this process had seen
+        state = await db[SYNC_REVISIONS].find_one_and_update(
+            {"_id": collection, "pending.token": token},
+            {"$set": {"pending.$.floor": first}},
+            return_document=ReturnDocument.AFTER
+        )
+    observe_revision(state)
+    return RevisionLease(collection, token, state["revision"], state)
+
+@asynccontextmanager
+async def revision_lease(collection: str, count: int = 1):
+    """Reserve `count` revisions of a collection for a write and yield the last one;
+    they hold sync cursors and manifest versions below them until the block exits,
+    and count as landed only if it exits without an exception"""
+    lease = await reserve_revisions(collection, count)
+    landed = False
+    try:
+        yield lease.revision
+        landed = True
+    finally:
+        release_revisions(lease, landed)
+
+def release_revisions(lease: RevisionLease, landed: bool):
+    global revision_release_task
+    queued = released_leases.setdefault(lease.collection, {"tokens": set(), "landed": 0})
+    queued["tokens"].add(lease.token)
+    if landed:
+        queued["landed"] = max(queued["landed"], lease.revision)
+    released_tokens.add(lease.token)
+    collection_versions.note(lease.state)
+    if revision_release_task is None or revision_release_task.done():
+        revision_release_task = asyncio.create_task(flush_revision_releases())
+
+async def flush_revision_releases():
+    """Pull queued releases from their counters, one update per collection"""
+    while released_leases:
+        collection, queued = released_leases.popitem()
+        update = {"$pull": {"pending": {"token": {"$in": list(queued["tokens"])}}}}
+        if queued["landed"]:
+            update["$max"] = {"landed": queued["landed"]}
+        try:
+            state = await db[SYNC_REVISIONS].find_one_and_update(
+                {"_id": collection}, update, return_document=ReturnDocument.AFTER
+            )
+        except Exception as e:
+            logger.warning(f"Releasing {collection} revisions failed, retrying: {e}")
+            retry = released_leases.setdefault(collection, {"tokens": set(), "landed": 0})
+            retry["tokens"] |= queued["tokens"]
+            retry["landed"] = max(retry["landed"], queued["landed"])
+            await asyncio.sleep(1)
+            continue
+        released_tokens.difference_update(queued["tokens"])
+        if state is not None:
+            observe_revision(state)
+            collection_versions.note(state)
+
+def settled_revision(state: dict) -> int:
+    """Highest revision at or below which every reserved write has landed"""
+    cutoff = time.time() - SYNC_LEASE_SECONDS
+    floors = [
+        lease["floor"] for lease in state.get("pending", [])
+        if lease["at"] > cutoff and lease["token"] not in released_tokens
+    ]
+    return min(floors) - 1 if floors else state.get("revision", 0)
+
+def published_revision(state: dict) -> int:
+    """Settled revision, held at the last write that went through so that given-up
+    reservations past it don't move versions"""
+    queued = released_leases.get(state.get("_id"), {}).get("landed", 0)
+    landed = max(state.get("landed", state.get("revision", 0)), queued)
+    return min(settled_revision(state), landed)
+
+async def bury_deleted_content(collection: str, query: dict, docs: Optional[List[dict]] = None) -> int:
+    """Copy documents marked deleted (see delete_content) to tombstones under the
+    revision they were marked with, then remove them; repeating it is harmless"""
+    key = SYNC_COLLECTIONS[collection]
+    query = {**query, "deleted_at": {"$exists": True}}
+    if docs is None:
+        docs = await db[collection].find(query, {key: 1, "revision": 1, "deleted_at": 1}).to_list(None)
+    if not docs:
+        return 0
+    await db[SYNC_TOMBSTONES].bulk_write([
+        ReplaceOne(
+            {"collection": collection, "key": doc[key], "revision": doc["revision"]},
+            {"collection": collection, "key": doc[key], "revision": doc["revision"], "deleted_at": doc["deleted_at"]},
+            upsert=True
+        )
+        for doc in docs
+    ], ordered=False)
+    await db[collection].delete_many({**query, "_id": {"$in": [doc["_id"] for doc in docs]}})
+    return len(docs)
+
+async def finish_deletions() -> int:
+    """Bury documents a delete left marked when its process died, and let versions past them"""
+    buried = 0
+    for collection, key in SYNC_COLLECTIONS.items():
+        marked = await db[collection].find(
+            {"deleted_at": {"$exists": True}}, {key: 1, "revision": 1, "deleted_at": 1}
+        ).to_list(None)
+        if not marked:
+            continue
+        buried += await bury_deleted_content(collection, {}, marked)
+        state = await db[SYNC_REVISIONS].find_one_and_update(
+            {"_id": collection},
+            {"$max": {"landed": max(doc["revision"] for doc in marked)}},
+            return_document=ReturnDocument.AFTER
+        )
+        if state is not None:
+            collection_versions.note(state)
+    return buried
+
+async def backfill_sync_revisions() -> int:
+    """Stamp documents written outside the API handlers (seed data, imports) with a revision"""
+    stamped = 0
+    for collection in SYNC_COLLECTIONS:
+        missing = await db[collection].find({"revision": {"$exists": False}}, {"_id": 1}).to_list(None)
+        if not missing:
+            continue
+        async with revision_lease(collection, len(missing)) as last:
+            first = last - len(missing) + 1
+            await db[collection].bulk_write([
+                UpdateOne({"_id": doc["_id"], "revision": {"$exists": False}}, {"$set": {"revision": first + i}})
+                for i, doc in enumerate(missing)
+            ], ordered=False)
+        stamped += len(missing)
+    return stamped
+
+async def ensure_sync_storage():
+    for collection in SYNC_COLLECTIONS:
+        await db[collection].create_index("revision")
+        await db[collection].create_index("deleted_at", sparse=True)
+    await db[SYNC_TOMBSTONES].create_index([("collection", 1), ("revision", 1)])
+    await db[SYNC_TOMBSTONES].create_index("deleted_at")
+    stamped = await backfill_sync_revisions()
+    if stamped:
+        logger.info(f"Assigned sync revisions to {stamped} documents")
+    buried = await finish_deletions()
+    if buried:
+        logger.info(f"Finished {buried} interrupted deletions")
+
+async def purge_sync_tombstones(settings: AppSettings) -> int:
+    """Drop expired tombstones, first raising each collection's horizon past them"""
+    cutoff = bson_utc(datetime.now(timezone.utc) - timedelta(days=settings.sync_tombstone_days))
+    expired = await db[SYNC_TOMBSTONES].aggregate([
+        {"$match": {"deleted_at": {"$lt": cutoff}}},
+        {"$group": {"_id": "$collection", "revision": {"$max": "$revision"}}}
+    ]).to_list(None)
+    if not expired:
+        return 0
+    for row in expired:
+        await db[SYNC_REVISIONS].update_one(
+            {"_id": row["_id"]},
+            {"$max": {"horizon": row["revision"]}, "$setOnInsert": {"epoch": uuid.uuid4().hex, "landed": 0}},
+            upsert=True
+        )
+    result = await db[SYNC_TOMBSTONES].delete_many({"deleted_at": {"$lt": cutoff}})
+    return result.deleted_count
+
+async def expire_revision_leases():
+    """Drop reservations whose writer never released them; settled_revision() already ignores them"""
+    await db[SYNC_REVISIONS].update_many(
+        {"pending.at": {"$lt": time.time() - SYNC_LEASE_SECONDS}},
+        {"$pull": {"pending": {"at": {"$lt": time.time() - SYNC_LEASE_SECONDS}}}}
+    )
+
+async def sync_tombstone_purge_loop(settings: AppSettings):
+    while True:
+        try:
+            await expire_revision_leases()
+            await finish_deletions()
+            purged = await purge_sync_tombstones(settings)
+            if purged:
+                logger.info(f"Purged {purged} sync tombstones")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Sync tombstone purge failed: {e}")
+        await asyncio.sleep(SYNC_PURGE_INTERVAL_SECONDS)
+
+@api_router.get("/sync/{collection}", response_model=SyncDelta)
+async def sync_collection(
+    collection: str,
+    since: Optional[int] = Query(None, ge=0),
+    limit: int = Query(SYNC_PAGE_SIZE, ge=1, le=SYNC_PAGE_SIZE),
+    current_user: dict = Depends(get_current_user)
+):
+    """Documents changed and keys deleted after revision `since`; without it, the whole collection"""
+    key = SYNC_COLLECTIONS.get(collection)
+    if key is None:
+        raise HTTPException(status_code=404, detail="Unknown collection")
+    state = await db[SYNC_REVISIONS].find_one({"_id": collection}) or {}
+    observe_revision(state)
+    settled = settled_revision(state)
+    if since is None or since < state.get("horizon", 0) or since > state.get("revision", 0):
+        # Every write up to the settled revision has landed before this read, and
+        # anything after it comes again in the next delta
+        docs = await db[collection].find({"deleted_at": {"$exists": False}}, {"_id": 0}).to_list(None)
+        return SyncDelta(collection=collection, key=key, revision=settled, reset=True, changed=docs)
+
+    # Only settled revisions, so a write still in flight below a later one isn't skipped;
+    # limit + 1 entries tell whether the stream continues past this page
+    entries = await sync_entries(collection, key, {"$gt": since, "$lte": settled}, limit + 1)
+    page = entries[:limit]
+    if len(entries) > limit:
+        # A page never ends inside a revision, since one delete can stamp many documents
+        # with the same one; a revision longer than a page comes whole
+        boundary = entries[limit][0]
+        page = [entry for entry in page if entry[0] < boundary] or await sync_entries(collection, key, boundary)
+    return SyncDelta(
+        collection=collection,
+        key=key,
+        revision=page[-1][0] if page else since,
+        has_more=len(entries) > limit,
+        changed=[doc for _, doc, _ in page if doc is not None],
+        deleted=list(dict.fromkeys(deleted for _, _, deleted in page if deleted is not None))
+    )
+
+async def sync_entries(collection: str, key: str, revision: Union[int, dict], limit: Optional[int] = None) -> List[tuple]:
+    """(revision, document, deleted key) for the documents and tombstones matching
+    `revision`, in revision order; a document still marked deleted counts as a deletion"""
+    docs, tombstones = await asyncio.gather(
+        db[collection].find({"revision": revision}, {"_id": 0}).sort("revision", 1).to_list(limit),
+        db[SYNC_TOMBSTONES].find(
+            {"collection": collection, "revision": revision}, {"_id": 0, "key": 1, "revision": 1}
+        ).sort("revision", 1).to_list(limit)
+    )
+    entries = [
+        (doc["revision"], None, doc[key]) if "deleted_at" in doc else (doc["revision"], doc, None)
+        for doc in docs
+    ]
+    entries += [(tombstone["revision"], None, tombstone["key"]) for tombstone in tombstones]
+    entries.sort(key=lambda entry: entry[0])
+    return entries[:limit]
+
+# ==================== COLLECTION MANIFEST ====================
+
+# GET /manifest returns a short version per public collection so the SPA can keep
+# responses in localStorage and revalidate all of them with one small request.
+# The versions are the published sync revisions (settled, and no further than the
+# last write that went through), kept in memory: revision_lease() bumps them once
+# a write in this process has been acknowledged, and writes from other workers
+# are picked up by re-reading the counters at most every MANIFEST_REFRESH_SECONDS.
+# A version therefore never covers a write that hasn't landed. Responses the SPA
+# stores are requested with ?versioned=1, which reads them from the primary and
+# stamps them with the versions taken before the read (VERSION_HEADER), so a copy
+# is never stored under a version newer than its data.
+MANIFEST_COLLECTIONS = [
+    "courses", "blogs", "slides", "testimonials", "teachers",
+    "cta_sections", "settings", "page_seo", "vacancies", "internships"
+]
+MANIFEST_REFRESH_SECONDS = 5
+VERSION_HEADER = "X-Collection-Versions"
+
+class CollectionVersions:
+    def __init__(self):
+        self.states: Dict[str, tuple] = {}  # collection -> (epoch, revision)
+        self.loaded_at = 0.0
+        self.lock = asyncio.Lock()
+
+    def note(self, state: dict):
+        """Record a counter document's published revision; a lower one of the same counter is ignored"""
+        epoch, revision = state.get("epoch", ""), published_revision(state)
+        current = self.states.get(state["_id"])
+        if current is None or current[0] != epoch or current[1] < revision:
+            self.states[state["_id"]] = (epoch, revision)
+
+    def clear(self):
+        self.states.clear()
+        self.loaded_at = 0.0
+
+    async def refresh(self):
+        if time.monotonic() - self.loaded_at > MANIFEST_REFRESH_SECONDS:
+            async with self.lock:
+                if time.monotonic() - self.loaded_at > MANIFEST_REFRESH_SECONDS:
+                    states = await db[SYNC_REVISIONS].find({"_id": {"$in": list(SYNC_COLLECTIONS)}}).to_list(None)
+                    for state in states:
+                        observe_revision(state)
+                        self.note(state)
+                    self.loaded_at = time.monotonic()
+
+    async def current(self, *names: str) -> tuple:
+        """Versions of the given collections, for keying caches built from them"""
+        await self.refresh()
+        return tuple(self.states.get(name, ("", 0)) for name in names)
+
+    async def snapshot(self) -> Dict[str, str]:
+        await self.refresh()
+        versions = {}
+        for name in MANIFEST_COLLECTIONS:
+            epoch, revision = self.states.get(name, ("", 0))
+            versions[name] = hashlib.blake2b(f"{epoch}:{revision}".encode(), digest_size=6).hexdigest()
+        return versions
+
+collection_versions = CollectionVersions()
+
+@api_router.get("/manifest", response_model=CollectionManifest)
+async def get_manifest(response: Response):
+    response.headers["Cache-Control"] = "no-cache"
+    return CollectionManifest(versions=await collection_versions.snapshot())
+
+def versioned(*collections: str):
+    """Dependency for public reads the SPA keeps against /manifest (see above)"""
+    async def stamp(request: Request, response: Response):
+        if request.query_params.get("versioned") != "1":
+            return
+        versions = await collection_versions.snapshot()
+        response.headers[VERSION_HEADER] = ".".join(versions[name] for name in collections)
+        request.state.read_primary = True
+    return Depends(stamp)
+
+# ==================== SITEMAP AND FEEDS ====================
+
+# /sitemap.xml and /api/blogs/feed.xml are kept as prebuilt byte blobs keyed on the
+# versions of the collections they are built from. A crawler hit is a version check
+# plus a dictionary lookup, and a matching If-None-Match gets a bodyless 304. The
+# blobs are rebuilt (from the primary) the first time they are asked for after a
+# write. Each page is listed with ?lang= alternates, which the SPA reads on load.
+SITE_LANGUAGES = ("az", "en", "ru")  # az is the SPA's default language
+SITEMAP_COLLECTIONS = ("courses", "blogs", "vacancies", "internships")
+SITEMAP_STATIC_PAGES = {  # path -> collections whose latest change is the page's lastmod
+    "/": SITEMAP_COLLECTIONS,
+    "/about": (),
+    "/courses": ("courses",),
+    "/blog": ("blogs",),
+    "/contact": (),
+    "/vacancies": ("vacancies",),
+    "/internships": ("internships",),
+}
+FEED_TITLE = "Novatech Education Center Blog"
+FEED_ITEMS = 50
+FEED_CACHE_SIZE = 32
+FEED_CACHE_CONTROL = "public, max-age=300"
+feed_cache: Dict[tuple, tuple] = {}  # key -> (collection versions, body, ETag)
+
+def public_site_url(request: Request) -> str:
+    """Origin of the public site, for absolute links in sitemaps, feeds and meta tags.
+    Only the configured PUBLIC_SITE_URL is used, never the client-controlled Host header"""
+    site = request.app.state.settings.public_site_url
+    if not site:
+        raise HTTPException(status_code=503, detail="PUBLIC_SITE_URL is not configured")
+    return site.rstrip("/")
+
+def localized_text(content: Optional[dict], lang: str) -> str:
+    content = content or {}
+    return content.get(lang) or content.get("az") or content.get("en") or content.get("ru") or ""
+
+def content_timestamp(doc: dict) -> Optional[datetime]:
+    value = doc.get("updated_at") or doc.get("created_at")
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if isinstance(value, datetime) and value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value if isinstance(value, datetime) else None
+
+def sitemap_entry(site: str, path: str, lastmod: Optional[datetime]) -> str:
+    parts = [f"<url><loc>{html.escape(site + path)}</loc>"]
+    if lastmod:
+        parts.append(f"<lastmod>{lastmod.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')}</lastmod>")
+    for lang in SITE_LANGUAGES:
+        parts.append(f'<xhtml:link rel="alternate" hreflang="{lang}" href="{html.escape(f"{site}{path}?lang={lang}")}"/>')
+    parts.append(f'<xhtml:link rel="alternate" hreflang="x-default" href="{html.escape(site + path)}"/></url>')
+    return "".join(parts)
+
+async def build_sitemap(site: str) -> bytes:
+    stamp_fields = {"_id": 0, "created_at": 1, "updated_at": 1}
+    courses, blogs, vacancies, internships = await asyncio.gather(
+        db.courses.find({"is_active": True}, {**stamp_fields, "id": 1}).to_list(None),
+        db.blogs.find({"is_published": True}, {**stamp_fields, "slug": 1}).sort("created_at", -1).to_list(None),
+        db.vacancies.find({"is_active": True}, stamp_fields).to_list(None),
+        db.internships.find({"is_active": True}, stamp_fields).to_list(None)
+    )
+    latest = {}
+    for name, docs in zip(SITEMAP_COLLECTIONS, (courses, blogs, vacancies, internships)):
+        latest[name] = max(filter(None, map(content_timestamp, docs)), default=None)
+    entries = []
+    for path, sources in SITEMAP_STATIC_PAGES.items():
+        entries.append(sitemap_entry(site, path, max(filter(None, (latest[name] for name in sources)), default=None)))
+    entries += [sitemap_entry(site, f"/courses/{course['id']}", content_timestamp(course)) for course in courses]
+    entries += [sitemap_entry(site, f"/blog/{blog['slug']}", content_timestamp(blog)) for blog in blogs]
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9" xmlns:xhtml="http://www.w3.org/1999/xhtml">\n'
+        + "\n".join(entries)
+        + "\n</urlset>\n"
+    ).encode("utf-8")
+
+async def build_blog_feed(site: str, feed_url: str, lang: str) -> bytes:
+    """RSS 2.0 feed of the newest published posts in one language"""
+    blogs = await db.blogs.find(
+        {"is_published": True}, {"_id": 0, "id": 1, "slug": 1, "title": 1, "excerpt": 1, "created_at": 1, "updated_at": 1}
+    ).sort("created_at", -1).to_list(FEED_ITEMS)
+    items = []
+    for blog in blogs:
+        title = html.escape(localized_text(blog.get("title"), lang))
+        link = html.escape(f"{site}/blog/{blog['slug']}?lang={lang}")
+        description = html.escape(localized_text(blog.get("excerpt"), lang))
+        published = content_timestamp({"created_at": blog.get("created_at")})
+        pub_date = f"<pubDate>{format_datetime(published)}</pubDate>" if published else ""
+        items.append(
+            f"<item><title>{title}</title><link>{link}</link>"
+            f'<guid isPermaLink="false">{html.escape(blog["id"])}</guid>'
+            f"{pub_date}<description>{description}</description></item>"
+        )
+    updated = max(filter(None, map(content_timestamp, blogs)), default=None)
+    alternates = "".join(
+        f'<atom:link rel="alternate" hreflang="{other}" type="application/rss+xml" href="{html.escape(f"{feed_url}?lang={other}")}"/>'
+        for other in SITE_LANGUAGES if other != lang
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom"><channel>'
+        f"<title>{FEED_TITLE}</title>"
+        f"<link>{html.escape(f'{site}/blog?lang={lang}')}</link>"
+        f"<description>{FEED_TITLE}</description>"
+        f"<language>{lang}</language>"
+        f'<atom:link rel="self" type="application/rss+xml" href="{html.escape(f"{feed_url}?lang={lang}")}"/>'
+        + alternates
+        + (f"<lastBuildDate>{format_datetime(updated)}</lastBuildDate>" if updated else "")
+        + "\n" + "\n".join(items) + "\n</channel></rss>\n"
+    ).encode("utf-8")
+
+async def cached_document(request: Request, key: tuple, collections: tuple, build, media_type: str) -> Response:
+    versions = await collection_versions.current(*collections)
+    cached = feed_cache.get(key)
+    if not cached or cached[0] != versions:
+        body = await build()
+        cached = (versions, body, f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"')
+        if key not in feed_cache and len(feed_cache) >= FEED_CACHE_SIZE:
+            feed_cache.pop(next(iter(feed_cache)))
+        feed_cache[key] = cached
+    return conditional_response(request, cached[1], cached[2], media_type, FEED_CACHE_CONTROL)
+
+def conditional_response(
+    request: Request, body: bytes, etag: str, media_type: str, cache_control: str, extra_headers: Optional[dict] = None
+) -> Response:
+    """The body with its ETag, or a bodyless 304 when the client already has it"""
+    headers = {"ETag": etag, "Cache-Control": cache_control, **(extra_headers or {})}
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=media_type, headers=headers)
+
+@site_router.get("/sitemap.xml")
+async def get_sitemap(request: Request):
+    site = public_site_url(request)
+    return await cached_document(request, ("sitemap",), SITEMAP_COLLECTIONS, lambda: build_sitemap(site), "application/xml")
+
+# Registered ahead of /blogs/{slug}, which would otherwise match "feed.xml"
+@api_router.get("/blogs/feed.xml")
+async def get_blog_feed(request: Request, lang: str = Query("az", pattern="^(az|en|ru)$")):
+    site = public_site_url(request)
+    feed_url = site + request.url.path
+    return await cached_document(
+        request, ("feed", lang), ("blogs",),
+        lambda: build_blog_feed(site, feed_url, lang), "application/rss+xml; charset=utf-8"
+    )
+
+# ==================== CONTENT WRITES ====================
+
+# Admin updates are a single find_one_and_update that returns the stored document,
+# instead of update_one followed by find_one. Fields that must stay unique are
+# enforced by unique indexes: the insert or update itself fails with
+# DuplicateKeyError, so there is no racy find_one check beforehand.
+CONTENT_UNIQUE_KEYS = {"blogs": "slug", "cta_sections": "section_key"}
+
+async def insert_content(collection: str, doc: dict) -> dict:
+    """Insert a new document stamped with a sync revision"""
+    async with revision_lease(collection) as revision:
+        doc["revision"] = revision
+        await db[collection].insert_one(doc)
+    return doc
+
+async def update_content(collection: str, item_id: str, fields: dict, not_found: str) -> dict:
+    """$set fields on the document with this id, stamping a sync revision, and return it as stored"""
+    async with revision_lease(collection) as revision:
+        item = await db[collection].find_one_and_update(
+            {"id": item_id, "deleted_at": {"$exists": False}},
+            {"$set": {**fields, "revision": revision}},
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
+        )
+        if item is None:
+            # Raised inside the lease so the unused revision is released without moving any version
+            raise HTTPException(status_code=404, detail=not_found)
+    return item
+
+async def delete_content(collection: str, query: dict, not_found: Optional[str] = None) -> int:
+    """Delete the matching documents, or the one document when `not_found` is given.
+    They are first marked with deleted_at and a revision in a single write, which is
+    what sync reads as the deletion, and then buried; a crash in between is finished
+    by finish_deletions(). Returns how many documents were deleted"""
+    key = SYNC_COLLECTIONS[collection]
+    mark = {"deleted_at": bson_utc(datetime.now(timezone.utc))}
+    async with revision_lease(collection) as revision:
+        mark["revision"] = revision
+        if not_found is None:
+            await db[collection].update_many(query, {"$set": mark})
+            return await bury_deleted_content(collection, query)
+        doc = await db[collection].find_one_and_update(
+            query, {"$set": mark}, projection={key: 1, "revision": 1, "deleted_at": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if doc is None:
+            raise HTTPException(status_code=404, detail=not_found)
+        return await bury_deleted_content(collection, query, [doc])
+
+async def ensure_content_indexes():
+    """Create the unique indexes the write paths rely on; raises if one cannot be built"""
+    for collection, field in CONTENT_UNIQUE_KEYS.items():
+        try:
+            await db[collection].create_index(field, unique=True)
+        except Exception as e:
+            raise RuntimeError(
+                f"Cannot enforce unique {collection}.{field} (remove duplicate values before starting): {e}"
+            ) from e
+
 # ==================== COURSE ROUTES ====================
 
 @api_router.post("/courses", response_model=CourseResponse)
@@ -1008,19 +2274,19 @@ async def create_course(course_data: CourseCreate, current_user: dict = Depends(
         **course_data.model_dump(),
         "created_at": datetime.now(timezone.utc).isoformat()
     }
-    await db.courses.insert_one(course_doc)
+    await insert_content("courses", course_doc)
     logger.info(f"Course created: {course_id} by user: {current_user['email']}")
     return CourseResponse(**{**course_doc, "created_at": datetime.now(timezone.utc)})
 
-@api_router.get("/courses", response_model=List[CourseResponse])
-async def get_courses(category: Optional[str] = None, active_only: bool = True):
+@api_router.get("/courses", response_model=List[CourseResponse], dependencies=[versioned("courses")])
+async def get_courses(request: Request, category: Optional[str] = None, active_only: bool = True):
     query = {}
     if category:
         query["category"] = sanitize_input(category)
     if active_only:
         query["is_active"] = True
     
-    courses = await db.courses.find(query, {"_id": 0}).to_list(100)
+    courses = await reader_for(request, admin_view=not active_only).courses.find(query, {"_id": 0}).to_list(100)
     result = []
     for c in courses:
         if isinstance(c.get("created_at"), str):
@@ -1029,42 +2295,110 @@ async def get_courses(category: Optional[str] = None, active_only: bool = True):
     return result
 
 @api_router.get("/courses/{course_id}", response_model=CourseResponse)
-async def get_course(course_id: str):
+async def get_course(course_id: str, request: Request):
     # Validate UUID format
     try:
         uuid.UUID(course_id)
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid course ID format")
     
-    course = await db.courses.find_one({"id": course_id}, {"_id": 0})
+    course = await reader_for(request).courses.find_one({"id": course_id}, {"_id": 0})
     if not course:
         raise HTTPException(status_code=404, detail="Course not found")
     if isinstance(course.get("created_at"), str):
         course["created_at"] = datetime.fromisoformat(course["created_at"])
     return CourseResponse(**course)
 
+RELATED_COURSES_LIMIT = 3
+COURSE_PAGE_CACHE_SIZE = 256
+course_page_cache: Dict[str, tuple] = {}  # course id -> (courses/faqs versions, page stamp, category, CoursePage)
+
+def course_response(doc: dict) -> CourseResponse:
+    if isinstance(doc.get("created_at"), str):
+        doc["created_at"] = datetime.fromisoformat(doc["created_at"])
+    return CourseResponse(**doc)
+
+async def course_page_stamp(course_id: str, category: str) -> tuple:
+    """(count, highest revision) of the documents a course page is built from: the course
+    with the rest of its category, which related courses come from, and its FAQs. The
+    counts catch deletions below the highest revision"""
+    def summary(match: dict) -> list:
+        return [{"$match": match}, {"$group": {"_id": None, "count": {"$sum": 1}, "revision": {"$max": "$revision"}}}]
+    courses, faqs = await asyncio.gather(
+        db.courses.aggregate(summary({"$or": [{"id": course_id}, {"category": category}]})).to_list(1),
+        db.faqs.aggregate(summary({"course_id": course_id})).to_list(1)
+    )
+    return tuple((rows[0]["count"], rows[0]["revision"]) if rows else (0, None) for rows in (courses, faqs))
+
+@api_router.get("/courses/{course_id}/page", response_model=CoursePage)
+async def get_course_page(course_id: str):
+    """Course detail page in one call: the course, its FAQs in order and related courses"""
+    try:
+        uuid.UUID(course_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid course ID format")
+
+    # A page is kept under the stamp of the documents it was built from, so writes to
+    # other courses don't discard it. While the collection versions haven't moved it is
+    # served without a query; after a write only the stamp is read again. The stamp is
+    # read before the documents, so a page is never older than the stamp it is kept under
+    versions = await collection_versions.current("courses", "faqs")
+    cached = course_page_cache.get(course_id)
+    if cached and cached[0] == versions:
+        return cached[3]
+    if cached:
+        category = cached[2]
+    else:
+        course = await db.courses.find_one({"id": course_id}, {"_id": 0, "category": 1})
+        if not course:
+            raise HTTPException(status_code=404, detail="Course not found")
+        category = course["category"]
+    stamp = await course_page_stamp(course_id, category)
+    if cached and cached[1] == stamp:
+        course_page_cache[course_id] = (versions, stamp, category, cached[3])
+        return cached[3]
+
+    course, faqs, related = await asyncio.gather(
+        db.courses.find_one({"id": course_id}, {"_id": 0}),
+        db.faqs.find({"course_id": course_id}, {"_id": 0}).sort("order", 1).to_list(50),
+        db.courses.find(
+            {"category": category, "is_active": True, "id": {"$ne": course_id}}, {"_id": 0}
+        ).sort("is_popular", -1).to_list(RELATED_COURSES_LIMIT)
+    )
+    if not course:
+        course_page_cache.pop(course_id, None)
+        raise HTTPException(status_code=404, detail="Course not found")
+    if course["category"] != category:
+        # Moved to another category since the stamp was read; start over with the new one
+        course_page_cache.pop(course_id, None)
+        return await get_course_page(course_id)
+    page = CoursePage(
+        course=course_response(course),
+        faqs=[FAQResponse(**f) for f in faqs],
+        related=[course_response(c) for c in related]
+    )
+    if course_id not in course_page_cache and len(course_page_cache) >= COURSE_PAGE_CACHE_SIZE:
+        course_page_cache.pop(next(iter(course_page_cache)))
+    course_page_cache[course_id] = (versions, stamp, category, page)
+    return page
+
 @api_router.put("/courses/{course_id}", response_model=CourseResponse)
 async def update_course(course_id: str, course_data: CourseUpdate, current_user: dict = Depends(get_current_user)):
     update_data = {k: v for k, v in course_data.model_dump().items() if v is not None}
     if not update_data:
         raise HTTPException(status_code=400, detail="No data to update")
+    update_data["updated_at"] = datetime.now(timezone.utc).isoformat()
     
-    result = await db.courses.update_one({"id": course_id}, {"$set": update_data})
-    if result.matched_count == 0:
-        raise HTTPException(status_code=404, detail="Course not found")
-    
+    course = await update_content("courses", course_id, update_data, "Course not found")
     logger.info(f"Course updated: {course_id} by user: {current_user['email']}")
-    course = await db.courses.find_one({"id": course_id}, {"_id": 0})
     if isinstance(course.get("created_at"), str):
         course["created_at"] = datetime.fromisoformat(course["created_at"])
     return CourseResponse(**course)
 
 @api_router.delete("/courses/{course_id}")
 async def delete_course(course_id: str, current_user: dict = Depends(get_current_user)):
-    result = await db.courses.delete_one({"id": course_id})
-    if result.deleted_count == 0:
-        raise HTTPException(status_code=404, detail="Course not found")
-    await db.faqs.delete_many({"course_id": course_id})
+    await delete_content("courses", {"id": course_id}, "Course not found")
+    await delete_content("faqs", {"course_id": course_id})
     logger.info(f"Course deleted: {course_id} by user: {current_user['email']}")
     return {"message": "Course deleted successfully"}
 
@@ -1074,38 +2408,28 @@ async def delete_course(course_id: str, current_user: dict = Depends(get_current
 async def create_faq(faq_data: FAQCreate, current_user: dict = Depends(get_current_user)):
     faq_id = str(uuid.uuid4())
     faq_doc = {"id": faq_id, **faq_data.model_dump()}
-    await db.faqs.insert_one(faq_doc)
+    await insert_content("faqs", faq_doc)
     return FAQResponse(**faq_doc)
 
 @api_router.get("/faqs/{course_id}", response_model=List[FAQResponse])
-async def get_faqs(course_id: str):
-    faqs = await db.faqs.find({"course_id": course_id}, {"_id": 0}).sort("order", 1).to_list(50)
+async def get_faqs(course_id: str, request: Request):
+    faqs = await reader_for(request).faqs.find({"course_id": course_id}, {"_id": 0}).sort("order", 1).to_list(50)
     return [FAQResponse(**f) for f in faqs]
 
 @api_router.put("/faqs/{faq_id}", response_model=FAQResponse)
 async def update_faq(faq_id: str, faq_data: FAQCreate, current_user: dict = Depends(get_current_user)):
-    result = await db.faqs.update_one({"id": faq_id}, {"$set": faq_data.model_dump()})
-    if result.matched_count == 0:
-        raise HTTPException(status_code=404, detail="FAQ not found")
-    faq = await db.faqs.find_one({"id": faq_id}, {"_id": 0})
+    faq = await update_content("faqs", faq_id, faq_data.model_dump(), "FAQ not found")
     return FAQResponse(**faq)
 
 @api_router.delete("/faqs/{faq_id}")
 async def delete_faq(faq_id: str, current_user: dict = Depends(get_current_user)):
-    result = await db.faqs.delete_one({"id": faq_id})
-    if result.deleted_count == 0:
-        raise HTTPException(status_code=404, detail="FAQ not found")
+    await delete_content("faqs", {"id": faq_id}, "FAQ not found")
     return {"message": "FAQ deleted successfully"}
 
 # ==================== BLOG ROUTES ====================
 
 @api_router.post("/blogs", response_model=BlogResponse)
 async def create_blog(blog_data: BlogCreate, current_user: dict = Depends(get_current_user)):
-    # Check for duplicate slug
-    existing = await db.blogs.find_one({"slug": blog_data.slug})
-    if existing:
-        raise HTTPException(status_code=400, detail="Slug already exists")
-    
     blog_id = str(uuid.uuid4())
     now = datetime.now(timezone.utc)
     blog_doc = {
@@ -1114,15 +2438,19 @@ async def create_blog(blog_data: BlogCreate, current_user: dict = Depends(get_cu
         "created_at": now.isoformat(),
         "updated_at": now.isoformat()
     }
-    await db.blogs.insert_one(blog_doc)
+    try:
+        await insert_content("blogs", blog_doc)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Slug already exists")
+    schedule_blog_related_rebuild()
     logger.info(f"Blog created: {blog_id} by user: {current_user['email']}")
     return BlogResponse(**{**blog_doc, "created_at": now, "updated_at": now})
 
-@api_router.get("/blogs/homepage", response_model=List[BlogResponse])
-async def get_homepage_blogs():
+@api_router.get("/blogs/homepage", response_model=List[BlogResponse], dependencies=[versioned("blogs")])
+async def get_homepage_blogs(request: Request):
     """Get blogs marked for homepage carousel"""
     query = {"is_published": True, "show_on_homepage": True}
-    blogs = await db.blogs.find(query, {"_id": 0}).sort("created_at", -1).to_list(20)
+    blogs = await reader_for(request).blogs.find(query, {"_id": 0}).sort("created_at", -1).to_list(20)
     result = []
     for b in blogs:
         if isinstance(b.get("created_at"), str):
@@ -1133,9 +2461,9 @@ async def get_homepage_blogs():
     return result
 
 @api_router.get("/blogs", response_model=List[BlogResponse])
-async def get_blogs(published_only: bool = True):
+async def get_blogs(request: Request, published_only: bool = True):
     query = {"is_published": True} if published_only else {}
-    blogs = await db.blogs.find(query, {"_id": 0}).sort("created_at", -1).to_list(100)
+    blogs = await reader_for(request, admin_view=not published_only).blogs.find(query, {"_id": 0}).sort("created_at", -1).to_list(100)
     result = []
     for b in blogs:
         if isinstance(b.get("created_at"), str):
@@ -1147,10 +2475,10 @@ async def get_blogs(published_only: bool = True):
     return result
 
 @api_router.get("/blogs/{slug}", response_model=BlogResponse)
-async def get_blog(slug: str):
+async def get_blog(slug: str, request: Request):
     # Sanitize slug input
     slug = re.sub(r'[^a-zA-Z0-9\-_]', '', slug.lower())
-    blog = await db.blogs.find_one({"slug": slug}, {"_id": 0})
+    blog = await reader_for(request).blogs.find_one({"slug": slug}, {"_id": 0})
     if not blog:
         raise HTTPException(status_code=404, detail="Blog not found")
     if isinstance(blog.get("created_at"), str):
@@ -1164,12 +2492,13 @@ async def update_blog(blog_id: str, blog_data: BlogUpdate, current_user: dict =
     update_data = {k: v for k, v in blog_data.model_dump().items() if v is not None}
     update_data["updated_at"] = datetime.now(timezone.utc).isoformat()
     
-    result = await db.blogs.update_one({"id": blog_id}, {"$set": update_data})
-    if result.matched_count == 0:
-        raise HTTPException(status_code=404, detail="Blog not found")
+    try:
+        blog = await update_content("blogs", blog_id, update_data, "Blog not found")
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Slug already exists")
+    schedule_blog_related_rebuild()
     
     logger.info(f"Blog updated: {blog_id} by user: {current_user['email']}")
-    blog = await db.blogs.find_one({"id": blog_id}, {"_id": 0})
     if isinstance(blog.get("created_at"), str):
         blog["created_at"] = datetime.fromisoformat(blog["created_at"])
     if isinstance(blog.get("updated_at"), str):
@@ -1178,25 +2507,139 @@ async def update_blog(blog_id: str, blog_data: BlogUpdate, current_user: dict =
 
 @api_router.delete("/blogs/{blog_id}")
 async def delete_blog(blog_id: str, current_user: dict = Depends(get_current_user)):
-    result = await db.blogs.delete_one({"id": blog_id})
-    if result.deleted_count == 0:
-        raise HTTPException(status_code=404, detail="Blog not found")
+    await delete_content("blogs", {"id": blog_id}, "Blog not found")
+    schedule_blog_related_rebuild()
     logger.info(f"Blog deleted: {blog_id} by user: {current_user['email']}")
     return {"message": "Blog deleted successfully"}
 
+# ==================== RELATED POSTS ====================
+
+# Each published post's most similar posts, precomputed into blog_related as
+# ready-made summary cards so a blog page fetches one small document instead of
+# the whole blog list. Similarity is the idf-weighted cosine of the terms in the
+# titles and excerpts (all languages). Ties, including posts sharing no terms,
+# go to the newest post. Every blog write schedules a rebuild in the background.
+BLOG_RELATED = "blog_related"
+RELATED_POSTS_MAX = 8
+RELATED_TERM_PATTERN = re.compile(r"\w{3,}")
+BLOG_CARD_PROJECTION = {"_id": 0, "id": 1, "slug": 1, "title": 1, "excerpt": 1, "created_at": 1, "content_blocks": 1}
+
+blog_related_task: Optional[asyncio.Task] = None
+blog_related_dirty = False
+
+def blog_card(blog: dict) -> dict:
+    image_url = next(
+        (block.get("image_url") for block in blog.get("content_blocks") or [] if block.get("type") == "image" and block.get("image_url")),
+        None
+    )
+    return {
+        "id": blog["id"],
+        "slug": blog["slug"],
+        "title": blog["title"],
+        "excerpt": blog["excerpt"],
+        "image_url": image_url,
+        "created_at": blog["created_at"]
+    }
+
+def blog_terms(blog: dict) -> set:
+    text = " ".join(value for field in ("title", "excerpt") for value in (blog.get(field) or {}).values() if value)
+    return set(RELATED_TERM_PATTERN.findall(text.lower()))
+
+def rank_related_posts(blogs: List[dict]) -> List[List[int]]:
+    """For each post (newest first), the indexes of its RELATED_POSTS_MAX most similar posts"""
+    count = len(blogs)
+    terms = [blog_terms(blog) for blog in blogs]
+    vocabulary = {term: column for column, term in enumerate(sorted(set().union(*terms)))}
+    matrix = np.zeros((count, max(len(vocabulary), 1)))
+    for row, row_terms in enumerate(terms):
+        matrix[row, [vocabulary[term] for term in row_terms]] = 1.0
+    matrix *= np.log((1 + count) / (1 + matrix.sum(axis=0))) + 1
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix /= np.where(norms == 0, 1, norms)
+    # Rounded so near-equal scores fall back to recency (the lower index)
+    scores = np.round(matrix @ matrix.T, 6)
+    positions = np.arange(count)
+    ranked = []
+    for row in range(count):
+        order = np.lexsort((positions, -scores[row]))
+        ranked.append([int(i) for i in order if i != row][:RELATED_POSTS_MAX])
+    return ranked
+
+async def rebuild_blog_related() -> int:
+    blogs = await db.blogs.find({"is_published": True}, BLOG_CARD_PROJECTION).sort("created_at", -1).to_list(None)
+    cards = [blog_card(blog) for blog in blogs]
+    # The n×n similarity is CPU work; keep it off the event loop
+    ranked = await asyncio.to_thread(rank_related_posts, blogs)
+    computed_at = datetime.now(timezone.utc)
+    writes = [
+        ReplaceOne(
+            {"_id": blog["id"]},
+            {"slug": blog["slug"], "related": [cards[i] for i in neighbours], "computed_at": computed_at},
+            upsert=True
+        )
+        for blog, neighbours in zip(blogs, ranked)
+    ]
+    if writes:
+        await db[BLOG_RELATED].bulk_write(writes, ordered=False)
+    await db[BLOG_RELATED].delete_many({"_id": {"$nin": [blog["id"] for blog in blogs]}})
+    return len(writes)
+
+async def run_blog_related_rebuild():
+    global blog_related_dirty
+    # Writes arriving during a rebuild set the flag again and get one more pass
+    while blog_related_dirty:
+        blog_related_dirty = False
+        try:
+            await rebuild_blog_related()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Related posts rebuild failed: {e}")
+
+def schedule_blog_related_rebuild():
+    global blog_related_task, blog_related_dirty
+    blog_related_dirty = True
+    if blog_related_task is None or blog_related_task.done():
+        blog_related_task = asyncio.create_task(run_blog_related_rebuild())
+
+async def ensure_blog_related():
+    await db[BLOG_RELATED].create_index("slug")
+    await rebuild_blog_related()
+
+@api_router.get("/blogs/{slug}/related", response_model=List[BlogSummary])
+async def get_related_blogs(slug: str, request: Request, limit: int = Query(4, ge=1, le=RELATED_POSTS_MAX)):
+    slug = re.sub(r'[^a-zA-Z0-9\-_]', '', slug.lower())
+    reader = reader_for(request)
+    entry = await reader[BLOG_RELATED].find_one({"slug": slug}, {"_id": 0, "related": 1})
+    if entry:
+        return [BlogSummary(**card) for card in entry["related"][:limit]]
+
+    # Drafts and posts published since the last rebuild: newest posts instead
+    blog = await reader.blogs.find_one({"slug": slug}, {"_id": 0, "id": 1})
+    if not blog:
+        raise HTTPException(status_code=404, detail="Blog not found")
+    recent = await reader.blogs.find(
+        {"is_published": True, "id": {"$ne": blog["id"]}}, BLOG_CARD_PROJECTION
+    ).sort("created_at", -1).to_list(limit)
+    return [BlogSummary(**blog_card(post)) for post in recent]
+
 # ==================== TESTIMONIAL ROUTES ====================
 
 @api_router.post("/testimonials", response_model=TestimonialResponse)
 async def create_testimonial(data: TestimonialCreate, current_user: dict = Depends(get_current_user)):
     item_id = str(uuid.uuid4())
-    doc = {"id": item_id, **data.model_dump(), "created_at": datetime.now(timezone.utc).isoformat()}
-    await db.testimonials.insert_one(doc)
+    doc = {
+        "id": item_id,
+        **data.model_dump(),
+        "created_at": datetime.now(timezone.utc).isoformat()
+    }
+    await insert_content("testimonials", doc)
     return TestimonialResponse(**{**doc, "created_at": datetime.now(timezone.utc)})
 
-@api_router.get("/testimonials", response_model=List[TestimonialResponse])
-async def get_testimonials(active_only: bool = True):
+@api_router.get("/testimonials", response_model=List[TestimonialResponse], dependencies=[versioned("testimonials")])
+async def get_testimonials(request: Request, active_only: bool = True):
     query = {"is_active": True} if active_only else {}
-    items = await db.testimonials.find(query, {"_id": 0}).to_list(50)
+    items = await reader_for(request, admin_view=not active_only).testimonials.find(query, {"_id": 0}).to_list(50)
     result = []
     for t in items:
         if isinstance(t.get("created_at"), str):
@@ -1206,19 +2649,14 @@ async def get_testimonials(active_only: bool = True):
 
 @api_router.put("/testimonials/{item_id}", response_model=TestimonialResponse)
 async def update_testimonial(item_id: str, data: TestimonialCreate, current_user: dict = Depends(get_current_user)):
-    result = await db.testimonials.update_one({"id": item_id}, {"$set": data.model_dump()})
-    if result.matched_count == 0:
-        raise HTTPException(status_code=404, detail="Testimonial not found")
-    item = await db.testimonials.find_one({"id": item_id}, {"_id": 0})
+    item = await update_content("testimonials", item_id, data.model_dump(), "Testimonial not found")
     if isinstance(item.get("created_at"), str):
         item["created_at"] = datetime.fromisoformat(item["created_at"])
     return TestimonialResponse(**item)
 
 @api_router.delete("/testimonials/{item_id}")
 async def delete_testimonial(item_id: str, current_user: dict = Depends(get_current_user)):
-    result = await db.testimonials.delete_one({"id": item_id})
-    if result.deleted_count == 0:
-        raise HTTPException(status_code=404, detail="Testimonial not found")
+    await delete_content("testimonials", {"id": item_id}, "Testimonial not found")
     return {"message": "Testimonial deleted successfully"}
 
 # ==================== TEACHER ROUTES ====================
@@ -1226,14 +2664,18 @@ async def delete_testimonial(item_id: str, current_user: dict = Depends(get_curr
 @api_router.post("/teachers", response_model=TeacherResponse)
 async def create_teacher(data: TeacherCreate, current_user: dict = Depends(get_current_user)):
     item_id = str(uuid.uuid4())
-    doc = {"id": item_id, **data.model_dump(), "created_at": datetime.now(timezone.utc).isoformat()}
-    await db.teachers.insert_one(doc)
+    doc = {
+        "id": item_id,
+        **data.model_dump(),
+        "created_at": datetime.now(timezone.utc).isoformat()
+    }
+    await insert_content("teachers", doc)
     return TeacherResponse(**{**doc, "created_at": datetime.now(timezone.utc)})
 
 @api_router.get("/teachers", response_model=List[TeacherResponse])
-async def get_teachers(active_only: bool = True):
+async def get_teachers(request: Request, active_only: bool = True):
     query = {"is_active": True} if active_only else {}
-    items = await db.teachers.find(query, {"_id": 0}).sort("order", 1).to_list(50)
+    items = await reader_for(request, admin_view=not active_only).teachers.find(query, {"_id": 0}).sort("order", 1).to_list(50)
     result = []
     for t in items:
         if isinstance(t.get("created_at"), str):
@@ -1243,21 +2685,263 @@ async def get_teachers(active_only: bool = True):
 
 @api_router.put("/teachers/{item_id}", response_model=TeacherResponse)
 async def update_teacher(item_id: str, data: TeacherCreate, current_user: dict = Depends(get_current_user)):
-    result = await db.teachers.update_one({"id": item_id}, {"$set": data.model_dump()})
-    if result.matched_count == 0:
-        raise HTTPException(status_code=404, detail="Teacher not found")
-    item = await db.teachers.find_one({"id": item_id}, {"_id": 0})
+    item = await update_content("teachers", item_id, data.model_dump(), "Teacher not found")
     if isinstance(item.get("created_at"), str):
         item["created_at"] = datetime.fromisoformat(item["created_at"])
     return TeacherResponse(**item)
 
 @api_router.delete("/teachers/{item_id}")
 async def delete_teacher(item_id: str, current_user: dict = Depends(get_current_user)):
-    result = await db.teachers.delete_one({"id": item_id})
-    if result.deleted_count == 0:
-        raise HTTPException(status_code=404, detail="Teacher not found")
+    await delete_content("teachers", {"id": item_id}, "Teacher not found")
     return {"message": "Teacher deleted successfully"}
 
+# ==================== INBOX COUNTERS ====================
+
+# Totals behind the admin unread badges, kept in inbox_counters so polling them is
+# one small read instead of listing submissions. Every write that changes a count
+# applies a $inc in the same handler; reconcile_inbox_counters() periodically
+# rebuilds them from the collections to repair any drift.
+INBOX_COUNTERS = "inbox_counters"
+
+def inbox_counter(kind: str, key: str, **amounts: int) -> UpdateOne:
+    """Upsert for one counter document, e.g. inbox_counter("submission", "contact", total=1, unread=1)"""
+    return UpdateOne(
+        {"_id": f"{kind}|{key}"},
+        {"$inc": amounts, "$setOnInsert": {"kind": kind, "key": key}},
+        upsert=True
+    )
+
+def trial_lesson_counters(course: str, created_at: str, amount: int) -> List[UpdateOne]:
+    return [
+        inbox_counter("trial", "all", total=amount),
+        inbox_counter("trial_course", course, total=amount),
+        inbox_counter("trial_day", created_at[:10], total=amount),
+    ]
+
+async def update_inbox_counters(ops: List[UpdateOne]):
+    await db[INBOX_COUNTERS].bulk_write(ops, ordered=False)
+
+async def reconcile_inbox_counters() -> int:
+    """Recount everything from submissions and trial_lessons; returns the number of counters that were off"""
+    submission_rows = await db.submissions.aggregate([
+        {"$group": {"_id": "$type", "total": {"$sum": 1},
+                    "unread": {"$sum": {"$cond": [{"$eq": ["$is_read", False]}, 1, 0]}}}}
+    ]).to_list(None)
+    expected = {f"submission|{row['_id']}": {"kind": "submission", "key": row["_id"], "total": row["total"],
+                                             "unread": row["unread"]} for row in submission_rows}
+    # created_at is an ISO string, so the day is its first ten characters
+    trial_counts = defaultdict(int)
+    async for lesson in db.trial_lessons.find({}, {"_id": 0, "course": 1, "created_at": 1}):
+        trial_counts[("trial", "all")] += 1
+        trial_counts[("trial_course", lesson["course"])] += 1
+        trial_counts[("trial_day", str(lesson["created_at"])[:10])] += 1
+    for (kind, key), total in trial_counts.items():
+        expected[f"{kind}|{key}"] = {"kind": kind, "key": key, "total": total}
+
+    current = {doc.pop("_id"): doc for doc in await db[INBOX_COUNTERS].find().to_list(None)}
+    ops = [ReplaceOne({"_id": key}, doc, upsert=True) for key, doc in expected.items() if current.get(key) != doc]
+    stale = [key for key in current if key not in expected]
+    if ops:
+        await db[INBOX_COUNTERS].bulk_write(ops, ordered=False)
+    if stale:
+        await db[INBOX_COUNTERS].delete_many({"_id": {"$in": stale}})
+    # A counter the $incs brought back to zero is dropped here, but it wasn't off
+    drifted = [key for key in stale if current[key].get("total") or current[key].get("unread")]
+    return len(ops) + len(drifted)
+
+async def inbox_reconcile_loop(settings: AppSettings):
+    while True:
+        try:
+            fixed = await reconcile_inbox_counters()
+            if fixed:
+                logger.info(f"Reconciled {fixed} inbox counters")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Inbox counter reconcile failed: {e}")
+        await asyncio.sleep(settings.inbox_reconcile_interval_seconds)
+
+# ==================== ADMIN EVENTS ====================
+
+# In-process pub/sub behind the admin Server-Sent Events stream. Handlers publish
+# compact events, and each one is serialised once and fanned out to the open
+# streams. The last ADMIN_EVENT_HISTORY events are kept so that a reconnecting
+# EventSource can replay what it missed from its Last-Event-ID. Event ids carry a
+# per-process prefix. When an id can't be replayed (a restart, another worker, or
+# too far behind), the client is sent "resync" and reloads its lists instead.
+#
+# EventSource cannot send headers, so a browser first trades its JWT for a ticket
+# (POST /admin/events/ticket) and opens the stream with ?ticket=. Tickets are random,
+# single-use and expire after ADMIN_EVENT_TICKET_SECONDS, so the URLs that end up in
+# access logs carry nothing reusable. A stream ends when the session's JWT expires
+# ("expired" event) and in any case after ADMIN_EVENT_STREAM_SECONDS, when the client
+# reconnects with a fresh ticket. The second bound keeps graceful shutdown (which
+# waits for open responses before the lifespan's admin_events.close() runs) and
+# --reload from hanging on idle streams; run uvicorn with --timeout-graceful-shutdown
+# to bound it further.
+ADMIN_EVENT_HISTORY = 500
+ADMIN_EVENT_QUEUE_SIZE = 256
+ADMIN_EVENT_HEARTBEAT_SECONDS = 20
+ADMIN_EVENT_STREAM_SECONDS = 120
+ADMIN_EVENT_TICKET_SECONDS = 30
+ADMIN_EVENT_TICKETS = "admin_event_tickets"  # {_id: ticket, user_id, session_expires, expires_at}
+LIVE_VISITOR_INTERVAL_SECONDS = 15
+LIVE_VISITOR_WINDOW_SECONDS = 90  # a session counts as live if it sent a pageview/heartbeat this recently
+
+def format_sse(event: str, data: Dict[str, Any], event_id: Optional[str] = None) -> str:
+    message = f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'), default=str)}\n\n"
+    return f"id: {event_id}\n{message}" if event_id else message
+
+class AdminEventBroker:
+    def __init__(self):
+        self.prefix = uuid.uuid4().hex[:8]
+        self.sequence = 0
+        self.history: deque = deque(maxlen=ADMIN_EVENT_HISTORY)  # (sequence, message)
+        self.latest: Dict[str, str] = {}  # last message of each ephemeral event type
+        self.subscribers: set = set()
+
+    def publish(self, event: str, data: Dict[str, Any], replay: bool = True):
+        """Replayable events get an id; ephemeral ones (e.g. visitor counts) only keep their latest value"""
+        if replay:
+            self.sequence += 1
+            message = format_sse(event, data, f"{self.prefix}-{self.sequence}")
+            self.history.append((self.sequence, message))
+        else:
+            message = format_sse(event, data)
+            self.latest[event] = message
+        for queue in self.subscribers:
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # A stalled client gets one resync instead of an unbounded backlog
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(format_sse("resync", {}))
+
+    def replay(self, last_event_id: Optional[str]) -> List[str]:
+        messages = list(self.latest.values())
+        if not last_event_id:
+            return messages
+        prefix, _, sequence = last_event_id.partition("-")
+        oldest = self.history[0][0] if self.history else self.sequence + 1
+        if prefix != self.prefix or not sequence.isdigit() or int(sequence) < oldest - 1:
+            return [format_sse("resync", {})] + messages
+        return messages + [message for seq, message in self.history if seq > int(sequence)]
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=ADMIN_EVENT_QUEUE_SIZE)
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self.subscribers.discard(queue)
+
+    def close(self):
+        """End every open stream, e.g. on shutdown"""
+        for queue in self.subscribers:
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(None)
+
+admin_events = AdminEventBroker()
+
+async def ensure_admin_event_storage():
+    await db[ADMIN_EVENT_TICKETS].create_index("expires_at", expireAfterSeconds=0)
+
+async def redeem_admin_event_ticket(ticket: str) -> Optional[datetime]:
+    """Consume a stream ticket; the expiry of the session it was issued for, or None if unusable"""
+    doc = await db[ADMIN_EVENT_TICKETS].find_one_and_delete(
+        {"_id": ticket, "expires_at": {"$gt": bson_utc(datetime.now(timezone.utc))}}
+    )
+    if not doc or not await db.users.find_one({"id": doc["user_id"]}, {"_id": 1}):
+        return None
+    return doc["session_expires"].replace(tzinfo=timezone.utc)
+
+async def live_visitor_loop():
+    """Publish the live visitor count while anyone is watching, and only when it changes"""
+    last_count = None
+    while True:
+        await asyncio.sleep(LIVE_VISITOR_INTERVAL_SECONDS)
+        if not admin_events.subscribers:
+            continue
+        try:
+            since = bson_utc(datetime.now(timezone.utc) - timedelta(seconds=LIVE_VISITOR_WINDOW_SECONDS))
+            count = await db[ANALYTICS_SESSIONS].count_documents({"last_seen": {"$gte": since}, "left": {"$ne": True}})
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Live visitor count failed: {e}")
+            continue
+        if count != last_count:
+            admin_events.publish("visitors", {"count": count}, replay=False)
+            last_count = count
+
+@api_router.post("/admin/events/ticket")
+async def create_admin_event_ticket(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: dict = Depends(get_current_user)
+):
+    """Single-use ticket for opening the event stream with EventSource"""
+    payload = verify_token(credentials.credentials)
+    ticket = secrets.token_urlsafe(32)
+    now = datetime.now(timezone.utc)
+    await db[ADMIN_EVENT_TICKETS].insert_one({
+        "_id": ticket,
+        "user_id": current_user["id"],
+        "session_expires": bson_utc(datetime.fromtimestamp(payload["exp"], timezone.utc)),
+        "expires_at": bson_utc(now + timedelta(seconds=ADMIN_EVENT_TICKET_SECONDS)),
+    })
+    return {"ticket": ticket, "expires_in": ADMIN_EVENT_TICKET_SECONDS}
+
+@api_router.get("/admin/events")
+async def stream_admin_events(request: Request, ticket: Optional[str] = None, last_event_id: Optional[str] = None):
+    """Server-Sent Events: new/read/deleted submissions and trial lessons, plus the live visitor count"""
+    if ticket:
+        session_expires = await redeem_admin_event_ticket(ticket)
+        if session_expires is None:
+            raise HTTPException(status_code=401, detail="Invalid or expired ticket")
+    else:
+        # Clients that can send headers may use the JWT directly
+        _, _, token = request.headers.get("authorization", "").partition(" ")
+        if not token:
+            raise HTTPException(status_code=401, detail="Not authenticated")
+        await get_current_user(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token))
+        session_expires = datetime.fromtimestamp(verify_token(token)["exp"], timezone.utc)
+
+    # A reconnect with a new ticket is a new EventSource, which passes its position in the query
+    last_event_id = request.headers.get("last-event-id") or last_event_id
+    deadline = min(session_expires.timestamp(), time.time() + ADMIN_EVENT_STREAM_SECONDS)
+
+    async def stream():
+        # Subscribing and taking the backlog happen together, so no event falls between them
+        queue = admin_events.subscribe()
+        backlog = admin_events.replay(last_event_id)
+        try:
+            yield "retry: 5000\n\n"
+            for message in backlog:
+                yield message
+            while True:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    if time.time() >= session_expires.timestamp():
+                        yield format_sse("expired", {})
+                    return
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=min(ADMIN_EVENT_HEARTBEAT_SECONDS, remaining))
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"  # keeps proxies from closing an idle connection
+                    continue
+                if message is None:
+                    return
+                yield message
+        finally:
+            admin_events.unsubscribe(queue)
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"  # nginx: flush each event instead of buffering the response
+    })
+
 # ==================== SUBMISSION ROUTES ====================
 
 @api_router.post("/submissions/contact")
@@ -1278,6 +2962,8 @@ async def submit_contact(data: ContactSubmission, request: Request):
         "ip_address": hashlib.sha256(client_ip.encode()).hexdigest()[:16]  # Store hashed IP for abuse detection
     }
     await db.submissions.insert_one(doc)
+    await update_inbox_counters([inbox_counter("submission", "contact", total=1, unread=1)])
+    admin_events.publish("submission", {"id": item_id, "type": "contact", "created_at": doc["created_at"]})
     logger.info(f"Contact form submitted: {item_id}")
     return {"message": "Message sent successfully", "id": item_id}
 
@@ -1299,6 +2985,8 @@ async def submit_application(data: CourseApplicationSubmission, request: Request
         "ip_address": hashlib.sha256(client_ip.encode()).hexdigest()[:16]
     }
     await db.submissions.insert_one(doc)
+    await update_inbox_counters([inbox_counter("submission", "application", total=1, unread=1)])
+    admin_events.publish("submission", {"id": item_id, "type": "application", "created_at": doc["created_at"]})
     logger.info(f"Course application submitted: {item_id}")
     return {"message": "Application submitted successfully", "id": item_id}
 
@@ -1313,18 +3001,56 @@ async def get_submissions(type: Optional[str] = None, current_user: dict = Depen
         result.append(SubmissionResponse(**s))
     return result
 
+async def load_inbox_stats(days: int = 30) -> InboxStats:
+    since = (datetime.now(timezone.utc) - timedelta(days=days - 1)).date().isoformat()
+    counters = await db[INBOX_COUNTERS].find(
+        {"$or": [{"kind": {"$ne": "trial_day"}}, {"key": {"$gte": since}}]}
+    ).to_list(None)
+    submissions: Dict[str, SubmissionCounts] = {}
+    trial_lessons = TrialLessonStats()
+    for counter in counters:
+        if counter["kind"] == "submission":
+            submissions[counter["key"]] = SubmissionCounts(total=counter["total"], unread=counter.get("unread", 0))
+        elif counter["kind"] == "trial":
+            trial_lessons.total = counter["total"]
+        elif counter["total"] > 0:
+            target = trial_lessons.by_course if counter["kind"] == "trial_course" else trial_lessons.by_day
+            target[counter["key"]] = counter["total"]
+    return InboxStats(
+        unread=sum(counts.unread for counts in submissions.values()),
+        submissions=submissions,
+        trial_lessons=trial_lessons
+    )
+
+@api_router.get("/submissions/stats", response_model=InboxStats)
+async def get_submission_stats(
+    days: int = Query(30, ge=1, le=366),
+    current_user: dict = Depends(get_current_user)
+):
+    """Total and unread submissions per type, and trial lesson requests per course and per day"""
+    return await load_inbox_stats(days)
+
 @api_router.put("/submissions/{item_id}/read")
 async def mark_submission_read(item_id: str, current_user: dict = Depends(get_current_user)):
-    result = await db.submissions.update_one({"id": item_id}, {"$set": {"is_read": True}})
-    if result.matched_count == 0:
+    # Only the request that flips is_read decrements the unread counter
+    doc = await db.submissions.find_one_and_update(
+        {"id": item_id, "is_read": False}, {"$set": {"is_read": True}}, projection={"_id": 0, "type": 1}
+    )
+    if doc is not None:
+        await update_inbox_counters([inbox_counter("submission", doc["type"], unread=-1)])
+        admin_events.publish("submission_read", {"id": item_id, "type": doc["type"]})
+    elif not await db.submissions.count_documents({"id": item_id}, limit=1):
         raise HTTPException(status_code=404, detail="Submission not found")
     return {"message": "Marked as read"}
 
 @api_router.delete("/submissions/{item_id}")
 async def delete_submission(item_id: str, current_user: dict = Depends(get_current_user)):
-    result = await db.submissions.delete_one({"id": item_id})
-    if result.deleted_count == 0:
+    doc = await db.submissions.find_one_and_delete({"id": item_id}, projection={"_id": 0, "type": 1, "is_read": 1})
+    if doc is None:
         raise HTTPException(status_code=404, detail="Submission not found")
+    unread = 0 if doc.get("is_read") else -1
+    await update_inbox_counters([inbox_counter("submission", doc["type"], total=-1, unread=unread)])
+    admin_events.publish("submission_deleted", {"id": item_id, "type": doc["type"]})
     return {"message": "Submission deleted successfully"}
 
 # ==================== TRIAL LESSON ROUTES ====================
@@ -1345,6 +3071,8 @@ async def create_trial_lesson(data: TrialLessonCreate, request: Request):
         "created_at": now.isoformat()
     }
     await db.trial_lessons.insert_one(doc)
+    await update_inbox_counters(trial_lesson_counters(doc["course"], doc["created_at"], 1))
+    admin_events.publish("trial_lesson", {"id": doc["id"], "course": doc["course"], "created_at": doc["created_at"]})
     logger.info(f"Trial lesson request from {data.full_name}")
     return TrialLessonResponse(**{**doc, "created_at": now})
 
@@ -1362,17 +3090,876 @@ async def get_trial_lessons(current_user: dict = Depends(get_current_user)):
 @api_router.delete("/trial-lessons/{item_id}")
 async def delete_trial_lesson(item_id: str, current_user: dict = Depends(get_current_user)):
     """Delete a single trial lesson request (admin only)"""
-    result = await db.trial_lessons.delete_one({"id": item_id})
-    if result.deleted_count == 0:
+    doc = await db.trial_lessons.find_one_and_delete({"id": item_id}, projection={"_id": 0, "course": 1, "created_at": 1})
+    if doc is None:
         raise HTTPException(status_code=404, detail="Trial lesson not found")
+    await update_inbox_counters(trial_lesson_counters(doc["course"], doc["created_at"], -1))
+    admin_events.publish("trial_lesson_deleted", {"id": item_id})
     return {"message": "Trial lesson deleted successfully"}
 
 @api_router.delete("/trial-lessons")
 async def delete_all_trial_lessons(current_user: dict = Depends(get_current_user)):
     """Delete all trial lesson requests (admin only)"""
     result = await db.trial_lessons.delete_many({})
+    # Requests submitted meanwhile are picked up again by the next reconcile
+    await db[INBOX_COUNTERS].delete_many({"kind": {"$in": ["trial", "trial_course", "trial_day"]}})
+    admin_events.publish("trial_lessons_cleared", {"count": result.deleted_count})
     return {"message": f"Deleted {result.deleted_count} trial lesson requests"}
 
+# ==================== USER AGENT CLASSIFICATION ====================
+
+# Device, browser and OS come from the request's User-Agent header, never from the
+# client payload, so breakdowns cannot be spoofed and are consistent across clients.
+# Distinct UA strings are few compared to requests, so classification is memoised.
+BOT_PATTERN = re.compile(
+    r"bot\b|bot/|crawl|spider|slurp|archiver|scrape|fetcher|preview|monitor|lighthouse|headless"
+    r"|facebookexternalhit|embedly|whatsapp|telegram|python-|curl/|wget/|httpx|okhttp|java/|go-http"
+    r"|axios/|node-fetch|postman|insomnia|phantomjs|selenium|puppeteer|playwright",
+    re.IGNORECASE
+)
+TABLET_PATTERN = re.compile(r"iPad|Tablet|PlayBook|Silk|Kindle|Android(?!.*Mobile)", re.IGNORECASE)
+MOBILE_PATTERN = re.compile(r"Mobi|iPhone|iPod|Android.*Mobile|Windows Phone|IEMobile|Opera Mini", re.IGNORECASE)
+# First match wins, so more specific tokens come before the engines they embed
+BROWSER_RULES = [
+    (re.compile(r"Edg(e|A|iOS)?/"), "Edge"),
+    (re.compile(r"OPR/|Opera"), "Opera"),
+    (re.compile(r"SamsungBrowser/"), "Samsung Internet"),
+    (re.compile(r"YaBrowser/"), "Yandex"),
+    (re.compile(r"Firefox/|FxiOS/"), "Firefox"),
+    (re.compile(r"Chrome/|CriOS/"), "Chrome"),
+    (re.compile(r"Version/[\d.]+.*Safari/"), "Safari"),
+    (re.compile(r"MSIE |Trident/"), "Internet Explorer"),
+]
+OS_RULES = [
+    (re.compile(r"iPhone|iPad|iPod"), "iOS"),
+    (re.compile(r"Android"), "Android"),
+    (re.compile(r"Windows"), "Windows"),
+    (re.compile(r"CrOS"), "ChromeOS"),
+    (re.compile(r"Mac OS X|Macintosh"), "macOS"),
+    (re.compile(r"Linux"), "Linux"),
+]
+ANALYTICS_BOT_EVENTS = Counter("analytics_bot_events_dropped_total", "Analytics events dropped because the User-Agent is a bot.")
+
+class UserAgentInfo(NamedTuple):
+    device_type: str
+    browser: str
+    os: str
+    is_bot: bool
+
+@lru_cache(maxsize=4096)
+def classify_user_agent(user_agent: str) -> UserAgentInfo:
+    # Privacy proxies and some in-app browsers strip the header, so a missing
+    # User-Agent is counted as an unknown device rather than dropped as a bot
+    if not user_agent:
+        return UserAgentInfo("unknown", "Other", "Other", False)
+    if BOT_PATTERN.search(user_agent):
+        return UserAgentInfo("bot", "bot", "unknown", True)
+    if TABLET_PATTERN.search(user_agent):
+        device = "tablet"
+    elif MOBILE_PATTERN.search(user_agent):
+        device = "mobile"
+    else:
+        device = "desktop"
+    browser = next((name for pattern, name in BROWSER_RULES if pattern.search(user_agent)), "Other")
+    os_name = next((name for pattern, name in OS_RULES if pattern.search(user_agent)), "Other")
+    return UserAgentInfo(device, browser, os_name, False)
+
+def request_user_agent(request: Request) -> UserAgentInfo:
+    return classify_user_agent(request.headers.get("user-agent", "")[:512])
+
+# ==================== GEOIP ====================
+
+# Country lookup from a local IPv4 range table built by tools/build_geoip.py: a
+# (3, n) uint32 .npy array of sorted range starts, range ends and ISO country
+# codes packed as (first letter << 8) | second letter. np.load(mmap_mode="r") maps it instead of reading it, so startup
+# is instant and the pages are shared between worker processes.
+DEFAULT_GEOIP_PATH = ROOT_DIR / "data" / "geoip-country.npy"
+
+class GeoIPTable:
+    def __init__(self, table: np.ndarray):
+        self.starts = table[0]
+        self.ends = table[1]
+        self.codes = table[2]
+
+    @classmethod
+    def load(cls, path) -> "GeoIPTable":
+        table = np.load(path, mmap_mode="r")
+        if table.ndim != 2 or table.shape[0] != 3 or table.dtype != np.uint32:
+            raise ValueError(f"{path} is not a GeoIP range table")
+        return cls(table)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def lookup(self, ip: str) -> Optional[str]:
+        """ISO 3166 alpha-2 code for a public IPv4 address, None when unknown"""
+        try:
+            address = ipaddress.IPv4Address(ip)
+        except ValueError:
+            return None  # IPv6 or malformed
+        # A uint32 needle keeps searchsorted from casting the whole column per call
+        value = np.uint32(int(address))
+        index = int(self.starts.searchsorted(value, side="right")) - 1
+        if index < 0 or value > self.ends[index]:
+            return None
+        code = int(self.codes[index])
+        return chr(code >> 8) + chr(code & 0xFF)
+
+geoip: Optional[GeoIPTable] = None  # assigned by the application lifespan
+
+def load_geoip(settings: AppSettings) -> Optional[GeoIPTable]:
+    path = Path(settings.geoip_path) if settings.geoip_path else DEFAULT_GEOIP_PATH
+    if not path.exists():
+        if settings.geoip_path:
+            logger.warning(f"GeoIP table {path} not found; countries will be reported as sent by clients")
+        return None
+    try:
+        table = GeoIPTable.load(path)
+    except (OSError, ValueError) as e:
+        logger.warning(f"GeoIP table {path} could not be loaded: {e}")
+        return None
+    logger.info(f"GeoIP table loaded: {len(table)} ranges from {path}")
+    return table
+
+def resolve_country(client_ip: str, claimed: Optional[str]) -> Optional[str]:
+    """Country from the GeoIP table when one is loaded; otherwise whatever the client sent"""
+    if geoip is None:
+        return claimed
+    return geoip.lookup(client_ip) or "Unknown"
+
+# ==================== ANALYTICS STORAGE ====================
+
+# Raw pageviews live in a time-series collection (timeField "timestamp", metaField
+# "meta" = page/device/country) that MongoDB buckets per series and expires after
+# the retention window. A background job folds completed hours into
+# analytics_rollups, which are kept forever, so storage grows with time rather
+# than with traffic.
+ANALYTICS_EVENTS = "analytics_events"
+ANALYTICS_LEGACY = "analytics"  # pre-time-series layout, drained by migrate_legacy_analytics()
+ANALYTICS_ROLLUPS = "analytics_rollups"
+ANALYTICS_STATE = "analytics_state"
+ANALYTICS_CLICKS = "analytics_clicks"
+ANALYTICS_DIMENSIONS = ("page_path", "device_type", "country")
+LEGACY_MIGRATION_BATCH = 5000
+LEGACY_MIGRATION_JOURNAL = "legacy_migration"  # analytics_state document naming the batch in progress
+ROLLUP_WINDOW_DAYS = 7  # raw events aggregated per pass when catching up
+ROLLUP_LEASE_SECONDS = 120
+ANALYTICS_WORKER_ID = uuid.uuid4().hex
+
+def bson_utc(value: datetime) -> datetime:
+    """Naive UTC datetime, the form BSON dates come back in"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def hour_floor(value: datetime) -> datetime:
+    return value.replace(minute=0, second=0, microsecond=0)
+
+def day_floor(value: datetime) -> datetime:
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def analytics_event(timestamp: datetime, page_path: str, device_type: str, country: Optional[str], **fields) -> dict:
+    return {
+        "timestamp": bson_utc(timestamp),
+        "meta": {"page_path": page_path or "/", "device_type": device_type or "unknown", "country": country or "Unknown"},
+        **fields
+    }
+
+def rollup_doc(granularity: str, bucket: datetime, dims: dict, views: int) -> dict:
+    key = "|".join([granularity, bucket.isoformat()] + [str(dims.get(d)) for d in ANALYTICS_DIMENSIONS])
+    return {
+        "_id": key,
+        "granularity": granularity,
+        "bucket": bucket,
+        **{d: dims.get(d) for d in ANALYTICS_DIMENSIONS},
+        "views": views
+    }
+
+async def ensure_analytics_storage(settings: AppSettings):
+    """Create the time-series collection (or a TTL-indexed fallback) and apply the retention setting"""
+    retention = settings.analytics_retention_days * 86400
+    events = db[ANALYTICS_EVENTS]
+    is_timeseries = None
+    if ANALYTICS_EVENTS not in await db.list_collection_names():
+        try:
+            await db.create_collection(
+                ANALYTICS_EVENTS,
+                # "hours": each page/device/country series is sparse, so wide buckets compress best
+                timeseries={"timeField": "timestamp", "metaField": "meta", "granularity": "hours"},
+                expireAfterSeconds=retention
+            )
+            logger.info(f"Created time-series collection {ANALYTICS_EVENTS}")
+            is_timeseries = True
+        except (OperationFailure, NotImplementedError) as e:
+            # MongoDB < 5.0 and in-memory test doubles: ordinary collection + TTL index below
+            logger.warning(f"Time-series collections unavailable, using a TTL index instead: {e}")
+            is_timeseries = False
+    if is_timeseries is None:
+        options = await events.options()
+        is_timeseries = "timeseries" in options
+        if is_timeseries and options.get("expireAfterSeconds") != retention:
+            await db.command("collMod", ANALYTICS_EVENTS, expireAfterSeconds=retention)
+    if not is_timeseries:
+        try:
+            await events.create_index("timestamp", name="timestamp_ttl", expireAfterSeconds=retention)
+        except OperationFailure:
+            await db.command("collMod", ANALYTICS_EVENTS, index={"name": "timestamp_ttl", "expireAfterSeconds": retention})
+    await db[ANALYTICS_ROLLUPS].create_index([("granularity", 1), ("bucket", 1)])
+    try:
+        await db[ANALYTICS_CLICKS].create_index("timestamp", name="timestamp_ttl", expireAfterSeconds=retention)
+    except OperationFailure:
+        await db.command("collMod", ANALYTICS_CLICKS, index={"name": "timestamp_ttl", "expireAfterSeconds": retention})
+    await db[ANALYTICS_SKETCHES].create_index([("page_path", 1), ("day", 1)])
+    await db[ANALYTICS_SESSIONS].create_index("last_seen")
+    await db[ANALYTICS_SESSION_STATS].create_index("day")
+
+async def acquire_analytics_lease(name: str = "rollup_lease") -> bool:
+    """Only one worker process runs a background analytics job at a time; the lease is renewed per batch"""
+    now = datetime.now(timezone.utc)
+    try:
+        await db[ANALYTICS_STATE].update_one(
+            {"_id": name, "$or": [{"expires_at": {"$lt": bson_utc(now)}}, {"owner": ANALYTICS_WORKER_ID}]},
+            {"$set": {"owner": ANALYTICS_WORKER_ID, "expires_at": bson_utc(now + timedelta(seconds=ROLLUP_LEASE_SECONDS))}},
+            upsert=True
+        )
+        return True
+    except DuplicateKeyError:
+        return False
+
+async def get_rollup_watermark() -> Optional[datetime]:
+    """Hours before the watermark are in analytics_rollups; later ones only exist as raw events"""
+    state = await db[ANALYTICS_STATE].find_one({"_id": "rollup"})
+    return state.get("watermark") if state else None
+
+async def refresh_daily_rollups(first_day: datetime, last_day: datetime):
+    """Rebuild daily rollups for first_day..last_day (inclusive) from their hourly rollups"""
+    pipeline = [
+        {"$match": {"granularity": "hour", "bucket": {"$gte": first_day, "$lt": last_day + timedelta(days=1)}}},
+        {"$group": {
+            "_id": {"day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$bucket"}},
+                    **{d: f"${d}" for d in ANALYTICS_DIMENSIONS}},
+            "views": {"$sum": "$views"}
+        }}
+    ]
+    ops = []
+    for row in await db[ANALYTICS_ROLLUPS].aggregate(pipeline).to_list(None):
+        dims = dict(row["_id"])
+        doc = rollup_doc("day", datetime.strptime(dims.pop("day"), "%Y-%m-%d"), dims, row["views"])
+        ops.append(ReplaceOne({"_id": doc["_id"]}, doc, upsert=True))
+    if ops:
+        await db[ANALYTICS_ROLLUPS].bulk_write(ops, ordered=False)
+
+async def downsample_analytics() -> int:
+    """Roll completed hours since the watermark into hourly and daily rollups; returns hours processed"""
+    now_hour = hour_floor(bson_utc(datetime.now(timezone.utc)))
+    start = await get_rollup_watermark()
+    if start is None:
+        first = await db[ANALYTICS_EVENTS].find_one({}, {"timestamp": 1}, sort=[("timestamp", 1)])
+        if first is None:
+            return 0
+        start = hour_floor(first["timestamp"])
+
+    hours = 0
+    while start < now_hour:
+        end = min(start + timedelta(days=ROLLUP_WINDOW_DAYS), now_hour)
+        pipeline = [
+            {"$match": {"timestamp": {"$gte": start, "$lt": end}}},
+            {"$group": {
+                "_id": {"hour": {"$dateToString": {"format": "%Y-%m-%dT%H", "date": "$timestamp"}},
+                        **{d: f"$meta.{d}" for d in ANALYTICS_DIMENSIONS}},
+                "views": {"$sum": 1}
+            }}
+        ]
+        ops = []
+        for row in await db[ANALYTICS_EVENTS].aggregate(pipeline).to_list(None):
+            dims = dict(row["_id"])
+            doc = rollup_doc("hour", datetime.strptime(dims.pop("hour"), "%Y-%m-%dT%H"), dims, row["views"])
+            ops.append(ReplaceOne({"_id": doc["_id"]}, doc, upsert=True))
+        if ops:
+            await db[ANALYTICS_ROLLUPS].bulk_write(ops, ordered=False)
+        await refresh_daily_rollups(day_floor(start), day_floor(end - timedelta(hours=1)))
+        await db[ANALYTICS_STATE].update_one({"_id": "rollup"}, {"$set": {"watermark": end}}, upsert=True)
+        hours += int((end - start).total_seconds() // 3600)
+        start = end
+    return hours
+
+async def migrate_legacy_analytics(settings: AppSettings) -> int:
+    """Move one batch of pre-time-series pageviews (UUID id, ISO string timestamp) into the
+    new layout; returns the number of documents moved.
+
+    Safe to repeat after a crash: the batch is journaled before anything is written and
+    a journaled batch is resumed as-is. Events keep the legacy _id, so ones that already
+    landed are skipped, and each rollup records the batches it has counted."""
+    journal = await db[ANALYTICS_STATE].find_one({"_id": LEGACY_MIGRATION_JOURNAL})
+    if journal:
+        legacy = await db[ANALYTICS_LEGACY].find({"_id": {"$in": journal["ids"]}}).to_list(None)
+        batch = journal["batch"]
+        if not legacy:  # stopped after the delete below
+            # Only after a crash, so scanning for the batch's markers is acceptable
+            await db[ANALYTICS_ROLLUPS].update_many(
+                {"legacy_batches": batch}, {"$pull": {"legacy_batches": batch}}
+            )
+            await db[ANALYTICS_STATE].delete_one({"_id": LEGACY_MIGRATION_JOURNAL})
+            return len(journal["ids"])
+    else:
+        legacy = await db[ANALYTICS_LEGACY].find({}).limit(LEGACY_MIGRATION_BATCH).to_list(LEGACY_MIGRATION_BATCH)
+        if not legacy:
+            return 0
+        batch = uuid.uuid4().hex
+        await db[ANALYTICS_STATE].insert_one(
+            {"_id": LEGACY_MIGRATION_JOURNAL, "batch": batch, "ids": [doc["_id"] for doc in legacy]}
+        )
+
+    now = bson_utc(datetime.now(timezone.utc))
+    # Raw events are only kept for whole hours inside the retention window
+    horizon = hour_floor(now - timedelta(days=settings.analytics_retention_days)) + timedelta(hours=1)
+    watermark = await get_rollup_watermark()
+    # Hours at or after the cutoff are rebuilt from raw events by downsample_analytics();
+    # older ones never will be, so the legacy counts are added to their rollups directly
+    cutoff = max(horizon, watermark) if watermark else horizon
+
+    events = []
+    hourly = defaultdict(int)
+    for doc in legacy:
+        ts = doc.get("timestamp")
+        if isinstance(ts, str):
+            ts = datetime.fromisoformat(ts.replace('Z', '+00:00'))
+        event = analytics_event(ts, doc.get("page_path"), doc.get("device_type"), doc.get("country"),
+                                page_title=doc.get("page_title"), user_agent=doc.get("user_agent"),
+                                session_id=doc.get("session_id"))
+        if event["timestamp"] >= horizon:
+            events.append({"_id": doc["_id"], **event})
+        bucket = hour_floor(event["timestamp"])
+        if bucket < cutoff:
+            hourly[(bucket, tuple(event["meta"][d] for d in ANALYTICS_DIMENSIONS))] += 1
+
+    if events and journal:
+        # Time-series collections don't enforce unique _ids; the time range keeps the lookup to a few buckets
+        landed = await db[ANALYTICS_EVENTS].find({
+            "_id": {"$in": [event["_id"] for event in events]},
+            "timestamp": {"$gte": min(e["timestamp"] for e in events), "$lte": max(e["timestamp"] for e in events)}
+        }, {"_id": 1}).to_list(None)
+        landed_ids = {event["_id"] for event in landed}
+        events = [event for event in events if event["_id"] not in landed_ids]
+    if events:
+        await db[ANALYTICS_EVENTS].insert_many(events, ordered=False)
+    if hourly:
+        ops, rollup_ids = [], []
+        for (bucket, values), views in hourly.items():
+            doc = rollup_doc("hour", bucket, dict(zip(ANALYTICS_DIMENSIONS, values)), 0)
+            doc.pop("views")
+            rollup_ids.append(doc.pop("_id"))
+            # A rollup that already counted this batch fails the filter, and its upsert then
+            # hits the existing _id: that duplicate-key error means "already applied"
+            ops.append(UpdateOne(
+                {"_id": rollup_ids[-1], "legacy_batches": {"$ne": batch}},
+                {"$setOnInsert": doc, "$inc": {"views": views}, "$addToSet": {"legacy_batches": batch}},
+                upsert=True
+            ))
+        try:
+            await db[ANALYTICS_ROLLUPS].bulk_write(ops, ordered=False)
+        except BulkWriteError as e:
+            if any(error["code"] != 11000 for error in e.details["writeErrors"]):
+                raise
+        days = [day_floor(bucket) for bucket, _ in hourly]
+        await refresh_daily_rollups(min(days), max(days))
+    await db[ANALYTICS_LEGACY].delete_many({"_id": {"$in": [doc["_id"] for doc in legacy]}})
+    if hourly:
+        # The batch can no longer be replayed, so its markers can go; before the journal,
+        # so that a crash in between still finds them through it
+        await db[ANALYTICS_ROLLUPS].update_many(
+            {"_id": {"$in": rollup_ids}}, {"$pull": {"legacy_batches": batch}}
+        )
+    await db[ANALYTICS_STATE].delete_one({"_id": LEGACY_MIGRATION_JOURNAL})
+    return len(legacy)
+
+async def run_analytics_maintenance(settings: AppSettings):
+    if not await acquire_analytics_lease():
+        return  # another worker is running the job
+    moved = 0
+    while batch := await migrate_legacy_analytics(settings):
+        moved += batch
+        if not await acquire_analytics_lease():
+            return
+    if moved:
+        logger.info(f"Migrated {moved} legacy analytics events")
+    hours = await downsample_analytics()
+    if hours:
+        logger.info(f"Analytics rollup advanced {hours} hours")
+    sessions = await close_idle_sessions(settings)
+    if sessions:
+        logger.info(f"Closed {sessions} idle analytics sessions")
+
+async def analytics_maintenance_loop(settings: AppSettings):
+    while True:
+        try:
+            await run_analytics_maintenance(settings)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Analytics rollup failed: {e}")
+        await asyncio.sleep(settings.analytics_rollup_interval_seconds)
+
+# ==================== VISITOR SKETCHES ====================
+
+# Unique visitors/sessions are estimated with HyperLogLog sketches, one pair per
+# (day, page) plus a "*" page for the whole site. Sketches merge by taking the
+# register-wise maximum, so any range of days is answered by merging its daily
+# sketches instead of running distinct scans over raw events.
+ANALYTICS_SKETCHES = "analytics_sketches"
+HLL_PRECISION = 12  # 4096 registers: ~1.6% standard error, <= 4KB per sketch before compression
+SKETCH_FLUSH_SECONDS = 10
+SKETCH_BUFFER_MAX_KEYS = 2000  # past this, new per-page sketches wait for the next flush; "*" is always kept
+SKETCH_CAS_RETRIES = 5
+ALL_PAGES = "*"
+
+class HyperLogLog:
+    """Mergeable distinct-count sketch with 2**p one-byte registers"""
+
+    def __init__(self, p: int = HLL_PRECISION, registers: Optional[np.ndarray] = None):
+        self.p = p
+        self.m = 1 << p
+        self.registers = np.zeros(self.m, dtype=np.uint8) if registers is None else registers
+
+    def add(self, value: str):
+        x = int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+        index = x >> (64 - self.p)
+        rest = x & ((1 << (64 - self.p)) - 1)
+        rank = (64 - self.p) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self) -> int:
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / float(np.sum(np.exp2(-self.registers.astype(np.float64))))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # Small-range correction (linear counting)
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def to_bytes(self) -> bytes:
+        # Sparse sketches (quiet pages and days) are mostly zero registers and compress well
+        return zlib.compress(self.registers.tobytes())
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "HyperLogLog":
+        registers = np.frombuffer(zlib.decompress(data), dtype=np.uint8).copy()
+        return cls(p=len(registers).bit_length() - 1, registers=registers)
+
+class SketchBuffer:
+    """Per-process sketches updated on every pageview and merged into MongoDB by flush_visitor_sketches()"""
+
+    def __init__(self):
+        self.pending: Dict[tuple, tuple] = {}
+
+    def add(self, day: datetime, page_path: str, visitor: str, session_id: Optional[str]):
+        for page in (ALL_PAGES, page_path):
+            key = (day, page)
+            sketches = self.pending.get(key)
+            if sketches is None:
+                if page != ALL_PAGES and len(self.pending) >= SKETCH_BUFFER_MAX_KEYS:
+                    continue
+                sketches = self.pending[key] = (HyperLogLog(), HyperLogLog())
+            sketches[0].add(visitor)
+            if session_id:
+                sketches[1].add(session_id)
+
+    def drain(self) -> Dict[tuple, tuple]:
+        pending, self.pending = self.pending, {}
+        return pending
+
+    def restore(self, key: tuple, sketches: tuple):
+        current = self.pending.get(key)
+        if current is None:
+            self.pending[key] = sketches
+        else:
+            current[0].merge(sketches[0])
+            current[1].merge(sketches[1])
+
+visitor_sketches = SketchBuffer()
+
+async def merge_sketch_doc(day: datetime, page_path: str, visitors: HyperLogLog, sessions: HyperLogLog) -> bool:
+    """Merge into the stored sketch with compare-and-swap on its version; False if contention persists"""
+    key = f"{day.date().isoformat()}|{page_path}"
+    collection = db[ANALYTICS_SKETCHES]
+    for _ in range(SKETCH_CAS_RETRIES):
+        doc = await collection.find_one({"_id": key})
+        if doc is None:
+            try:
+                await collection.insert_one({
+                    "_id": key, "day": day, "page_path": page_path,
+                    "visitors": visitors.to_bytes(), "sessions": sessions.to_bytes(), "version": 1
+                })
+                return True
+            except DuplicateKeyError:
+                continue  # another worker created it first; merge on the next pass
+        merged_visitors = HyperLogLog.from_bytes(doc["visitors"]).merge(visitors)
+        merged_sessions = HyperLogLog.from_bytes(doc["sessions"]).merge(sessions)
+        result = await collection.update_one(
+            {"_id": key, "version": doc["version"]},
+            {"$set": {"visitors": merged_visitors.to_bytes(), "sessions": merged_sessions.to_bytes()},
+             "$inc": {"version": 1}}
+        )
+        if result.matched_count:
+            return True
+    return False
+
+async def flush_visitor_sketches():
+    pending = visitor_sketches.drain()
+    for (day, page_path), sketches in pending.items():
+        try:
+            merged = await merge_sketch_doc(day, page_path, *sketches)
+        except Exception as e:
+            logger.warning(f"Visitor sketch flush failed: {e}")
+            merged = False
+        if not merged:
+            # Merging is idempotent, so keeping the sketch for the next flush is always safe
+            visitor_sketches.restore((day, page_path), sketches)
+
+async def visitor_sketch_flush_loop():
+    while True:
+        await asyncio.sleep(SKETCH_FLUSH_SECONDS)
+        await flush_visitor_sketches()
+
+async def load_visitor_sketches(first_day: datetime, last_day: datetime, page_path: str = ALL_PAGES) -> list:
+    """(day, visitors, sessions) for every stored and still-buffered sketch in first_day..last_day"""
+    rows = []
+    cursor = db[ANALYTICS_SKETCHES].find(
+        {"page_path": page_path, "day": {"$gte": first_day, "$lte": last_day}},
+        {"_id": 0, "day": 1, "visitors": 1, "sessions": 1}
+    )
+    async for doc in cursor:
+        rows.append((doc["day"], HyperLogLog.from_bytes(doc["visitors"]), HyperLogLog.from_bytes(doc["sessions"])))
+    rows.extend(
+        (day, visitors, sessions) for (day, page), (visitors, sessions) in visitor_sketches.pending.items()
+        if page == page_path and first_day <= day <= last_day
+    )
+    return rows
+
+def count_uniques(rows: list, since: datetime) -> tuple:
+    visitors, sessions = HyperLogLog(), HyperLogLog()
+    for day, day_visitors, day_sessions in rows:
+        if day >= since:
+            visitors.merge(day_visitors)
+            sessions.merge(day_sessions)
+    return visitors.count(), sessions.count()
+
+# ==================== SESSION TRACKING ====================
+
+# Sessions are upserted by pageviews and heartbeats (first_seen, last_seen, page_count).
+# Once idle they are removed from analytics_sessions and folded into one duration
+# histogram per day, so time-on-site figures never need raw events.
+ANALYTICS_SESSIONS = "analytics_sessions"
+ANALYTICS_SESSION_STATS = "analytics_session_stats"
+SESSION_LEAVE_GRACE_SECONDS = 120  # a page-leave closes the session unless the visitor comes back this quickly
+SESSION_CLOSE_BATCH = 10000
+TIME_ON_SITE_WINDOW_DAYS = 30
+# Histogram bucket lower edges, in seconds; the last bucket is open-ended
+SESSION_DURATION_EDGES = [0, 10, 30, 60, 120, 180, 300, 600, 900, 1200, 1800, 3600, 7200]
+
+def session_touch(session_id: str, first_seen: datetime, last_seen: datetime, page_views: int = 0, leave: bool = False) -> UpdateOne:
+    update = {
+        "$setOnInsert": {"first_seen": first_seen},
+        "$max": {"last_seen": last_seen},
+        "$set": {"left": leave}
+    }
+    if page_views:
+        update["$inc"] = {"page_count": page_views}
+    else:
+        update["$setOnInsert"]["page_count"] = 0
+    return UpdateOne({"_id": session_id}, update, upsert=True)
+
+async def touch_sessions(touches: List[UpdateOne]):
+    if touches:
+        await db[ANALYTICS_SESSIONS].bulk_write(touches, ordered=False)
+
+def duration_bucket(seconds: float) -> int:
+    return SESSION_DURATION_EDGES[bisect.bisect_right(SESSION_DURATION_EDGES, max(seconds, 0)) - 1]
+
+async def close_idle_sessions(settings: AppSettings) -> int:
+    """Move idle (or left) sessions into the daily duration histograms; returns sessions closed"""
+    now = bson_utc(datetime.now(timezone.utc))
+    expired = {"$or": [
+        {"last_seen": {"$lt": now - timedelta(minutes=settings.session_idle_minutes)}},
+        {"left": True, "last_seen": {"$lt": now - timedelta(seconds=SESSION_LEAVE_GRACE_SECONDS)}}
+    ]}
+    sessions = await db[ANALYTICS_SESSIONS].find(expired).limit(SESSION_CLOSE_BATCH).to_list(SESSION_CLOSE_BATCH)
+    if not sessions:
+        return 0
+    # The expiry filter doubles as the guard: a session a heartbeat revived since the
+    # read no longer matches, stays open and is left out of the stats below. A heartbeat
+    # arriving after the delete starts a new session (new first_seen).
+    ids = [session["_id"] for session in sessions]
+    result = await db[ANALYTICS_SESSIONS].delete_many({"_id": {"$in": ids}, **expired})
+    if result.deleted_count < len(sessions):
+        remaining = await db[ANALYTICS_SESSIONS].find({"_id": {"$in": ids}}, {"first_seen": 1}).to_list(None)
+        revived = {(doc["_id"], doc["first_seen"]) for doc in remaining}
+        sessions = [session for session in sessions if (session["_id"], session["first_seen"]) not in revived]
+
+    stats = defaultdict(lambda: defaultdict(int))
+    for session in sessions:
+        seconds = (session["last_seen"] - session["first_seen"]).total_seconds()
+        day = stats[day_floor(session["first_seen"])]
+        day["sessions"] += 1
+        day["pages"] += session.get("page_count", 0)
+        day["total_seconds"] += seconds
+        day[f"histogram.{duration_bucket(seconds)}"] += 1
+    if stats:
+        ops = [
+            UpdateOne({"_id": day.date().isoformat()}, {"$setOnInsert": {"day": day}, "$inc": dict(counts)}, upsert=True)
+            for day, counts in stats.items()
+        ]
+        await db[ANALYTICS_SESSION_STATS].bulk_write(ops, ordered=False)
+    return len(sessions)
+
+def histogram_percentile(histogram: Dict[int, int], total: int, fraction: float) -> float:
+    """Percentile of a bucketed duration distribution, interpolated linearly inside the bucket"""
+    if not total:
+        return 0.0
+    rank = fraction * total
+    seen = 0
+    for index, lower in enumerate(SESSION_DURATION_EDGES):
+        count = histogram.get(lower, 0)
+        if count and seen + count >= rank:
+            if index + 1 == len(SESSION_DURATION_EDGES):
+                return float(lower)
+            upper = SESSION_DURATION_EDGES[index + 1]
+            return lower + (upper - lower) * (rank - seen) / count
+        seen += count
+    return float(SESSION_DURATION_EDGES[-1])
+
+async def get_time_on_site(since: datetime) -> dict:
+    sessions = 0
+    total_seconds = 0.0
+    histogram = defaultdict(int)
+    async for doc in db[ANALYTICS_SESSION_STATS].find({"day": {"$gte": since}}, {"_id": 0}):
+        sessions += doc.get("sessions", 0)
+        total_seconds += doc.get("total_seconds", 0)
+        for lower, count in doc.get("histogram", {}).items():
+            histogram[int(lower)] += count
+    return {
+        "sessions": sessions,
+        "avg": round(total_seconds / sessions, 1) if sessions else 0.0,
+        "p50": round(histogram_percentile(histogram, sessions, 0.5), 1),
+        "p90": round(histogram_percentile(histogram, sessions, 0.9), 1)
+    }
+
+# ==================== ANALYTICS TIME SERIES ====================
+
+TIMESERIES_STEPS = {"hour": timedelta(hours=1), "day": timedelta(days=1), "week": timedelta(weeks=1)}
+TIMESERIES_GROUPS = {"page": "page_path", "device": "device_type", "country": "country"}
+MAX_TIMESERIES_BUCKETS = 10000  # a year of hours fits
+OTHER_SERIES = "(other)"
+
+def floor_to_granularity(value: datetime, granularity: str) -> datetime:
+    if granularity == "hour":
+        return hour_floor(value)
+    day = day_floor(value)
+    return day - timedelta(days=day.weekday()) if granularity == "week" else day
+
+async def fetch_timeseries_rows(start: datetime, end: datetime, granularity: str, field: Optional[str]) -> tuple:
+    """(bucket starts, series keys, counts) pre-grouped by MongoDB at rollup/hour resolution"""
+    key = f"${field}" if field else None
+    # Hourly rollups for hour charts, daily ones otherwise; raw events after the watermark fill the gap
+    rollup_pipeline = [
+        {"$match": {"granularity": "hour" if granularity == "hour" else "day", "bucket": {"$gte": start, "$lt": end}}},
+        {"$group": {"_id": {"bucket": "$bucket", "key": key}, "views": {"$sum": "$views"}}}
+    ]
+    watermark = await get_rollup_watermark()
+    raw_start = max(start, watermark) if watermark else start
+    raw_pipeline = [
+        {"$match": {"timestamp": {"$gte": raw_start, "$lt": end}}},
+        {"$group": {
+            "_id": {"hour": {"$dateToString": {"format": "%Y-%m-%dT%H", "date": "$timestamp"}},
+                    "key": f"$meta.{field}" if field else None},
+            "views": {"$sum": 1}
+        }}
+    ]
+    rollup_rows, raw_rows = await asyncio.gather(
+        db[ANALYTICS_ROLLUPS].aggregate(rollup_pipeline).to_list(None),
+        db[ANALYTICS_EVENTS].aggregate(raw_pipeline).to_list(None)
+    )
+    times = np.concatenate([
+        np.array([row["_id"]["bucket"] for row in rollup_rows], dtype="datetime64[s]"),
+        np.array([row["_id"]["hour"] for row in raw_rows], dtype="datetime64[h]").astype("datetime64[s]")
+    ])
+    keys = np.array([str(row["_id"]["key"]) for row in rollup_rows + raw_rows], dtype=object)
+    counts = np.array([row["views"] for row in rollup_rows + raw_rows], dtype=np.int64)
+    return times, keys, counts
+
+def bin_timeseries(times: np.ndarray, keys: np.ndarray, counts: np.ndarray, start: datetime,
+                   step: timedelta, buckets: int, limit: int) -> List[Dict[str, Any]]:
+    """Dense per-key series: one count per bucket, top `limit` keys by total plus an "(other)" series"""
+    index = ((times - np.datetime64(start, "s")) // np.timedelta64(step)).astype(np.int64)
+    in_range = (index >= 0) & (index < buckets)
+    index, keys, counts = index[in_range], keys[in_range], counts[in_range]
+    if not len(index):
+        return []
+    labels, codes = np.unique(keys, return_inverse=True)
+    grid = np.zeros((len(labels), buckets), dtype=np.int64)
+    np.add.at(grid, (codes, index), counts)
+
+    totals = grid.sum(axis=1)
+    order = np.argsort(-totals, kind="stable")
+    series = [{"key": str(labels[i]), "total": int(totals[i]), "values": grid[i].tolist()} for i in order[:limit]]
+    if len(order) > limit:
+        rest = grid[order[limit:]].sum(axis=0)
+        series.append({"key": OTHER_SERIES, "total": int(rest.sum()), "values": rest.tolist()})
+    return series
+
+# ==================== ANALYTICS EXPORT ====================
+
+# Raw events are streamed through a cursor into Hive-style day partitions
+# (<export dir>/day=YYYY-MM-DD/part-<start>.parquet) so analysts can work on
+# compressed columnar files instead of querying production. Low-cardinality
+# columns are dictionary-encoded. The "export" state document records how far the
+# export got, and it only advances once a part file is complete, so an interrupted
+# run resumes by rewriting its unfinished part. pyarrow is imported lazily: the API
+# itself never needs it.
+EXPORT_STATE_ID = "export"
+EXPORT_ROW_GROUP_SIZE = 50_000
+EXPORT_DICTIONARY_COLUMNS = ("page_path", "device_type", "country", "browser", "os")
+EXPORT_DAY_PATTERN = re.compile(r"^day=\d{4}-\d{2}-\d{2}$")
+EXPORT_PART_PATTERN = re.compile(r"^part-\d{8}T\d{6}\.parquet$")
+
+analytics_export_task: Optional[asyncio.Task] = None
+
+def analytics_export_dir(settings: AppSettings) -> Path:
+    return Path(settings.analytics_export_dir) if settings.analytics_export_dir else ROOT_DIR / "exports" / "analytics"
+
+def import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Analytics export needs the pyarrow package (pip install pyarrow)")
+    return pyarrow
+
+class ParquetPartWriter:
+    """Writes one part file per day partition, renaming it into place when the day is finished"""
+    def __init__(self, root: Path):
+        self.pa = import_pyarrow()
+        string_dict = self.pa.dictionary(self.pa.int32(), self.pa.string())
+        self.schema = self.pa.schema(
+            [("timestamp", self.pa.timestamp("ms", tz="UTC"))]
+            + [(name, string_dict) for name in EXPORT_DICTIONARY_COLUMNS]
+            + [("page_title", self.pa.string()), ("session_id", self.pa.string())]
+        )
+        self.root = root
+        self.writer = None
+        self.path: Optional[Path] = None
+        self.written: List[Path] = []
+
+    def open(self, day: datetime, start: datetime):
+        self.close()
+        self.path = self.root / f"day={day:%Y-%m-%d}" / f"part-{start:%Y%m%dT%H%M%S}.parquet"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.writer = self.pa.parquet.ParquetWriter(
+            self.path.with_suffix(".tmp"), self.schema, compression="zstd",
+            use_dictionary=list(EXPORT_DICTIONARY_COLUMNS)
+        )
+
+    def write(self, columns: Dict[str, list]):
+        arrays = [self.pa.array(columns["timestamp"], type=self.schema.field("timestamp").type)]
+        arrays += [self.pa.array(columns[name], type=self.pa.string()).dictionary_encode()
+                   for name in EXPORT_DICTIONARY_COLUMNS]
+        arrays += [self.pa.array(columns["page_title"]), self.pa.array(columns["session_id"], type=self.pa.string())]
+        self.writer.write_table(self.pa.Table.from_arrays(arrays, schema=self.schema))
+
+    def close(self):
+        if self.writer is None:
+            return
+        self.writer.close()
+        self.path.with_suffix(".tmp").replace(self.path)
+        self.written.append(self.path)
+        self.writer = None
+
+def new_export_columns() -> Dict[str, list]:
+    return {name: [] for name in ("timestamp", *EXPORT_DICTIONARY_COLUMNS, "page_title", "session_id")}
+
+async def export_analytics(settings: AppSettings) -> Dict[str, Any]:
+    """Export raw events between the saved position and the last hour that can no longer change"""
+    if not await acquire_analytics_lease("export_lease"):
+        raise RuntimeError("Another worker is already exporting analytics")
+    root = analytics_export_dir(settings)
+    writer = ParquetPartWriter(root)
+    for stale in root.glob("day=*/*.tmp"):
+        stale.unlink()  # left behind by an interrupted run
+
+    # Beacons may backdate events by up to BEACON_MAX_AGE_MS, so stop short of that
+    now = bson_utc(datetime.now(timezone.utc))
+    until = hour_floor(now - timedelta(milliseconds=BEACON_MAX_AGE_MS))
+    state = await db[ANALYTICS_STATE].find_one({"_id": EXPORT_STATE_ID})
+    start = state.get("exported_until") if state else None
+    if start is None:
+        first = await db[ANALYTICS_EVENTS].find_one({}, {"timestamp": 1}, sort=[("timestamp", 1)])
+        start = day_floor(first["timestamp"]) if first else until
+    if start >= until:
+        return {"rows": 0, "files": [], "exported_until": start}
+
+    async def checkpoint(position: datetime):
+        await asyncio.to_thread(writer.close)
+        await db[ANALYTICS_STATE].update_one(
+            {"_id": EXPORT_STATE_ID}, {"$set": {"exported_until": position}}, upsert=True
+        )
+        if not await acquire_analytics_lease("export_lease"):
+            raise RuntimeError("Analytics export lease lost")
+
+    cursor = db[ANALYTICS_EVENTS].find(
+        {"timestamp": {"$gte": start, "$lt": until}},
+        {"_id": 0, "timestamp": 1, "meta": 1, "page_title": 1, "browser": 1, "os": 1, "session_id": 1},
+        batch_size=5000
+    ).sort("timestamp", 1)
+    columns, rows, day = new_export_columns(), 0, None
+    async for doc in cursor:
+        doc_day = day_floor(doc["timestamp"])
+        if doc_day != day:
+            if columns["timestamp"]:
+                await asyncio.to_thread(writer.write, columns)
+                columns = new_export_columns()
+            if day is not None:
+                await checkpoint(doc_day)
+            writer.open(doc_day, max(start, doc_day))
+            day = doc_day
+        meta = doc.get("meta", {})
+        columns["timestamp"].append(doc["timestamp"])
+        for name in EXPORT_DICTIONARY_COLUMNS:
+            columns[name].append(meta.get(name, doc.get(name)))
+        columns["page_title"].append(doc.get("page_title", ""))
+        columns["session_id"].append(doc.get("session_id"))
+        rows += 1
+        if len(columns["timestamp"]) >= EXPORT_ROW_GROUP_SIZE:
+            await asyncio.to_thread(writer.write, columns)
+            columns = new_export_columns()
+    if columns["timestamp"]:
+        await asyncio.to_thread(writer.write, columns)
+    await checkpoint(until)
+
+    files = [str(path.relative_to(root)) for path in writer.written]
+    logger.info(f"Exported {rows} analytics events into {len(files)} Parquet files up to {until.isoformat()}")
+    return {"rows": rows, "files": files, "exported_until": until}
+
+async def run_analytics_export(settings: AppSettings):
+    try:
+        await export_analytics(settings)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.warning(f"Analytics export failed: {e}")
+
+def list_analytics_exports(settings: AppSettings) -> List[AnalyticsExportFile]:
+    root = analytics_export_dir(settings)
+    return [
+        AnalyticsExportFile(path=str(path.relative_to(root)), day=path.parent.name[4:], size_bytes=path.stat().st_size)
+        for path in sorted(root.glob("day=*/part-*.parquet"))
+    ]
+
 # ==================== ANALYTICS ROUTES ====================
 
 @api_router.post("/analytics/pageview")
@@ -1383,60 +3970,297 @@ async def track_pageview(data: PageViewEvent, request: Request):
     if not check_rate_limit(f"analytics_{client_ip}", limit=60):
         return {"message": "Rate limited"}
     
-    doc = {
-        "id": str(uuid.uuid4()),
-        **data.model_dump(),
-        "timestamp": datetime.now(timezone.utc).isoformat()
-    }
-    await db.analytics.insert_one(doc)
+    agent = request_user_agent(request)
+    if agent.is_bot:
+        ANALYTICS_BOT_EVENTS.inc()
+        return {"message": "Ignored"}
+    
+    doc = analytics_event(
+        datetime.now(timezone.utc), data.page_path, agent.device_type, resolve_country(client_ip, data.country),
+        page_title=data.page_title, browser=agent.browser, os=agent.os, session_id=data.session_id
+    )
+    visitor_sketches.add(
+        day_floor(doc["timestamp"]), doc["meta"]["page_path"],
+        f"{client_ip}|{request.headers.get('user-agent', '')}", data.session_id
+    )
+    writes = [db[ANALYTICS_EVENTS].insert_one(doc)]
+    if data.session_id:
+        writes.append(touch_sessions([session_touch(data.session_id, doc["timestamp"], doc["timestamp"], page_views=1)]))
+    await asyncio.gather(*writes)
     return {"message": "Tracked"}
 
-@api_router.get("/analytics/summary", response_model=AnalyticsSummary)
-async def get_analytics_summary(current_user: dict = Depends(get_current_user)):
+@api_router.post("/analytics/heartbeat")
+async def track_heartbeat(request: Request):
+    """Session keep-alive / page-leave; parses the body itself because sendBeacon posts text/plain"""
+    client_ip = get_client_ip(request)
+    if not check_rate_limit(f"analytics_{client_ip}", limit=60):
+        return {"message": "Rate limited"}
+    
+    try:
+        data = HeartbeatEvent.model_validate_json(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Invalid heartbeat")
+    if request_user_agent(request).is_bot:
+        ANALYTICS_BOT_EVENTS.inc()
+        return {"message": "Ignored"}
+    now = bson_utc(datetime.now(timezone.utc))
+    await touch_sessions([session_touch(data.session_id, now, now, leave=data.leave)])
+    return {"message": "Tracked"}
+
+@api_router.post("/analytics/batch")
+async def track_batch(request: Request):
+    """Queued beacon events (a JSON array, usually text/plain from sendBeacon), validated in one
+    TypeAdapter pass and written with one insert per collection"""
+    client_ip = get_client_ip(request)
+    if not check_rate_limit(f"analytics_{client_ip}", limit=60):
+        return {"message": "Rate limited"}
+    
+    body = await request.body()
+    if len(body) > ANALYTICS_BATCH_MAX_BYTES:
+        raise HTTPException(status_code=413, detail="Batch too large")
+    try:
+        events = BEACON_BATCH.validate_json(body)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Invalid analytics batch")
+    agent = request_user_agent(request)
+    if agent.is_bot:
+        ANALYTICS_BOT_EVENTS.inc(amount=len(events))
+        return {"message": "Ignored", "accepted": 0}
+    
     now = datetime.now(timezone.utc)
-    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    visitor = f"{client_ip}|{request.headers.get('user-agent', '')}"
+    country = resolve_country(client_ip, None)
+    pageviews = []
+    clicks = []
+    sessions = {}
+    for event in events:
+        seen_at = bson_utc(now - timedelta(milliseconds=min(event.age_ms, BEACON_MAX_AGE_MS)))
+        if event.type == "pageview":
+            doc = analytics_event(
+                seen_at, event.page_path, agent.device_type, country or event.country,
+                page_title=event.page_title, browser=agent.browser, os=agent.os, session_id=event.session_id
+            )
+            pageviews.append(doc)
+            visitor_sketches.add(day_floor(seen_at), doc["meta"]["page_path"], visitor, event.session_id)
+        elif event.type == "cta_click":
+            clicks.append({
+                "timestamp": seen_at, "page_path": event.page_path, "target": event.target,
+                "link": event.link, "session_id": event.session_id
+            })
+        if event.session_id:
+            session = sessions.setdefault(event.session_id, {"first": seen_at, "last": seen_at, "pages": 0, "leave": False})
+            session["first"] = min(session["first"], seen_at)
+            session["last"] = max(session["last"], seen_at)
+            session["pages"] += event.type == "pageview"
+            session["leave"] = event.type == "heartbeat" and event.leave
+    
+    writes = [touch_sessions([
+        session_touch(session_id, s["first"], s["last"], page_views=s["pages"], leave=s["leave"])
+        for session_id, s in sessions.items()
+    ])]
+    if pageviews:
+        writes.append(db[ANALYTICS_EVENTS].insert_many(pageviews, ordered=False))
+    if clicks:
+        writes.append(db[ANALYTICS_CLICKS].insert_many(clicks, ordered=False))
+    await asyncio.gather(*writes)
+    return {"message": "Tracked", "accepted": len(events)}
+
+async def build_analytics_summary() -> AnalyticsSummary:
+    now = bson_utc(datetime.now(timezone.utc))
+    today_start = day_floor(now)
     week_start = today_start - timedelta(days=today_start.weekday())
     month_start = today_start.replace(day=1)
     
-    all_events = await db.analytics.find({}, {"_id": 0}).to_list(10000)
+    # Daily rollups cover everything before the watermark; raw events cover the rest
+    watermark = await get_rollup_watermark()
+    tail_match = {"timestamp": {"$gte": watermark}} if watermark else {}
+    
+    def daily_totals(field: str) -> list:
+        return [
+            {"$match": {"granularity": "day"}},
+            {"$group": {"_id": f"${field}", "views": {"$sum": "$views"}}}
+        ]
+    
+    tail_pipeline = [
+        {"$match": tail_match},
+        {"$group": {
+            "_id": {
+                "year": {"$year": "$timestamp"},
+                "month": {"$month": "$timestamp"},
+                "day": {"$dayOfMonth": "$timestamp"},
+                **{d: f"$meta.{d}" for d in ANALYTICS_DIMENSIONS}
+            },
+            "views": {"$sum": 1}
+        }}
+    ]
     
-    total_visits = len(all_events)
-    visits_today = 0
-    visits_week = 0
-    visits_month = 0
+    rollups = db[ANALYTICS_ROLLUPS]
+    by_day, by_device, by_country, by_page, tail, sketches, time_on_site, clicks = await asyncio.gather(
+        rollups.aggregate(daily_totals("bucket")).to_list(None),
+        rollups.aggregate(daily_totals("device_type")).to_list(None),
+        rollups.aggregate(daily_totals("country")).to_list(None),
+        rollups.aggregate(daily_totals("page_path")).to_list(None),
+        db[ANALYTICS_EVENTS].aggregate(tail_pipeline).to_list(None),
+        load_visitor_sketches(min(week_start, month_start), today_start),
+        get_time_on_site(today_start - timedelta(days=TIME_ON_SITE_WINDOW_DAYS)),
+        db[ANALYTICS_CLICKS].aggregate([
+            {"$match": {"timestamp": {"$gte": month_start}}},
+            {"$group": {"_id": "$target", "clicks": {"$sum": 1}}}
+        ]).to_list(None)
+    )
+    
+    visits_by_day = defaultdict(int)
     device_breakdown = defaultdict(int)
     country_breakdown = defaultdict(int)
     page_views = defaultdict(int)
     
-    for event in all_events:
-        ts = event.get("timestamp")
-        if isinstance(ts, str):
-            ts = datetime.fromisoformat(ts.replace('Z', '+00:00'))
-        
-        if ts >= today_start:
-            visits_today += 1
-        if ts >= week_start:
-            visits_week += 1
-        if ts >= month_start:
-            visits_month += 1
-        
-        device_breakdown[event.get("device_type", "unknown")] += 1
-        country_breakdown[event.get("country", "Unknown")] += 1
-        page_views[event.get("page_path", "/")] += 1
+    for row in by_day:
+        visits_by_day[row["_id"]] += row["views"]
+    for rows, breakdown in ((by_device, device_breakdown), (by_country, country_breakdown), (by_page, page_views)):
+        for row in rows:
+            breakdown[row["_id"]] += row["views"]
+    for row in tail:
+        key = row["_id"]
+        visits_by_day[datetime(key["year"], key["month"], key["day"])] += row["views"]
+        device_breakdown[key["device_type"]] += row["views"]
+        country_breakdown[key["country"]] += row["views"]
+        page_views[key["page_path"]] += row["views"]
     
     top_pages = sorted([{"path": k, "views": v} for k, v in page_views.items()], key=lambda x: x["views"], reverse=True)[:10]
+    visitors_today, sessions_today = count_uniques(sketches, today_start)
+    visitors_week, sessions_week = count_uniques(sketches, week_start)
+    visitors_month, sessions_month = count_uniques(sketches, month_start)
     
     return AnalyticsSummary(
-        total_visits=total_visits,
-        visits_today=visits_today,
-        visits_this_week=visits_week,
-        visits_this_month=visits_month,
-        avg_time_on_site=0,
+        total_visits=sum(visits_by_day.values()),
+        visits_today=sum(v for day, v in visits_by_day.items() if day >= today_start),
+        visits_this_week=sum(v for day, v in visits_by_day.items() if day >= week_start),
+        visits_this_month=sum(v for day, v in visits_by_day.items() if day >= month_start),
+        avg_time_on_site=time_on_site["avg"],
+        median_time_on_site=time_on_site["p50"],
+        p90_time_on_site=time_on_site["p90"],
         device_breakdown=dict(device_breakdown),
         country_breakdown=dict(country_breakdown),
-        top_pages=top_pages
+        top_pages=top_pages,
+        unique_visitors_today=visitors_today,
+        unique_visitors_this_week=visitors_week,
+        unique_visitors_this_month=visitors_month,
+        unique_sessions_today=sessions_today,
+        unique_sessions_this_week=sessions_week,
+        unique_sessions_this_month=sessions_month,
+        cta_clicks_this_month={row["_id"]: row["clicks"] for row in clicks}
+    )
+
+@api_router.get("/analytics/summary", response_model=AnalyticsSummary)
+async def get_analytics_summary(current_user: dict = Depends(get_current_user)):
+    return await build_analytics_summary()
+
+@api_router.get("/analytics/timeseries", response_model=TimeseriesResponse)
+async def get_analytics_timeseries(
+    from_date: Optional[str] = Query(None, alias="from"),
+    to_date: Optional[str] = Query(None, alias="to"),
+    granularity: Literal["hour", "day", "week"] = "day",
+    group_by: Optional[Literal["page", "device", "country"]] = None,
+    limit: int = Query(10, ge=1, le=50),
+    current_user: dict = Depends(get_current_user)
+):
+    """Dense pageview series for charts; from/to are ISO dates or datetimes (UTC), both inclusive"""
+    step = TIMESERIES_STEPS[granularity]
+    try:
+        last = bson_utc(datetime.fromisoformat(to_date)) if to_date else bson_utc(datetime.now(timezone.utc))
+        first = bson_utc(datetime.fromisoformat(from_date)) if from_date else last - step * 29
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must be ISO 8601")
+    start = floor_to_granularity(first, granularity)
+    end = floor_to_granularity(last, granularity) + step
+    buckets = int((end - start) / step)
+    if buckets <= 0:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+    if buckets > MAX_TIMESERIES_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"Range too large: at most {MAX_TIMESERIES_BUCKETS} {granularity} buckets")
+    
+    field = TIMESERIES_GROUPS[group_by] if group_by else None
+    times, keys, counts = await fetch_timeseries_rows(start, end, granularity, field)
+    if field is None:
+        keys = np.full(len(counts), "total", dtype=object)
+    series = bin_timeseries(times, keys, counts, start, step, buckets, limit)
+    if not series and field is None:
+        series = [{"key": "total", "total": 0, "values": [0] * buckets}]
+    
+    return TimeseriesResponse(
+        granularity=granularity,
+        group_by=group_by,
+        buckets=[(start + step * i).replace(tzinfo=timezone.utc) for i in range(buckets)],
+        series=series
+    )
+
+@api_router.get("/analytics/uniques", response_model=UniqueVisitorsResponse)
+async def get_unique_visitors(
+    from_date: Optional[str] = Query(None, alias="from"),
+    to_date: Optional[str] = Query(None, alias="to"),
+    page: str = ALL_PAGES,
+    current_user: dict = Depends(get_current_user)
+):
+    """Estimated unique visitors and sessions for a day range (YYYY-MM-DD, inclusive), site-wide or for one page"""
+    today = day_floor(bson_utc(datetime.now(timezone.utc)))
+    try:
+        last_day = datetime.strptime(to_date, "%Y-%m-%d") if to_date else today
+        first_day = datetime.strptime(from_date, "%Y-%m-%d") if from_date else last_day - timedelta(days=29)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must be in YYYY-MM-DD format")
+    if first_day > last_day:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+    
+    sketches = await load_visitor_sketches(first_day, last_day, page)
+    visitors, sessions = count_uniques(sketches, first_day)
+    return UniqueVisitorsResponse(
+        from_date=first_day.date().isoformat(),
+        to_date=last_day.date().isoformat(),
+        page_path=page,
+        unique_visitors=visitors,
+        unique_sessions=sessions
+    )
+
+@api_router.post("/analytics/export", status_code=202)
+async def start_analytics_export(request: Request, current_user: dict = Depends(get_current_user)):
+    """Start exporting raw analytics events to day-partitioned Parquet files in the background"""
+    global analytics_export_task
+    try:
+        import_pyarrow()
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    if analytics_export_task is not None and not analytics_export_task.done():
+        raise HTTPException(status_code=409, detail="An analytics export is already running")
+    analytics_export_task = asyncio.create_task(run_analytics_export(request.app.state.settings))
+    logger.info(f"Analytics export started by {current_user['email']}")
+    return {"message": "Analytics export started"}
+
+@api_router.get("/analytics/exports", response_model=AnalyticsExportStatus)
+async def get_analytics_exports(request: Request, current_user: dict = Depends(get_current_user)):
+    """Exported Parquet files and how far the export has progressed"""
+    state = await db[ANALYTICS_STATE].find_one({"_id": EXPORT_STATE_ID})
+    return AnalyticsExportStatus(
+        running=analytics_export_task is not None and not analytics_export_task.done(),
+        exported_until=state.get("exported_until") if state else None,
+        files=await asyncio.to_thread(list_analytics_exports, request.app.state.settings)
     )
 
+@api_router.get("/analytics/exports/{partition}/{filename}")
+async def download_analytics_export(
+    partition: str,
+    filename: str,
+    request: Request,
+    current_user: dict = Depends(get_current_user)
+):
+    """Download one exported Parquet file"""
+    # Only names the exporter produces, so nothing outside the export directory is reachable
+    if not EXPORT_DAY_PATTERN.match(partition) or not EXPORT_PART_PATTERN.match(filename):
+        raise HTTPException(status_code=404, detail="Export file not found")
+    file_path = analytics_export_dir(request.app.state.settings) / partition / filename
+    if not file_path.exists():
+        raise HTTPException(status_code=404, detail="Export file not found")
+    return FileResponse(file_path, media_type="application/vnd.apache.parquet", filename=f"analytics-{partition[4:]}-{filename}")
+
 # ==================== HERO SLIDES ROUTES ====================
 
 @api_router.post("/slides", response_model=HeroSlideResponse)
@@ -1444,14 +4268,14 @@ async def create_slide(data: HeroSlideCreate, current_user: dict = Depends(get_c
     slide_id = str(uuid.uuid4())
     now = datetime.now(timezone.utc)
     doc = {"id": slide_id, **data.model_dump(), "created_at": now.isoformat()}
-    await db.slides.insert_one(doc)
+    await insert_content("slides", doc)
     logger.info(f"Slide created: {slide_id} by user: {current_user['email']}")
     return HeroSlideResponse(**{**doc, "created_at": now})
 
-@api_router.get("/slides", response_model=List[HeroSlideResponse])
-async def get_slides(active_only: bool = True):
+@api_router.get("/slides", response_model=List[HeroSlideResponse], dependencies=[versioned("slides")])
+async def get_slides(request: Request, active_only: bool = True):
     query = {"is_active": True} if active_only else {}
-    items = await db.slides.find(query, {"_id": 0}).sort("order", 1).to_list(20)
+    items = await reader_for(request, admin_view=not active_only).slides.find(query, {"_id": 0}).sort("order", 1).to_list(20)
     result = []
     for s in items:
         if isinstance(s.get("created_at"), str):
@@ -1464,28 +4288,22 @@ async def update_slide(slide_id: str, data: HeroSlideUpdate, current_user: dict
     update_data = {k: v for k, v in data.model_dump().items() if v is not None}
     if not update_data:
         raise HTTPException(status_code=400, detail="No data to update")
-    result = await db.slides.update_one({"id": slide_id}, {"$set": update_data})
-    if result.matched_count == 0:
-        raise HTTPException(status_code=404, detail="Slide not found")
+    item = await update_content("slides", slide_id, update_data, "Slide not found")
     logger.info(f"Slide updated: {slide_id} by user: {current_user['email']}")
-    item = await db.slides.find_one({"id": slide_id}, {"_id": 0})
     if isinstance(item.get("created_at"), str):
         item["created_at"] = datetime.fromisoformat(item["created_at"])
     return HeroSlideResponse(**item)
 
 @api_router.delete("/slides/{slide_id}")
 async def delete_slide(slide_id: str, current_user: dict = Depends(get_current_user)):
-    result = await db.slides.delete_one({"id": slide_id})
-    if result.deleted_count == 0:
-        raise HTTPException(status_code=404, detail="Slide not found")
+    await delete_content("slides", {"id": slide_id}, "Slide not found")
     logger.info(f"Slide deleted: {slide_id} by user: {current_user['email']}")
     return {"message": "Slide deleted successfully"}
 
 # ==================== SITE SETTINGS ROUTES ====================
 
-@api_router.get("/settings", response_model=SiteSettingsResponse)
-async def get_settings():
-    settings = await db.settings.find_one({}, {"_id": 0})
+async def load_site_settings(reader) -> SiteSettingsResponse:
+    settings = await reader.settings.find_one({}, {"_id": 0})
     if not settings:
         # Return default settings if none exist
         default = {
@@ -1503,12 +4321,16 @@ async def get_settings():
             ],
             "updated_at": datetime.now(timezone.utc).isoformat()
         }
-        await db.settings.insert_one(default)
+        await insert_content("settings", default)
         settings = default
     if isinstance(settings.get("updated_at"), str):
         settings["updated_at"] = datetime.fromisoformat(settings["updated_at"])
     return SiteSettingsResponse(**settings)
 
+@api_router.get("/settings", response_model=SiteSettingsResponse, dependencies=[versioned("settings")])
+async def get_settings(request: Request):
+    return await load_site_settings(reader_for(request))
+
 @api_router.put("/settings", response_model=SiteSettingsResponse)
 async def update_settings(data: SiteSettingsCreate, current_user: dict = Depends(get_current_user)):
     now = datetime.now(timezone.utc)
@@ -1520,12 +4342,13 @@ async def update_settings(data: SiteSettingsCreate, current_user: dict = Depends
     }
     
     if settings:
-        await db.settings.update_one({"id": settings["id"]}, {"$set": update_doc})
+        await update_content("settings", settings["id"], update_doc, "Settings not found")
         update_doc["id"] = settings["id"]
     else:
         update_doc["id"] = str(uuid.uuid4())
-        await db.settings.insert_one(update_doc)
+        await insert_content("settings", update_doc)
     
+    admin_bootstrap_cache.clear()
     logger.info(f"Site settings updated by user: {current_user['email']}")
     return SiteSettingsResponse(**{**update_doc, "updated_at": now})
 
@@ -1533,22 +4356,20 @@ async def update_settings(data: SiteSettingsCreate, current_user: dict = Depends
 
 @api_router.post("/cta-sections", response_model=CTASectionResponse)
 async def create_cta_section(data: CTASectionCreate, current_user: dict = Depends(get_current_user)):
-    # Check for duplicate section_key
-    existing = await db.cta_sections.find_one({"section_key": data.section_key})
-    if existing:
-        raise HTTPException(status_code=400, detail="Section key already exists")
-    
     section_id = str(uuid.uuid4())
     now = datetime.now(timezone.utc)
     doc = {"id": section_id, **data.model_dump(), "updated_at": now.isoformat()}
-    await db.cta_sections.insert_one(doc)
+    try:
+        await insert_content("cta_sections", doc)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Section key already exists")
     logger.info(f"CTA section created: {section_id} by user: {current_user['email']}")
     return CTASectionResponse(**{**doc, "updated_at": now})
 
-@api_router.get("/cta-sections", response_model=List[CTASectionResponse])
-async def get_cta_sections(active_only: bool = True):
+@api_router.get("/cta-sections", response_model=List[CTASectionResponse], dependencies=[versioned("cta_sections")])
+async def get_cta_sections(request: Request, active_only: bool = True):
     query = {"is_active": True} if active_only else {}
-    items = await db.cta_sections.find(query, {"_id": 0}).to_list(50)
+    items = await reader_for(request, admin_view=not active_only).cta_sections.find(query, {"_id": 0}).to_list(50)
     result = []
     for s in items:
         if isinstance(s.get("updated_at"), str):
@@ -1557,8 +4378,8 @@ async def get_cta_sections(active_only: bool = True):
     return result
 
 @api_router.get("/cta-sections/{section_key}", response_model=CTASectionResponse)
-async def get_cta_section(section_key: str):
-    item = await db.cta_sections.find_one({"section_key": section_key}, {"_id": 0})
+async def get_cta_section(section_key: str, request: Request):
+    item = await reader_for(request).cta_sections.find_one({"section_key": section_key}, {"_id": 0})
     if not item:
         raise HTTPException(status_code=404, detail="CTA section not found")
     if isinstance(item.get("updated_at"), str):
@@ -1570,21 +4391,15 @@ async def update_cta_section(section_id: str, data: CTASectionUpdate, current_us
     update_data = {k: v for k, v in data.model_dump().items() if v is not None}
     update_data["updated_at"] = datetime.now(timezone.utc).isoformat()
     
-    result = await db.cta_sections.update_one({"id": section_id}, {"$set": update_data})
-    if result.matched_count == 0:
-        raise HTTPException(status_code=404, detail="CTA section not found")
-    
+    item = await update_content("cta_sections", section_id, update_data, "CTA section not found")
     logger.info(f"CTA section updated: {section_id} by user: {current_user['email']}")
-    item = await db.cta_sections.find_one({"id": section_id}, {"_id": 0})
     if isinstance(item.get("updated_at"), str):
         item["updated_at"] = datetime.fromisoformat(item["updated_at"])
     return CTASectionResponse(**item)
 
 @api_router.delete("/cta-sections/{section_id}")
 async def delete_cta_section(section_id: str, current_user: dict = Depends(get_current_user)):
-    result = await db.cta_sections.delete_one({"id": section_id})
-    if result.deleted_count == 0:
-        raise HTTPException(status_code=404, detail="CTA section not found")
+    await delete_content("cta_sections", {"id": section_id}, "CTA section not found")
     logger.info(f"CTA section deleted: {section_id} by user: {current_user['email']}")
     return {"message": "CTA section deleted successfully"}
 
@@ -1598,14 +4413,14 @@ async def create_vacancy(data: VacancyCreate, current_user: dict = Depends(get_c
         **data.model_dump(),
         "created_at": now.isoformat()
     }
-    await db.vacancies.insert_one(doc)
+    await insert_content("vacancies", doc)
     logger.info(f"Vacancy created by user: {current_user['email']}")
     return VacancyResponse(**{**doc, "created_at": now})
 
 @api_router.get("/vacancies", response_model=List[VacancyResponse])
-async def get_vacancies(active_only: bool = True):
+async def get_vacancies(request: Request, active_only: bool = True):
     query = {"is_active": True} if active_only else {}
-    items = await db.vacancies.find(query, {"_id": 0}).sort("created_at", -1).to_list(100)
+    items = await reader_for(request, admin_view=not active_only).vacancies.find(query, {"_id": 0}).sort("created_at", -1).to_list(100)
     result = []
     for item in items:
         if isinstance(item.get("created_at"), str):
@@ -1614,8 +4429,8 @@ async def get_vacancies(active_only: bool = True):
     return result
 
 @api_router.get("/vacancies/{vacancy_id}", response_model=VacancyResponse)
-async def get_vacancy(vacancy_id: str):
-    item = await db.vacancies.find_one({"id": vacancy_id}, {"_id": 0})
+async def get_vacancy(vacancy_id: str, request: Request):
+    item = await reader_for(request).vacancies.find_one({"id": vacancy_id}, {"_id": 0})
     if not item:
         raise HTTPException(status_code=404, detail="Vacancy not found")
     if isinstance(item.get("created_at"), str):
@@ -1627,21 +4442,16 @@ async def update_vacancy(vacancy_id: str, data: VacancyUpdate, current_user: dic
     update_data = {k: v for k, v in data.model_dump().items() if v is not None}
     if not update_data:
         raise HTTPException(status_code=400, detail="No data to update")
+    update_data["updated_at"] = datetime.now(timezone.utc).isoformat()
     
-    result = await db.vacancies.update_one({"id": vacancy_id}, {"$set": update_data})
-    if result.matched_count == 0:
-        raise HTTPException(status_code=404, detail="Vacancy not found")
-    
-    item = await db.vacancies.find_one({"id": vacancy_id}, {"_id": 0})
+    item = await update_content("vacancies", vacancy_id, update_data, "Vacancy not found")
     if isinstance(item.get("created_at"), str):
         item["created_at"] = datetime.fromisoformat(item["created_at"])
     return VacancyResponse(**item)
 
 @api_router.delete("/vacancies/{vacancy_id}")
 async def delete_vacancy(vacancy_id: str, current_user: dict = Depends(get_current_user)):
-    result = await db.vacancies.delete_one({"id": vacancy_id})
-    if result.deleted_count == 0:
-        raise HTTPException(status_code=404, detail="Vacancy not found")
+    await delete_content("vacancies", {"id": vacancy_id}, "Vacancy not found")
     return {"message": "Vacancy deleted successfully"}
 
 # ==================== INTERNSHIP ROUTES ====================
@@ -1654,19 +4464,19 @@ async def create_internship(data: InternshipCreate, current_user: dict = Depends
         **data.model_dump(),
         "created_at": now.isoformat()
     }
-    await db.internships.insert_one(doc)
+    await insert_content("internships", doc)
     logger.info(f"Internship created by user: {current_user['email']}")
     return InternshipResponse(**{**doc, "created_at": now})
 
 @api_router.get("/internships", response_model=List[InternshipResponse])
-async def get_internships(active_only: bool = True, category: Optional[str] = None):
+async def get_internships(request: Request, active_only: bool = True, category: Optional[str] = None):
     query = {}
     if active_only:
         query["is_active"] = True
     if category:
         query["category"] = category
     
-    items = await db.internships.find(query, {"_id": 0}).sort("created_at", -1).to_list(100)
+    items = await reader_for(request, admin_view=not active_only).internships.find(query, {"_id": 0}).sort("created_at", -1).to_list(100)
     result = []
     for item in items:
         if isinstance(item.get("created_at"), str):
@@ -1675,8 +4485,8 @@ async def get_internships(active_only: bool = True, category: Optional[str] = No
     return result
 
 @api_router.get("/internships/{internship_id}", response_model=InternshipResponse)
-async def get_internship(internship_id: str):
-    item = await db.internships.find_one({"id": internship_id}, {"_id": 0})
+async def get_internship(internship_id: str, request: Request):
+    item = await reader_for(request).internships.find_one({"id": internship_id}, {"_id": 0})
     if not item:
         raise HTTPException(status_code=404, detail="Internship not found")
     if isinstance(item.get("created_at"), str):
@@ -1688,21 +4498,16 @@ async def update_internship(internship_id: str, data: InternshipUpdate, current_
     update_data = {k: v for k, v in data.model_dump().items() if v is not None}
     if not update_data:
         raise HTTPException(status_code=400, detail="No data to update")
+    update_data["updated_at"] = datetime.now(timezone.utc).isoformat()
     
-    result = await db.internships.update_one({"id": internship_id}, {"$set": update_data})
-    if result.matched_count == 0:
-        raise HTTPException(status_code=404, detail="Internship not found")
-    
-    item = await db.internships.find_one({"id": internship_id}, {"_id": 0})
+    item = await update_content("internships", internship_id, update_data, "Internship not found")
     if isinstance(item.get("created_at"), str):
         item["created_at"] = datetime.fromisoformat(item["created_at"])
     return InternshipResponse(**item)
 
 @api_router.delete("/internships/{internship_id}")
 async def delete_internship(internship_id: str, current_user: dict = Depends(get_current_user)):
-    result = await db.internships.delete_one({"id": internship_id})
-    if result.deleted_count == 0:
-        raise HTTPException(status_code=404, detail="Internship not found")
+    await delete_content("internships", {"id": internship_id}, "Internship not found")
     return {"message": "Internship deleted successfully"}
 
 # ==================== PAGE SEO ROUTES ====================
@@ -1727,8 +4532,8 @@ async def get_all_page_seo(current_user: dict = Depends(get_current_user)):
     return result
 
 @api_router.get("/page-seo/{page_key}", response_model=PageSEOResponse)
-async def get_page_seo(page_key: str):
-    item = await db.page_seo.find_one({"page_key": page_key}, {"_id": 0})
+async def get_page_seo(page_key: str, request: Request):
+    item = await reader_for(request).page_seo.find_one({"page_key": page_key}, {"_id": 0})
     if not item:
         return PageSEOResponse(page_key=page_key)
     if isinstance(item.get("updated_at"), str):
@@ -1746,11 +4551,13 @@ async def update_page_seo(page_key: str, data: PageSEOCreate, current_user: dict
     update_data["page_key"] = page_key
     update_data["updated_at"] = now.isoformat()
     
-    await db.page_seo.update_one(
-        {"page_key": page_key},
-        {"$set": update_data},
-        upsert=True
-    )
+    async with revision_lease("page_seo") as revision:
+        update_data["revision"] = revision
+        await db.page_seo.update_one(
+            {"page_key": page_key},
+            {"$set": update_data},
+            upsert=True
+        )
     
     logger.info(f"Page SEO updated for '{page_key}' by user: {current_user['email']}")
     return PageSEOResponse(**{**update_data, "updated_at": now})
@@ -1814,8 +4621,6 @@ async def upload_image(
 @api_router.get("/uploads/images/{filename}")
 async def get_uploaded_image(filename: str):
     """Serve uploaded images"""
-    from fastapi.responses import FileResponse
-    
     # Sanitize filename to prevent directory traversal
     safe_filename = Path(filename).name
     file_path = UPLOADS_DIR / safe_filename
@@ -2209,27 +5014,448 @@ async def seed_database():
         }
         await db.settings.insert_one(settings)
     
+    await backfill_sync_revisions()
     return {"message": "Database seeded successfully"}
 
+# ==================== METRICS ROUTE ====================
+
+def is_metrics_scrape_allowed(request: Request) -> bool:
+    """Bearer METRICS_TOKEN only; without it the endpoint is disabled.
+
+    The peer address is no guide: behind the ingress or reverse proxy every
+    request arrives from a private or loopback address.
+    """
+    if not METRICS_TOKEN:
+        return False
+    auth_header = request.headers.get("Authorization", "")
+    return secrets.compare_digest(auth_header, f"Bearer {METRICS_TOKEN}")
+
+@api_router.get("/metrics")
+async def get_metrics(request: Request):
+    """Prometheus text exposition of request, MongoDB and rate-limiter metrics"""
+    if not is_metrics_scrape_allowed(request):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+    table_sizes = Gauge("security_table_entries", "Entries held in in-memory security tables.", ("table",))
+    table_sizes.set("rate_limit_store", value=len(rate_limit_store))
+    table_sizes.set("rate_limit_timestamps", value=sum(len(v) for v in list(rate_limit_store.values())))
+    table_sizes.set("login_attempt_store", value=len(login_attempt_store))
+    table_sizes.set("ip_blacklist", value=len(ip_blacklist))
+
+    ua_cache = classify_user_agent.cache_info()
+    ua_cache_stats = Gauge("user_agent_cache", "User-Agent classification cache statistics.", ("stat",))
+    ua_cache_stats.set("hits", value=ua_cache.hits)
+    ua_cache_stats.set("misses", value=ua_cache.misses)
+    ua_cache_stats.set("entries", value=ua_cache.currsize)
+
+    lines = []
+    for metric in (HTTP_REQUESTS, HTTP_LATENCY, HTTP_IN_FLIGHT, MONGO_COMMAND_LATENCY,
+                   MONGO_COMMAND_FAILURES, MONGO_POOL_WAIT, MONGO_POOL_CHECKOUT_FAILURES, ANALYTICS_BOT_EVENTS,
+                   table_sizes, ua_cache_stats):
+        lines.extend(metric.expose())
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
+
+# ==================== PROFILER ROUTES ====================
+
+class ProfilerConfig(BaseModel):
+    sample_rate: float = Field(default=1.0, ge=0.0, le=1.0)
+    route: Optional[str] = None  # e.g. "/api/analytics/summary"; None profiles every route
+    interval_ms: float = Field(default=5.0, ge=1.0, le=1000.0)
+    duration_seconds: int = Field(default=300, ge=1, le=3600)
+
+def require_admin(current_user: dict = Depends(get_current_user)) -> dict:
+    if current_user.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return current_user
+
+@api_router.get("/admin/profiler")
+async def get_profiler_status(current_user: dict = Depends(require_admin)):
+    return request_profiler.status()
+
+@api_router.put("/admin/profiler")
+async def start_profiler(config: ProfilerConfig, current_user: dict = Depends(require_admin)):
+    """Start (or reconfigure) sampling; turns itself off after duration_seconds"""
+    request_profiler.configure(config.sample_rate, config.route, config.interval_ms, config.duration_seconds)
+    logger.info(f"Profiler enabled by {current_user['email']}: route={config.route} rate={config.sample_rate}")
+    return request_profiler.status()
+
+@api_router.delete("/admin/profiler")
+async def stop_profiler(clear: bool = False, current_user: dict = Depends(require_admin)):
+    request_profiler.stop()
+    if clear:
+        request_profiler.reset()
+    return request_profiler.status()
+
+@api_router.get("/admin/profiler/collapsed")
+async def download_profile(current_user: dict = Depends(require_admin)):
+    """Collapsed stacks ("frame;frame;frame count") for flamegraph.pl / speedscope"""
+    filename = f"profile-{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}.folded"
+    return PlainTextResponse(
+        request_profiler.collapsed(),
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 # Root endpoint
 @api_router.get("/")
 async def root():
     return {"message": "Novatech Education Center API", "version": "1.0.0"}
 
-# Include router
-app.include_router(api_router)
-
-# CORS middleware with stricter settings
-allowed_origins = os.environ.get('CORS_ORIGINS', '*').split(',')
-app.add_middleware(
-    CORSMiddleware,
-    allow_credentials=True,
-    allow_origins=allowed_origins,
-    allow_methods=["GET", "POST", "PUT", "DELETE"],
-    allow_headers=["Authorization", "Content-Type"],
-    max_age=600,  # Cache preflight for 10 minutes
+# ==================== ADMIN BOOTSTRAP ====================
+
+# Everything the admin shell needs on first paint, in one round trip. The shared
+# part (analytics, inbox, counts, settings) is gathered concurrently and cached
+# briefly, and concurrent misses wait for a single rebuild. The principal and role
+# flags come from the already-authenticated user and are never cached.
+ADMIN_BOOTSTRAP_TTL_SECONDS = 10.0
+ADMIN_CONTENT_COLLECTIONS = (
+    "courses", "faqs", "blogs", "testimonials", "teachers", "slides", "cta_sections", "vacancies", "internships"
+)
+
+admin_bootstrap_cache: Dict[str, Any] = {}
+admin_bootstrap_lock = asyncio.Lock()
+
+class AdminBootstrap(BaseModel):
+    user: UserResponse
+    is_admin1: bool
+    is_admin2: bool
+    analytics: AnalyticsSummary
+    inbox: InboxStats
+    content_counts: Dict[str, int]
+    settings: SiteSettingsResponse
+    generated_at: datetime
+
+async def load_admin_bootstrap_data() -> Dict[str, Any]:
+    cached = admin_bootstrap_cache.get("data")
+    if cached and admin_bootstrap_cache["expires"] > time.monotonic():
+        return cached
+    async with admin_bootstrap_lock:
+        cached = admin_bootstrap_cache.get("data")
+        if cached and admin_bootstrap_cache["expires"] > time.monotonic():
+            return cached
+        analytics, inbox, settings, *counts = await asyncio.gather(
+            build_analytics_summary(),
+            load_inbox_stats(),
+            load_site_settings(db),
+            *(db[name].estimated_document_count() for name in ADMIN_CONTENT_COLLECTIONS)
+        )
+        data = {
+            "analytics": analytics,
+            "inbox": inbox,
+            "settings": settings,
+            "content_counts": dict(zip(ADMIN_CONTENT_COLLECTIONS, counts)),
+            "generated_at": datetime.now(timezone.utc),
+        }
+        admin_bootstrap_cache.update(data=data, expires=time.monotonic() + ADMIN_BOOTSTRAP_TTL_SECONDS)
+        return data
+
+@api_router.get("/admin/bootstrap", response_model=AdminBootstrap)
+async def get_admin_bootstrap(current_user: dict = Depends(get_current_user)):
+    """Principal, role flags, analytics headline, inbox counters, content counts and settings in one response"""
+    data = await load_admin_bootstrap_data()
+    email = current_user["email"].lower()
+    return AdminBootstrap(
+        user=await get_me(current_user),
+        is_admin1=email == ADMIN1_EMAIL.lower(),
+        is_admin2=email == ADMIN2_EMAIL.lower(),
+        **data
+    )
+
+# ==================== SEO SHELL ====================
+
+# Serves the built SPA's index.html for public routes with the page's <title>, meta
+# description, canonical link, Open Graph tags and hreflang alternates already in
+# <head>, so crawlers and first paint get the right metadata without waiting for
+# the app to boot. Metadata comes from page_seo for the static pages and from the
+# course/blog document (meta_* fields, else title and description) for detail
+# pages. Only routes the SPA has are served: other paths, and courses or posts that
+# do not exist (or are not public), get a real 404 and are never cached, so the LRU
+# keyed by (path, lang, versions of the collections the page reads) holds real pages
+# only. Other files in the build directory are served as-is. The shell carries its
+# own Content-Security-Policy allowing Google Fonts and the API origin the build was
+# made for (REACT_APP_BACKEND_URL, read from the feed link in index.html).
+SITE_NAME = "Novatech Education Center"
+DEFAULT_FRONTEND_INDEX = ROOT_DIR.parent / "frontend" / "build" / "index.html"
+SEO_SHELL_CACHE_SIZE = 512
+SEO_PAGE_KEYS = {  # SPA path -> page_seo key
+    "/": "home",
+    "/about": "about",
+    "/courses": "courses",
+    "/blog": "blog",
+    "/contact": "contact",
+    "/vacancies": "careers",
+    "/internships": "careers",
+}
+SEO_COURSE_PATH = re.compile(r"^/courses/([0-9a-fA-F-]{36})$")
+SEO_BLOG_PATH = re.compile(r"^/blog/([a-zA-Z0-9\-_]+)$")
+SPA_ADMIN_PATHS = frozenset({"/nova-admin"} | {
+    f"/nova-admin/{page}" for page in (
+        "dashboard", "courses", "blogs", "testimonials", "teachers", "submissions",
+        "trial-lessons", "vacancies", "internships", "slides", "settings",
+    )
+})
+SHELL_API_ORIGIN = re.compile(r"href=\"(https?://[^/\"]+)/api/blogs/feed\.xml\"", re.I)
+SHELL_CSP = (
+    "default-src 'self'; script-src 'self' 'unsafe-inline'; "
+    "style-src 'self' 'unsafe-inline' https://fonts.googleapis.com; font-src 'self' https://fonts.gstatic.com data:; "
+    "img-src 'self' {api} https: data: blob:; connect-src 'self' {api}; frame-src https://www.google.com; "
+    "object-src 'none'; base-uri 'self'; frame-ancestors 'none'"
 )
+OG_LOCALES = {"az": "az_AZ", "en": "en_US", "ru": "ru_RU"}
+SHELL_LANG_MARK = "\x00lang\x00"
+SHELL_HEAD_MARK = "\x00head\x00"
+
+seo_shell_cache: "OrderedDict[tuple, tuple]" = OrderedDict()  # key -> (body, ETag)
+seo_shell_template: Optional[tuple] = None  # (index path, mtime, template with markers, default description, CSP)
+
+def frontend_index_path(settings: AppSettings) -> Path:
+    return Path(settings.frontend_index_path) if settings.frontend_index_path else DEFAULT_FRONTEND_INDEX
+
+def load_shell_template(settings: AppSettings) -> Optional[tuple]:
+    """index.html with its title and description removed and markers for the language and
+    the generated head tags, plus the description it carried (the site default) and the
+    page's CSP; reloaded, and the rendered shells dropped, when the file changes"""
+    global seo_shell_template
+    path = frontend_index_path(settings)
+    try:
+        mtime = path.stat().st_mtime
+    except OSError:
+        return None
+    if seo_shell_template and seo_shell_template[:2] == (path, mtime):
+        return seo_shell_template[2:]
+    source = path.read_text(encoding="utf-8")
+    description = re.search(r"<meta\s+name=\"description\"\s+content=\"([^\"]*)\"", source, flags=re.I)
+    api_origin = SHELL_API_ORIGIN.search(source)
+    csp = SHELL_CSP.format(api=api_origin.group(1) if api_origin else "").replace("  ", " ")
+    source = re.sub(r"<title>.*?</title>\s*", "", source, flags=re.S | re.I)
+    source = re.sub(r"<meta\s+name=\"description\"[^>]*>\s*", "", source, flags=re.I)
+    source = re.sub(r"(<html[^>]*?\slang=\")[^\"]*", lambda m: m.group(1) + SHELL_LANG_MARK, source, count=1, flags=re.I)
+    source = re.sub(r"</head>", lambda m: SHELL_HEAD_MARK + m.group(0), source, count=1, flags=re.I)
+    seo_shell_template = (path, mtime, source, html.unescape(description.group(1)) if description else "", csp)
+    seo_shell_cache.clear()
+    return seo_shell_template[2:]
+
+async def resolve_page_meta(path: str, lang: str, default_description: str) -> Optional[dict]:
+    """Title, description, image and Open Graph type for an SPA path; None when the SPA has
+    no such route or the course or post it names is not public"""
+    meta = {"title": SITE_NAME, "description": default_description, "image": None, "type": "website"}
+    page_key = SEO_PAGE_KEYS.get(path)
+    course_match = SEO_COURSE_PATH.match(path)
+    blog_match = SEO_BLOG_PATH.match(path)
+    if page_key:
+        seo = await db.page_seo.find_one({"page_key": page_key}, {"_id": 0}) or {}
+        meta["title"] = localized_text(seo.get("meta_title"), lang) or SITE_NAME
+        meta["description"] = localized_text(seo.get("meta_description"), lang) or default_description
+    elif course_match:
+        course = await db.courses.find_one({"id": course_match.group(1), "is_active": True}, {"_id": 0})
+        if not course:
+            return None
+        title = localized_text(course.get("meta_title"), lang)
+        meta["title"] = title or f"{localized_text(course.get('title'), lang)} | {SITE_NAME}"
+        meta["description"] = localized_text(course.get("meta_description"), lang) or localized_text(course.get("description"), lang)
+        meta["image"] = course.get("image_url")
+    elif blog_match:
+        blog = await db.blogs.find_one({"slug": blog_match.group(1).lower(), "is_published": True}, BLOG_CARD_PROJECTION | {"meta_title": 1, "meta_description": 1})
+        if not blog:
+            return None
+        title = localized_text(blog.get("meta_title"), lang)
+        meta["title"] = title or f"{localized_text(blog.get('title'), lang)} | {SITE_NAME}"
+        meta["description"] = localized_text(blog.get("meta_description"), lang) or localized_text(blog.get("excerpt"), lang)
+        meta["image"] = blog_card(blog)["image_url"]
+        meta["type"] = "article"
+    elif path not in SPA_ADMIN_PATHS:
+        return None
+    return meta
+
+def shell_collections(path: str) -> tuple:
+    if path in SEO_PAGE_KEYS:
+        return ("page_seo",)
+    if SEO_COURSE_PATH.match(path):
+        return ("courses",)
+    if SEO_BLOG_PATH.match(path):
+        return ("blogs",)
+    return ()
+
+def render_head_tags(meta: dict, site: str, path: str, lang: str) -> str:
+    url = f"{site}{path}"
+    image = meta["image"]
+    if image and image.startswith("/"):
+        image = site + image  # uploads are served by this backend, which also serves the site
+    tags = [
+        f"<title>{html.escape(meta['title'])}</title>",
+        f'<meta name="description" content="{html.escape(meta["description"])}" />',
+        f'<link rel="canonical" href="{html.escape(url)}" />',
+        f'<meta property="og:type" content="{meta["type"]}" />',
+        f'<meta property="og:site_name" content="{SITE_NAME}" />',
+        f'<meta property="og:title" content="{html.escape(meta["title"])}" />',
+        f'<meta property="og:description" content="{html.escape(meta["description"])}" />',
+        f'<meta property="og:url" content="{html.escape(f"{url}?lang={lang}")}" />',
+        f'<meta property="og:locale" content="{OG_LOCALES[lang]}" />',
+    ]
+    if image:
+        tags.append(f'<meta property="og:image" content="{html.escape(image)}" />')
+    tags += [
+        f'<link rel="alternate" hreflang="{other}" href="{html.escape(f"{url}?lang={other}")}" />'
+        for other in SITE_LANGUAGES
+    ]
+    tags.append(f'<link rel="alternate" hreflang="x-default" href="{html.escape(url)}" />')
+    return "\n        ".join(tags) + "\n    "
+
+class SitePathConvertor(PathConvertor):
+    """Any path outside /api, so the router answers unknown API paths (404, or 405 for a
+    known path and the wrong method) instead of matching them against the catch-all"""
+    regex = r"(?!api(?:/|$)).*"
+
+register_url_convertor("site_path", SitePathConvertor())
+
+@site_router.api_route("/{path:site_path}", methods=["GET", "HEAD"], include_in_schema=False)
+async def serve_frontend(path: str, request: Request, lang: Optional[str] = None):
+    """Catch-all for the SPA; registered last so the API and /sitemap.xml take precedence"""
+    settings = request.app.state.settings
+    shell = load_shell_template(settings)
+    if shell is None:
+        raise HTTPException(status_code=404, detail="Frontend build not found")
+
+    if path and "." in path.rsplit("/", 1)[-1]:
+        # Build assets (JS, CSS, images, manifest): served from the build directory only
+        build_dir = frontend_index_path(settings).parent.resolve()
+        candidate = (build_dir / path).resolve()
+        if build_dir in candidate.parents and candidate.is_file():
+            return FileResponse(candidate)
+        raise HTTPException(status_code=404, detail="Not Found")
+
+    page_path = "/" + path.strip("/")
+    lang = lang if lang in SITE_LANGUAGES else "az"
+    site = public_site_url(request)
+    key = (page_path, lang, await collection_versions.current(*shell_collections(page_path)))
+    cached = seo_shell_cache.get(key)
+    if cached:
+        seo_shell_cache.move_to_end(key)
+    else:
+        template, default_description, _ = shell
+        meta = await resolve_page_meta(page_path, lang, default_description)
+        if meta is None:
+            raise HTTPException(status_code=404, detail="Not Found")
+        head = render_head_tags(meta, site, page_path, lang)
+        body = template.replace(SHELL_LANG_MARK, lang).replace(SHELL_HEAD_MARK, head).encode("utf-8")
+        cached = (body, f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"')
+        seo_shell_cache[key] = cached
+        if len(seo_shell_cache) > SEO_SHELL_CACHE_SIZE:
+            seo_shell_cache.popitem(last=False)
+    return conditional_response(
+        request, cached[0], cached[1], "text/html; charset=utf-8", "no-cache", {"Content-Security-Policy": shell[2]}
+    )
+
+# ==================== APPLICATION FACTORY ====================
+
+# Hot collections touched once at startup so their working set is in the server cache
+WARMUP_COLLECTIONS = ["settings", "courses", "slides", "blogs", "testimonials", "teachers", "cta_sections"]
+
+async def warm_up(settings: AppSettings):
+    """Open min_pool_size connections and pre-read hot collections before serving traffic"""
+    try:
+        connections = max(1, settings.min_pool_size)
+        await asyncio.gather(*(client.admin.command("ping") for _ in range(connections)))
+        await asyncio.gather(*(db[name].find_one({}, {"_id": 0}) for name in WARMUP_COLLECTIONS))
+        logger.info(f"MongoDB warm-up complete ({connections} connections)")
+    except Exception as e:
+        logger.warning(f"MongoDB warm-up failed, continuing cold: {e}")
+
+@asynccontextmanager
+async def lifespan(application: FastAPI):
+    global client, db, public_db, geoip
+    settings = application.state.settings
+    provided_client = application.state.mongo_client
+    client = provided_client or build_mongo_client(settings)
+    db = client[settings.db_name]
+    public_db = client.get_database(settings.db_name, read_preference=build_public_read_preference(settings))
+    collection_versions.clear()
+    known_revisions.clear()
+    released_leases.clear()
+    released_tokens.clear()
+    course_page_cache.clear()
+    feed_cache.clear()
+    seo_shell_cache.clear()
+    geoip = load_geoip(settings)
+    if settings.warm_pool:
+        await warm_up(settings)
+    try:
+        await ensure_analytics_storage(settings)
+    except Exception as e:
+        logger.warning(f"Analytics storage setup failed: {e}")
+    try:
+        await ensure_sync_storage()
+    except Exception as e:
+        logger.warning(f"Sync storage setup failed: {e}")
+    try:
+        await ensure_blog_related()
+    except Exception as e:
+        logger.warning(f"Related posts setup failed: {e}")
+    try:
+        await ensure_admin_event_storage()
+    except Exception as e:
+        logger.warning(f"Admin event ticket setup failed: {e}")
+    # Not optional like the setup above: without these indexes duplicate slugs and
+    # section keys would be accepted silently, so startup fails instead
+    await ensure_content_indexes()
+    background = [asyncio.create_task(visitor_sketch_flush_loop())]
+    if settings.analytics_rollup_interval_seconds > 0:
+        background.append(asyncio.create_task(analytics_maintenance_loop(settings)))
+    if settings.inbox_reconcile_interval_seconds > 0:
+        background.append(asyncio.create_task(inbox_reconcile_loop(settings)))
+    background.append(asyncio.create_task(live_visitor_loop()))
+    background.append(asyncio.create_task(sync_tombstone_purge_loop(settings)))
+    try:
+        yield
+    finally:
+        admin_events.close()
+        if analytics_export_task is not None:
+            background.append(analytics_export_task)
+        if blog_related_task is not None:
+            background.append(blog_related_task)
+        for task in background:
+            task.cancel()
+        await asyncio.gather(*background, return_exceptions=True)
+        await flush_visitor_sketches()
+        if revision_release_task is not None and not revision_release_task.done():
+            # Let queued releases reach the counters; any left over expire with their leases
+            await asyncio.wait([revision_release_task], timeout=5)
+            revision_release_task.cancel()
+        if provided_client is None:
+            client.close()
+
+def create_app(settings: Optional[AppSettings] = None, mongo_client=None) -> FastAPI:
+    """Build the API app. Pass mongo_client to reuse an existing client (e.g. a test double)."""
+    settings = settings or AppSettings.from_env()
+
+    # Create the main app with security settings
+    application = FastAPI(
+        title="Novatech Education Center API",
+        docs_url=None,  # Disable Swagger UI in production
+        redoc_url=None,  # Disable ReDoc in production
+        openapi_url=None,  # Disable OpenAPI schema in production
+        lifespan=lifespan
+    )
+    application.state.settings = settings
+    application.state.mongo_client = mongo_client
+    application.include_router(api_router)
+    application.include_router(site_router)
+
+    # Innermost first: each add_middleware call wraps everything registered before it
+    application.add_middleware(SecurityMiddleware)
+    application.add_middleware(ProfilerMiddleware)
+    # CORS middleware with stricter settings
+    application.add_middleware(
+        CORSMiddleware,
+        allow_credentials=True,
+        allow_origins=settings.cors_origins,
+        allow_methods=["GET", "POST", "PUT", "DELETE"],
+        allow_headers=["Authorization", "Content-Type"],
+        expose_headers=[VERSION_HEADER],
+        max_age=600,  # Cache preflight for 10 minutes
+    )
+    application.add_middleware(QueryLedgerMiddleware)
+    # Outermost so rate-limited and CORS-rejected requests are measured too
+    application.add_middleware(MetricsMiddleware)
+    return application
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
+app = create_app()
@@ -0,0 +1,43 @@
+"""
+In-process app for tests that don't need a live server: create_app() over a fresh
+mongomock database, seeded, with an HTTP client and admin auth headers
+"""
+import asyncio
+import contextlib
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+mongomock_motor = pytest.importorskip("mongomock_motor")
+import server  # noqa: E402
+
+
+@contextlib.asynccontextmanager
+async def api_client(**settings):
+    """Fresh in-process app and database; yields an HTTP client and admin auth headers"""
+    app_settings = server.AppSettings(
+        db_name="test_inprocess",
+        warm_pool=False,
+        analytics_rollup_interval_seconds=0,
+        inbox_reconcile_interval_seconds=0,
+        **settings
+    )
+    app = server.create_app(app_settings, mongo_client=mongomock_motor.AsyncMongoMockClient())
+    async with app.router.lifespan_context(app):
+        await server.seed_database()
+        admin = await server.db.users.find_one({"email": server.ADMIN1_EMAIL})
+        token = server.create_token(admin["id"], admin["email"], admin["role"])
+        transport = httpx.ASGITransport(app=app, client=("127.0.0.1", 50000))
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+            yield client, {"Authorization": f"Bearer {token}"}
+
+
+def run(scenario, **settings):
+    """Run `scenario(client, headers)` against a fresh app"""
+    async def main():
+        async with api_client(**settings) as (client, headers):
+            await scenario(client, headers)
+    asyncio.run(main())
@@ -0,0 +1,107 @@
+"""
+Pageview time series (GET /api/analytics/timeseries, bin_timeseries)
+Runs in-process against mongomock: rolled-up hours plus raw events from the
+rollup watermark on, events exactly at the watermark, empty buckets, and
+bucket sizes that don't divide the range evenly
+"""
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from inprocess import run, server
+
+HOUR = timedelta(hours=1)
+
+
+def watermark_hour() -> datetime:
+    return server.hour_floor(server.bson_utc(datetime.now(timezone.utc)))
+
+
+def expected_values(times, start, step, buckets):
+    values = [0] * buckets
+    for ts in times:
+        index = (ts - start) // step
+        if 0 <= index < buckets:
+            values[index] += 1
+    return values
+
+
+async def seed(watermark):
+    """Events on both sides of the watermark; the rolled-up ones are then expired"""
+    rolled = [
+        (watermark - 5 * HOUR + timedelta(minutes=10), "desktop"),
+        (watermark - 3 * HOUR, "mobile"),
+        (watermark - 3 * HOUR + timedelta(minutes=30), "mobile"),
+        (watermark - timedelta(seconds=1), "desktop"),
+    ]
+    raw = [(watermark, "mobile"), (watermark, "desktop")]
+    await server.db[server.ANALYTICS_EVENTS].insert_many([
+        server.analytics_event(ts, "/", device, "AZ") for ts, device in rolled
+    ])
+    assert await server.downsample_analytics() > 0
+    assert await server.get_rollup_watermark() == watermark
+    # As if the retention TTL had expired them: only the rollups can answer for these hours
+    await server.db[server.ANALYTICS_EVENTS].delete_many({})
+    await server.db[server.ANALYTICS_EVENTS].insert_many([
+        server.analytics_event(ts, "/", device, "AZ") for ts, device in raw
+    ])
+    return rolled + raw
+
+
+async def timeseries(client, headers, **params):
+    response = await client.get("/api/analytics/timeseries", params=params, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+class TestTimeseries:
+    def test_hours_join_rollups_and_raw_events_at_the_watermark(self):
+        async def scenario(client, headers):
+            watermark = watermark_hour()
+            events = await seed(watermark)
+            start = watermark - 6 * HOUR
+            data = await timeseries(client, headers, granularity="hour",
+                                    **{"from": start.isoformat(), "to": watermark.isoformat()})
+            assert len(data["buckets"]) == 7
+            values = data["series"][0]["values"]
+            assert values == expected_values([ts for ts, _ in events], start, HOUR, 7)
+            assert values == [0, 1, 0, 2, 0, 1, 2]  # empty hours are zeros, not gaps
+
+            grouped = await timeseries(client, headers, granularity="hour", group_by="device",
+                                       **{"from": start.isoformat(), "to": watermark.isoformat()})
+            series = {s["key"]: s["values"] for s in grouped["series"]}
+            assert series == {"desktop": [0, 1, 0, 0, 0, 1, 1], "mobile": [0, 0, 0, 2, 0, 0, 1]}
+        run(scenario)
+
+    def test_days_and_uneven_weeks_count_every_event_once(self):
+        async def scenario(client, headers):
+            watermark = watermark_hour()
+            events = [ts for ts, _ in await seed(watermark)]
+            for granularity, span in (("day", timedelta(days=3)), ("week", timedelta(days=17))):
+                step = server.TIMESERIES_STEPS[granularity]
+                first = watermark - span
+                data = await timeseries(client, headers, granularity=granularity,
+                                        **{"from": first.isoformat(), "to": watermark.isoformat()})
+                start = server.floor_to_granularity(first, granularity)
+                buckets = len(data["buckets"])
+                assert datetime.fromisoformat(data["buckets"][0]).replace(tzinfo=None) == start
+                assert data["series"][0]["values"] == expected_values(events, start, step, buckets)
+                assert data["series"][0]["total"] == len(events)
+        run(scenario)
+
+    def test_empty_range_is_all_zeros(self):
+        async def scenario(client, headers):
+            data = await timeseries(client, headers, granularity="day", **{"from": "2020-01-01", "to": "2020-01-05"})
+            assert data["series"] == [{"key": "total", "total": 0, "values": [0] * 5}]
+        run(scenario)
+
+
+def test_step_that_does_not_divide_the_range():
+    start = datetime(2024, 5, 1)
+    times = np.array(["2024-05-01T00", "2024-05-01T02", "2024-05-01T03", "2024-05-01T09", "2024-05-01T10",
+                      "2024-04-30T23"], dtype="datetime64[h]").astype("datetime64[s]")
+    keys = np.array(["/"] * len(times), dtype=object)
+    counts = np.array([1, 2, 3, 4, 5, 6], dtype=np.int64)
+    # Ten hours of data round up to four 3-hour buckets; events before the start are dropped
+    series = server.bin_timeseries(times, keys, counts, start, timedelta(hours=3), 4, 10)
+    assert series == [{"key": "/", "total": 15, "values": [3, 3, 0, 9]}]
@@ -0,0 +1,102 @@
+"""
+Collection versions behind /api/manifest and the server-side content caches
+Runs the app in-process against mongomock; a write is held open inside its
+revision lease to check nothing is published or cached before it lands
+"""
+from inprocess import run, server
+
+
+async def versions(client):
+    return (await client.get("/api/manifest")).json()["versions"]
+
+
+class TestManifestVersions:
+    """Versions move only once a write has been acknowledged"""
+
+    def test_version_waits_for_write_in_flight(self):
+        async def scenario(client, headers):
+            before = await versions(client)
+            course = (await client.get("/api/courses")).json()[0]
+            async with server.revision_lease("courses") as revision:
+                assert (await versions(client))["courses"] == before["courses"]
+                await server.db.courses.update_one(
+                    {"id": course["id"]}, {"$set": {"price": "999 AZN", "revision": revision}}
+                )
+            assert (await versions(client))["courses"] != before["courses"]
+        run(scenario)
+
+    def test_update_of_missing_item_moves_no_version(self):
+        async def scenario(client, headers):
+            before = await versions(client)
+            response = await client.put("/api/courses/missing", json={"price": "999 AZN"}, headers=headers)
+            assert response.status_code == 404
+            await server.revision_release_task
+            server.collection_versions.loaded_at = 0.0  # re-read the counters
+            assert (await versions(client))["courses"] == before["courses"]
+        run(scenario)
+
+    def test_versioned_response_is_stamped_with_versions_read_at(self):
+        async def scenario(client, headers):
+            response = await client.get("/api/courses", params={"versioned": 1})
+            assert response.headers[server.VERSION_HEADER] == (await versions(client))["courses"]
+            assert server.VERSION_HEADER not in (await client.get("/api/courses")).headers
+
+            course = response.json()[0]
+            async with server.revision_lease("courses") as revision:
+                await server.db.courses.update_one(
+                    {"id": course["id"]}, {"$set": {"price": "999 AZN", "revision": revision}}
+                )
+                # Data read mid-write carries the old stamp, never the new one
+                stale = await client.get("/api/courses", params={"versioned": 1})
+            assert stale.headers[server.VERSION_HEADER] != (await versions(client))["courses"]
+            fresh = await client.get("/api/courses", params={"versioned": 1})
+            assert fresh.headers[server.VERSION_HEADER] == (await versions(client))["courses"]
+            assert next(c for c in fresh.json() if c["id"] == course["id"])["price"] == "999 AZN"
+        run(scenario)
+
+
+class TestCoursePageCache:
+    """The course page cache never keeps data older than its versions"""
+
+    def test_page_read_during_write_is_not_kept(self):
+        async def scenario(client, headers):
+            course = (await client.get("/api/courses")).json()[0]
+            path = f"/api/courses/{course['id']}/page"
+            assert (await client.get(path)).status_code == 200
+            async with server.revision_lease("courses") as revision:
+                # Read while the write is in flight, as in a slow update_course
+                assert (await client.get(path)).json()["course"]["price"] == course["price"]
+                await server.db.courses.update_one(
+                    {"id": course["id"]}, {"$set": {"price": "999 AZN", "revision": revision}}
+                )
+            assert (await client.get(path)).json()["course"]["price"] == "999 AZN"
+        run(scenario)
+
+    def test_update_is_visible_on_next_page_read(self):
+        async def scenario(client, headers):
+            course = (await client.get("/api/courses")).json()[0]
+            path = f"/api/courses/{course['id']}/page"
+            await client.get(path)
+            response = await client.put(f"/api/courses/{course['id']}", json={"price": "999 AZN"}, headers=headers)
+            assert response.status_code == 200
+            assert (await client.get(path)).json()["course"]["price"] == "999 AZN"
+        run(scenario)
+
+    def test_write_to_another_course_keeps_page(self):
+        async def scenario(client, headers):
+            courses = (await client.get("/api/courses")).json()
+            course = courses[0]
+            other = next(c for c in courses if c["category"] != course["category"])
+            path = f"/api/courses/{course['id']}/page"
+            await client.get(path)
+            cached = server.course_page_cache[course["id"]]
+            response = await client.put(f"/api/courses/{other['id']}", json={"price": "999 AZN"}, headers=headers)
+            assert response.status_code == 200
+            await client.get(path)
+            assert server.course_page_cache[course["id"]][3] is cached[3]
+
+            faq = {"course_id": course["id"], "question": {"en": "q", "az": "q", "ru": "q"},
+                   "answer": {"en": "a", "az": "a", "ru": "a"}, "order": 0}
+            created = (await client.post("/api/faqs", json=faq, headers=headers)).json()
+            assert created["id"] in [f["id"] for f in (await client.get(path)).json()["faqs"]]
+        run(scenario)
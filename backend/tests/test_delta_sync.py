@@ -0,0 +1,181 @@
+"""
+Delta sync protocol tests (GET /api/sync/{collection})
+Runs the app in-process against mongomock: full reset, deltas, tombstones,
+paging, the purge horizon, and writes landing out of revision order
+"""
+import time
+from datetime import datetime, timedelta, timezone
+
+from inprocess import run, server
+
+COURSE_ID = "c0a80101-0000-4000-8000-000000000001"
+
+
+def faq(question, order=0):
+    text = {"en": question, "az": question, "ru": question}
+    return {"course_id": COURSE_ID, "question": text, "answer": text, "order": order}
+
+
+async def sync(client, headers, collection="faqs", **params):
+    response = await client.get(f"/api/sync/{collection}", params=params, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+class TestDeltaSync:
+    """Reset, delta and deletion handling"""
+
+    def test_reset_returns_whole_collection(self):
+        async def scenario(client, headers):
+            data = await sync(client, headers)
+            assert data["reset"] is True
+            assert data["key"] == "id"
+            assert len(data["changed"]) == await server.db.faqs.count_documents({})
+            assert all(doc["revision"] <= data["revision"] for doc in data["changed"])
+            again = await sync(client, headers, since=data["revision"])
+            assert again["reset"] is False
+            assert again["changed"] == [] and again["deleted"] == []
+            assert again["revision"] == data["revision"]
+        run(scenario)
+
+    def test_delta_carries_changes_and_tombstones(self):
+        async def scenario(client, headers):
+            cursor = (await sync(client, headers))["revision"]
+            created = (await client.post("/api/faqs", json=faq("new"), headers=headers)).json()
+            kept = (await client.post("/api/faqs", json=faq("kept"), headers=headers)).json()
+            await client.put(f"/api/faqs/{kept['id']}", json=faq("edited"), headers=headers)
+            assert (await client.delete(f"/api/faqs/{created['id']}", headers=headers)).status_code == 200
+
+            data = await sync(client, headers, since=cursor)
+            assert data["reset"] is False
+            assert [doc["id"] for doc in data["changed"]] == [kept["id"]]
+            assert data["changed"][0]["question"]["en"] == "edited"
+            assert data["deleted"] == [created["id"]]
+            assert data["revision"] > cursor
+        run(scenario)
+
+    def test_paging_with_has_more(self):
+        async def scenario(client, headers):
+            cursor = (await sync(client, headers))["revision"]
+            ids = []
+            for i in range(5):
+                ids.append((await client.post("/api/faqs", json=faq(f"q{i}", i), headers=headers)).json()["id"])
+            await client.delete(f"/api/faqs/{ids[0]}", headers=headers)
+
+            changed, deleted, pages = [], [], 0
+            while True:
+                data = await sync(client, headers, since=cursor, limit=2)
+                changed += [doc["id"] for doc in data["changed"]]
+                deleted += data["deleted"]
+                cursor = data["revision"]
+                pages += 1
+                if not data["has_more"]:
+                    break
+            assert pages == 3
+            assert changed == ids[1:]
+            assert deleted == [ids[0]]
+        run(scenario)
+
+    def test_cascade_delete_is_never_split_across_pages(self):
+        async def scenario(client, headers):
+            ids = [(await client.post("/api/faqs", json=faq(f"q{i}", i), headers=headers)).json()["id"] for i in range(3)]
+            cursor = (await sync(client, headers))["revision"]
+            assert await server.delete_content("faqs", {"course_id": COURSE_ID}) >= 3
+
+            data = await sync(client, headers, since=cursor, limit=2)
+            assert set(ids) <= set(data["deleted"])
+            data = await sync(client, headers, since=data["revision"], limit=2)
+            assert data["deleted"] == [] and data["has_more"] is False
+        run(scenario)
+
+    def test_interrupted_delete_is_finished(self):
+        async def scenario(client, headers):
+            item = (await client.post("/api/faqs", json=faq("doomed"), headers=headers)).json()
+            cursor = (await sync(client, headers))["revision"]
+            try:
+                async with server.revision_lease("faqs") as revision:
+                    await server.db.faqs.update_one(
+                        {"id": item["id"]}, {"$set": {"deleted_at": datetime.now(timezone.utc), "revision": revision}}
+                    )
+                    raise RuntimeError("died before the tombstone was written")
+            except RuntimeError:
+                pass
+
+            assert item["id"] not in [doc["id"] for doc in (await sync(client, headers))["changed"]]
+            assert (await sync(client, headers, since=cursor))["deleted"] == [item["id"]]
+            await server.finish_deletions()
+            assert await server.db.faqs.find_one({"id": item["id"]}) is None
+            assert await server.db[server.SYNC_TOMBSTONES].find_one({"collection": "faqs", "key": item["id"]})
+            assert (await sync(client, headers, since=cursor))["deleted"] == [item["id"]]
+        run(scenario)
+
+    def test_cursor_below_horizon_gets_reset(self):
+        async def scenario(client, headers):
+            cursor = (await sync(client, headers))["revision"]
+            item = (await client.post("/api/faqs", json=faq("gone"), headers=headers)).json()
+            await client.delete(f"/api/faqs/{item['id']}", headers=headers)
+            expired = datetime.now(timezone.utc) - timedelta(days=server.AppSettings().sync_tombstone_days + 1)
+            await server.db[server.SYNC_TOMBSTONES].update_many({}, {"$set": {"deleted_at": expired}})
+            assert await server.purge_sync_tombstones(server.AppSettings()) >= 1
+
+            data = await sync(client, headers, since=cursor)
+            assert data["reset"] is True
+            assert item["id"] not in [doc["id"] for doc in data["changed"]]
+            assert (await sync(client, headers, since=data["revision"]))["reset"] is False
+        run(scenario)
+
+    def test_unknown_collection_and_auth(self):
+        async def scenario(client, headers):
+            assert (await client.get("/api/sync/users", headers=headers)).status_code == 404
+            assert (await client.get("/api/sync/faqs")).status_code in (401, 403)
+        run(scenario)
+
+
+class TestOutOfOrderWrites:
+    """A revision reserved earlier but written later must still reach every client"""
+
+    def test_cursor_waits_for_write_in_flight(self):
+        async def scenario(client, headers):
+            cursor = (await sync(client, headers))["revision"]
+            async with server.revision_lease("faqs") as slow_revision:
+                # A later reservation lands first
+                fast = (await client.post("/api/faqs", json=faq("fast"), headers=headers)).json()
+                data = await sync(client, headers, since=cursor)
+                assert data["revision"] == slow_revision - 1
+                assert data["changed"] == []
+                reset = await sync(client, headers)
+                assert reset["revision"] == slow_revision - 1
+                await server.db.faqs.insert_one({"id": "slow", **faq("slow"), "revision": slow_revision})
+
+            data = await sync(client, headers, since=cursor)
+            assert [doc["id"] for doc in data["changed"]] == ["slow", fast["id"]]
+            data = await sync(client, headers, since=reset["revision"])
+            assert [doc["id"] for doc in data["changed"]] == ["slow", fast["id"]]
+        run(scenario)
+
+    def test_abandoned_reservation_is_skipped(self):
+        async def scenario(client, headers):
+            cursor = (await sync(client, headers))["revision"]
+            lease = await server.reserve_revisions("faqs", 1)
+            await server.db[server.SYNC_REVISIONS].update_one(
+                {"_id": "faqs", "pending.token": lease.token},
+                {"$set": {"pending.$.at": time.time() - server.SYNC_LEASE_SECONDS - 1}}
+            )
+            fast = (await client.post("/api/faqs", json=faq("fast"), headers=headers)).json()
+            data = await sync(client, headers, since=cursor)
+            assert [doc["id"] for doc in data["changed"]] == [fast["id"]]
+
+            await server.expire_revision_leases()
+            counter = await server.db[server.SYNC_REVISIONS].find_one({"_id": "faqs"})
+            assert counter["pending"] == []
+        run(scenario)
+
+    def test_releases_reach_the_counter(self):
+        async def scenario(client, headers):
+            created = (await client.post("/api/faqs", json=faq("released"), headers=headers)).json()
+            await server.revision_release_task
+            stored = await server.db.faqs.find_one({"id": created["id"]})
+            counter = await server.db[server.SYNC_REVISIONS].find_one({"_id": "faqs"})
+            assert counter["pending"] == []
+            assert counter["landed"] == stored["revision"]
+        run(scenario)
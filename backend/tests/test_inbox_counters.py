@@ -0,0 +1,69 @@
+"""
+Inbox counters behind the admin unread badges (inbox_counters)
+Runs the app in-process against mongomock: after every create, read and delete
+the $inc-maintained counters must equal a full recount by reconcile_inbox_counters()
+"""
+from inprocess import run, server
+
+CONTACT = {"name": "Aysel", "email": "aysel@example.com", "message": "Hello"}
+APPLICATION = {"name": "Murad", "email": "murad@example.com", "phone": "+994501234567",
+               "course_id": "c1", "course_name": "Python"}
+
+
+async def counters():
+    """Counter documents by id, leaving out the ones the $incs brought back to zero"""
+    docs = await server.db[server.INBOX_COUNTERS].find().to_list(None)
+    return {doc.pop("_id"): doc for doc in docs if doc.get("total") or doc.get("unread")}
+
+
+async def assert_agrees_with_recount():
+    before = await counters()
+    assert await server.reconcile_inbox_counters() == 0
+    assert await counters() == before
+
+
+def test_counters_agree_with_recount():
+    async def scenario(client, headers):
+        await server.reconcile_inbox_counters()  # start from the seeded data
+        ids = []
+        for path, body in (("contact", CONTACT), ("contact", CONTACT), ("application", APPLICATION)):
+            response = await client.post(f"/api/submissions/{path}", json=body)
+            assert response.status_code == 200, response.text
+            ids.append(response.json()["id"])
+            await assert_agrees_with_recount()
+        trials = []
+        for course in ("Python", "Python", "Design"):
+            trial = {"full_name": "Leyla", "contact": "+994501234567", "course": course}
+            response = await client.post("/api/trial-lessons", json=trial)
+            assert response.status_code == 200, response.text
+            trials.append(response.json()["id"])
+            await assert_agrees_with_recount()
+
+        # Reading twice only counts once
+        for item_id in (ids[0], ids[0], ids[2]):
+            assert (await client.put(f"/api/submissions/{item_id}/read", headers=headers)).status_code == 200
+            await assert_agrees_with_recount()
+        # A read and an unread submission, then the last of its type
+        for item_id in (ids[0], ids[1], ids[2]):
+            assert (await client.delete(f"/api/submissions/{item_id}", headers=headers)).status_code == 200
+            await assert_agrees_with_recount()
+        for item_id in trials:
+            assert (await client.delete(f"/api/trial-lessons/{item_id}", headers=headers)).status_code == 200
+            await assert_agrees_with_recount()
+
+        stats = (await client.get("/api/submissions/stats", headers=headers)).json()
+        assert stats["unread"] == sum(c["unread"] for c in (await counters()).values() if c["kind"] == "submission")
+
+    run(scenario)
+
+
+def test_reconcile_repairs_drift():
+    async def scenario(client, headers):
+        await server.reconcile_inbox_counters()
+        await server.db[server.INBOX_COUNTERS].update_one(
+            {"_id": "submission|contact"}, {"$inc": {"unread": 5}, "$setOnInsert": {"kind": "submission", "key": "contact"}},
+            upsert=True
+        )
+        assert await server.reconcile_inbox_counters() == 1
+        await assert_agrees_with_recount()
+    run(scenario)
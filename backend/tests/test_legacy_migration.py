@@ -0,0 +1,103 @@
+"""
+Legacy analytics migration (migrate_legacy_analytics)
+Runs in-process against mongomock: the migration is run to completion, run again,
+and interrupted at each of its writes, and every legacy pageview must end up
+counted exactly once, either as a raw event or in the hourly rollups
+"""
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from inprocess import run, server
+
+RETENTION_DAYS = 30
+INTERRUPTIONS = [  # (collection, method) whose first call fails
+    (server.ANALYTICS_STATE, "insert_one"),
+    (server.ANALYTICS_EVENTS, "insert_many"),
+    (server.ANALYTICS_ROLLUPS, "bulk_write"),
+    (server.ANALYTICS_LEGACY, "delete_many"),
+    (server.ANALYTICS_STATE, "delete_one"),
+    (server.ANALYTICS_ROLLUPS, "update_many"),
+]
+
+
+async def seed_legacy(count=14):
+    """Legacy pageviews (UUID _id, ISO string timestamp), half of them past the retention window"""
+    now = server.hour_floor(datetime.now(timezone.utc))
+    docs = []
+    for i in range(count):
+        age = timedelta(days=RETENTION_DAYS + 2, hours=i) if i % 2 else timedelta(hours=i + 1)
+        docs.append({
+            "_id": str(uuid.uuid4()),
+            "timestamp": (now - age).isoformat(),
+            "page_path": f"/page-{i % 3}",
+            "device_type": "desktop",
+            "country": "AZ",
+            "session_id": f"s{i}",
+        })
+    await server.db[server.ANALYTICS_LEGACY].insert_many(docs)
+    return docs
+
+
+async def migrate_all(settings):
+    while await server.migrate_legacy_analytics(settings):
+        pass
+
+
+async def assert_each_counted_once(legacy):
+    """Raw events are unique and recent; rolled up, every legacy pageview counts once"""
+    events = await server.db[server.ANALYTICS_EVENTS].find({}, {"_id": 1}).to_list(None)
+    ids = [event["_id"] for event in events]
+    assert len(ids) == len(set(ids))
+    assert set(ids) == {doc["_id"] for i, doc in enumerate(legacy) if i % 2 == 0}
+
+    await server.downsample_analytics()
+    rollups = await server.db[server.ANALYTICS_ROLLUPS].find({"granularity": "hour"}).to_list(None)
+    assert sum(rollup["views"] for rollup in rollups) == len(legacy)
+    assert not any(rollup.get("legacy_batches") for rollup in rollups)
+    assert await server.db[server.ANALYTICS_LEGACY].count_documents({}) == 0
+    assert await server.db[server.ANALYTICS_STATE].find_one({"_id": server.LEGACY_MIGRATION_JOURNAL}) is None
+
+
+@pytest.fixture
+def small_batches(monkeypatch):
+    monkeypatch.setattr(server, "LEGACY_MIGRATION_BATCH", 4)
+
+
+def test_rerun_after_completion_changes_nothing(small_batches):
+    async def scenario(client, headers):
+        settings = server.AppSettings(analytics_retention_days=RETENTION_DAYS)
+        legacy = await seed_legacy()
+        await migrate_all(settings)
+        assert await server.migrate_legacy_analytics(settings) == 0
+        await assert_each_counted_once(legacy)
+    run(scenario)
+
+
+@pytest.mark.parametrize("collection,method", INTERRUPTIONS)
+def test_interrupted_batch_is_resumed_without_loss_or_duplicates(small_batches, monkeypatch, collection, method):
+    async def scenario(client, headers):
+        settings = server.AppSettings(analytics_retention_days=RETENTION_DAYS)
+        legacy = await seed_legacy()
+        await server.migrate_legacy_analytics(settings)  # one batch in before the crash
+
+        cls = type(server.db[collection])
+        original = getattr(cls, method)
+        failed = []
+
+        async def crash_once(self, *args, **kwargs):
+            if self.name == collection and not failed:
+                failed.append(method)
+                raise RuntimeError("worker killed")
+            return await original(self, *args, **kwargs)
+
+        monkeypatch.setattr(cls, method, crash_once)
+        with pytest.raises(RuntimeError):
+            await migrate_all(settings)
+        monkeypatch.setattr(cls, method, original)
+
+        await migrate_all(settings)
+        await migrate_all(settings)
+        await assert_each_counted_once(legacy)
+    run(scenario)
@@ -0,0 +1,79 @@
+"""
+User-Agent classification behind the analytics breakdowns (classify_user_agent)
+Table-driven over real browser, OS and bot strings, plus the pageview endpoint
+run in-process for requests with and without a User-Agent
+"""
+import pytest
+
+from inprocess import run, server
+
+CHROME_WINDOWS = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                  "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36")
+
+BROWSERS = [
+    (CHROME_WINDOWS, "desktop", "Chrome", "Windows"),
+    ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+     "Chrome/124.0.0.0 Safari/537.36 Edg/124.0.2478.51", "desktop", "Edge", "Windows"),
+    ("Mozilla/5.0 (Macintosh; Intel Mac OS X 14_4) AppleWebKit/605.1.15 (KHTML, like Gecko) "
+     "Version/17.4 Safari/605.1.15", "desktop", "Safari", "macOS"),
+    ("Mozilla/5.0 (X11; Linux x86_64; rv:125.0) Gecko/20100101 Firefox/125.0", "desktop", "Firefox", "Linux"),
+    ("Mozilla/5.0 (X11; CrOS x86_64 14541.0.0) AppleWebKit/537.36 (KHTML, like Gecko) "
+     "Chrome/124.0.0.0 Safari/537.36", "desktop", "Chrome", "ChromeOS"),
+    ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+     "Chrome/124.0.0.0 Safari/537.36 OPR/109.0.0.0", "desktop", "Opera", "Windows"),
+    ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+     "Chrome/122.0.0.0 YaBrowser/24.4.0.0 Safari/537.36", "desktop", "Yandex", "Windows"),
+    ("Mozilla/5.0 (Windows NT 6.1; Trident/7.0; rv:11.0) like Gecko", "desktop", "Internet Explorer", "Windows"),
+    ("Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) "
+     "Version/17.4 Mobile/15E148 Safari/604.1", "mobile", "Safari", "iOS"),
+    ("Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) "
+     "CriOS/124.0.6367.88 Mobile/15E148 Safari/604.1", "mobile", "Chrome", "iOS"),
+    ("Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 (KHTML, like Gecko) "
+     "Chrome/124.0.0.0 Mobile Safari/537.36", "mobile", "Chrome", "Android"),
+    ("Mozilla/5.0 (Linux; Android 14; SM-S918B) AppleWebKit/537.36 (KHTML, like Gecko) "
+     "SamsungBrowser/24.0 Chrome/117.0.0.0 Mobile Safari/537.36", "mobile", "Samsung Internet", "Android"),
+    ("Mozilla/5.0 (iPad; CPU OS 17_4 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) "
+     "Version/17.4 Mobile/15E148 Safari/604.1", "tablet", "Safari", "iOS"),
+    ("Mozilla/5.0 (Linux; Android 13; SM-X710) AppleWebKit/537.36 (KHTML, like Gecko) "
+     "Chrome/124.0.0.0 Safari/537.36", "tablet", "Chrome", "Android"),
+    ("SomeNewBrowser/1.0", "desktop", "Other", "Other"),
+]
+
+BOTS = [
+    "Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)",
+    "Mozilla/5.0 (compatible; bingbot/2.0; +http://www.bing.com/bingbot.htm)",
+    "Mozilla/5.0 (compatible; YandexBot/3.0; +http://yandex.com/bots)",
+    "facebookexternalhit/1.1 (+http://www.facebook.com/externalhit_uatext.php)",
+    "WhatsApp/2.23.20.0",
+    "TelegramBot (like TwitterBot)",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) HeadlessChrome/124.0.0.0 Safari/537.36",
+    "curl/8.5.0",
+    "python-requests/2.31.0",
+    "Wget/1.21.4",
+]
+
+
+@pytest.mark.parametrize("user_agent,device,browser,os_name", BROWSERS)
+def test_browsers(user_agent, device, browser, os_name):
+    assert server.classify_user_agent(user_agent) == server.UserAgentInfo(device, browser, os_name, False)
+
+
+@pytest.mark.parametrize("user_agent", BOTS)
+def test_bots(user_agent):
+    assert server.classify_user_agent(user_agent).is_bot
+
+
+def test_missing_user_agent_is_unknown_not_bot():
+    assert server.classify_user_agent("") == server.UserAgentInfo("unknown", "Other", "Other", False)
+
+
+def test_pageview_without_user_agent_is_tracked():
+    async def scenario(client, headers):
+        pageview = {"page_path": "/courses", "page_title": "Courses"}
+        tracked = await client.post("/api/analytics/pageview", json=pageview, headers={"user-agent": ""})
+        assert tracked.json() == {"message": "Tracked"}
+        bot = await client.post("/api/analytics/pageview", json=pageview, headers={"user-agent": BOTS[0]})
+        assert bot.json() == {"message": "Ignored"}
+        events = await server.db[server.ANALYTICS_EVENTS].find({}).to_list(None)
+        assert [event["meta"]["device_type"] for event in events] == ["unknown"]
+    run(scenario)
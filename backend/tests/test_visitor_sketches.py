@@ -0,0 +1,104 @@
+"""
+HyperLogLog visitor sketches (HyperLogLog, merge_sketch_doc, flush_visitor_sketches)
+Estimates against known cardinalities, merge as set union, and concurrent flushes
+into one stored sketch, run in-process against mongomock
+"""
+import asyncio
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from inprocess import run, server
+
+DAY = datetime(2024, 5, 1, tzinfo=timezone.utc)
+# Four standard errors (1.04 / sqrt(m)); a correct sketch stays inside it essentially always
+TOLERANCE = 4 * 1.04 / np.sqrt(1 << server.HLL_PRECISION)
+
+
+def sketch(values) -> server.HyperLogLog:
+    hll = server.HyperLogLog()
+    for value in values:
+        hll.add(f"visitor-{value}")
+    return hll
+
+
+@pytest.mark.parametrize("n", [10, 1000, 20000, 100000])
+def test_estimate_within_error_bounds(n):
+    assert abs(sketch(range(n)).count() - n) <= max(1, n * TOLERANCE)
+
+
+def test_repeated_values_count_once():
+    hll = sketch(range(500))
+    before = hll.registers.copy()
+    for _ in range(3):
+        for value in range(500):
+            hll.add(f"visitor-{value}")
+    assert np.array_equal(hll.registers, before)
+
+
+def test_merge_equals_sketch_of_union():
+    merged = sketch(range(0, 6000)).merge(sketch(range(4000, 10000)))
+    assert np.array_equal(merged.registers, sketch(range(10000)).registers)
+    assert abs(merged.count() - 10000) <= 10000 * TOLERANCE
+
+
+def test_bytes_round_trip():
+    hll = sketch(range(3000))
+    restored = server.HyperLogLog.from_bytes(hll.to_bytes())
+    assert restored.p == hll.p
+    assert np.array_equal(restored.registers, hll.registers)
+
+
+def test_concurrent_flushes_keep_every_register():
+    async def scenario(client, headers):
+        collection = type(server.db[server.ANALYTICS_SKETCHES])
+        original = collection.find_one
+
+        async def read_then_yield(self, *args, **kwargs):
+            # Let every other flush read the same version before anyone writes
+            doc = await original(self, *args, **kwargs)
+            await asyncio.sleep(0)
+            return doc
+
+        workers = [(sketch(range(i * 1000, (i + 1) * 1000)), sketch(range(i * 10, (i + 1) * 10))) for i in range(8)]
+        pending, rounds = list(workers), 0
+        collection.find_one = read_then_yield
+        try:
+            while pending:
+                # As each worker's flush loop would: a sketch that lost the race is merged again
+                merged = await asyncio.gather(*(server.merge_sketch_doc(DAY, "/", *pair) for pair in pending))
+                pending = [pair for pair, ok in zip(pending, merged) if not ok]
+                rounds += 1
+        finally:
+            collection.find_one = original
+        assert rounds > 1  # the compare-and-swap did lose races
+
+        doc = await server.db[server.ANALYTICS_SKETCHES].find_one({"_id": "2024-05-01|/"})
+        expected_visitors, expected_sessions = sketch(range(8000)), sketch(range(80))
+        assert np.array_equal(server.HyperLogLog.from_bytes(doc["visitors"]).registers, expected_visitors.registers)
+        assert np.array_equal(server.HyperLogLog.from_bytes(doc["sessions"]).registers, expected_sessions.registers)
+    run(scenario)
+
+
+def test_failed_flush_keeps_sketch_for_next_one():
+    async def scenario(client, headers):
+        server.visitor_sketches.add(DAY, "/about", "visitor-1", "session-1")
+        collection = type(server.db[server.ANALYTICS_SKETCHES])
+        original = collection.find_one
+
+        async def unavailable(self, *args, **kwargs):
+            raise RuntimeError("primary stepped down")
+
+        collection.find_one = unavailable
+        try:
+            await server.flush_visitor_sketches()
+        finally:
+            collection.find_one = original
+        assert (DAY, "/about") in server.visitor_sketches.pending
+
+        await server.flush_visitor_sketches()
+        assert server.visitor_sketches.pending == {}
+        doc = await server.db[server.ANALYTICS_SKETCHES].find_one({"_id": "2024-05-01|/about"})
+        assert server.HyperLogLog.from_bytes(doc["visitors"]).count() == 1
+    run(scenario)
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Build the GeoIP country table the backend memory-maps at startup.
+
+Reads an IPv4 range CSV whose first three columns are range start, range end and
+ISO country code. Addresses may be dotted quads (DB-IP "IP to Country Lite") or
+integers (IP2Location LITE DB1). IPv6 rows are skipped. Adjacent ranges with the
+same country are merged, and the result is written as a (3, n) uint32 .npy array:
+starts, ends and packed two-letter codes.
+
+Examples:
+    python backend/tools/build_geoip.py dbip-country-lite.csv
+    python backend/tools/build_geoip.py IP2LOCATION-LITE-DB1.CSV --output /srv/geoip-country.npy
+    python backend/tools/build_geoip.py --lookup 8.8.8.8
+"""
+import argparse
+import csv
+import gzip
+import ipaddress
+import sys
+from pathlib import Path
+
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_OUTPUT = BACKEND_DIR / "data" / "geoip-country.npy"
+UNKNOWN_CODES = {"", "-", "ZZ"}
+
+
+def parse_address(value: str):
+    value = value.strip()
+    if value.isdigit():
+        number = int(value)
+        return number if number <= 0xFFFFFFFF else None
+    try:
+        return int(ipaddress.IPv4Address(value))
+    except ValueError:
+        return None  # IPv6
+
+
+def read_ranges(path: Path):
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rt", newline="", encoding="utf-8") as handle:
+        for row in csv.reader(handle):
+            if len(row) < 3:
+                continue
+            start, end = parse_address(row[0]), parse_address(row[1])
+            code = row[2].strip().upper()
+            if start is None or end is None or code in UNKNOWN_CODES or len(code) != 2:
+                continue
+            yield start, end, code
+
+
+def build_table(ranges) -> np.ndarray:
+    ranges = sorted(ranges)
+    merged = []
+    for start, end, code in ranges:
+        if merged and merged[-1][2] == code and merged[-1][1] + 1 >= start:
+            merged[-1][1] = max(merged[-1][1], end)
+        elif merged and start <= merged[-1][1]:
+            raise ValueError(f"Overlapping ranges at {ipaddress.IPv4Address(start)}")
+        else:
+            merged.append([start, end, code])
+    table = np.empty((3, len(merged)), dtype=np.uint32)
+    for i, (start, end, code) in enumerate(merged):
+        table[0, i] = start
+        table[1, i] = end
+        table[2, i] = (ord(code[0]) << 8) | ord(code[1])
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the GeoIP country range table")
+    parser.add_argument("source", nargs="?", type=Path, help="IPv4 range CSV (optionally .gz)")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument("--lookup", nargs="*", default=[], help="Resolve these IPs against --output and exit")
+    args = parser.parse_args()
+
+    if args.source:
+        table = build_table(read_ranges(args.source))
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        np.save(args.output, table)
+        print(f"Wrote {table.shape[1]} ranges ({table.nbytes / 1e6:.1f} MB) to {args.output}")
+    elif not args.lookup:
+        parser.error("a source CSV or --lookup is required")
+
+    if args.lookup:
+        sys.path.insert(0, str(BACKEND_DIR))
+        from server import GeoIPTable  # noqa: E402
+        geoip = GeoIPTable.load(args.output)
+        for ip in args.lookup:
+            print(f"{ip}\t{geoip.lookup(ip) or 'Unknown'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Export raw analytics events to day-partitioned Parquet files.
+
+Streams events newer than the saved export position into
+<output>/day=YYYY-MM-DD/part-<start>.parquet (the same files the admin
+"POST /api/analytics/export" job writes) and records the new position, so
+repeated runs, e.g. from cron, only export what is new. Reads MONGO_URL / DB_NAME
+and the other settings from the environment or backend/.env.
+
+Examples:
+    python backend/tools/export_analytics.py
+    python backend/tools/export_analytics.py --output /srv/exports/analytics
+    python backend/tools/export_analytics.py --restart   # re-export everything still retained
+"""
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+import server  # noqa: E402
+
+
+async def run(args) -> dict:
+    settings = server.AppSettings.from_env()
+    if args.output:
+        settings = settings.model_copy(update={"analytics_export_dir": str(args.output)})
+    client = server.build_mongo_client(settings)
+    server.db = client[settings.db_name]
+    try:
+        if args.restart:
+            await server.db[server.ANALYTICS_STATE].delete_one({"_id": server.EXPORT_STATE_ID})
+            for path in server.analytics_export_dir(settings).glob("day=*/part-*.parquet"):
+                path.unlink()
+        summary = await server.export_analytics(settings)
+    finally:
+        client.close()
+    summary["exported_until"] = summary["exported_until"].isoformat()
+    summary["output"] = str(server.analytics_export_dir(settings))
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export analytics events to Parquet")
+    parser.add_argument("--output", type=Path, help="Export directory (default ANALYTICS_EXPORT_DIR or backend/exports/analytics)")
+    parser.add_argument("--restart", action="store_true", help="Delete existing export files and start again from the oldest event")
+    args = parser.parse_args()
+    try:
+        summary = asyncio.run(run(args))
+    except RuntimeError as e:
+        sys.exit(str(e))
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef, useCallback } from 'react';
 import { Outlet, Link, useLocation, useNavigate } from 'react-router-dom';
 import {
   LayoutDashboard,
@@ -19,6 +19,16 @@ import {
   Award
 } from 'lucide-react';
 import { Button } from '../components/ui/button';
+import axios from 'axios';
+
+const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
+const ADMIN_EVENT_TYPES = [
+  'submission', 'submission_read', 'submission_deleted',
+  'trial_lesson', 'trial_lesson_deleted', 'trial_lessons_cleared',
+  'visitors', 'resync'
+];
+const INBOX_EVENT_TYPES = ['submission', 'submission_read', 'submission_deleted', 'resync'];
+const ADMIN_EVENT_RETRY_MS = 5000; // matches the retry: the server sends
 
 const menuItems = [
   { path: '/nova-admin/dashboard', icon: LayoutDashboard, label: 'Dashboard' },
@@ -29,7 +39,7 @@ const menuItems = [
   { path: '/nova-admin/teachers', icon: Users, label: 'Teachers' },
   { path: '/nova-admin/vacancies', icon: Briefcase, label: 'Vacancies' },
   { path: '/nova-admin/internships', icon: Award, label: 'Internships' },
-  { path: '/nova-admin/submissions', icon: Inbox, label: 'Submissions' },
+  { path: '/nova-admin/submissions', icon: Inbox, label: 'Submissions', badge: 'unread' },
   { path: '/nova-admin/trial-lessons', icon: GraduationCap, label: 'Trial Lessons' },
   { path: '/nova-admin/settings', icon: Settings, label: 'Site Settings' },
 ];
@@ -39,6 +49,17 @@ export function AdminLayout() {
   const navigate = useNavigate();
   const [sidebarOpen, setSidebarOpen] = useState(false);
   const [user, setUser] = useState(null);
+  const [inboxStats, setInboxStats] = useState(null);
+  const [bootstrap, setBootstrap] = useState(null);
+  const [liveVisitors, setLiveVisitors] = useState(null);
+  const eventListeners = useRef(new Set());
+  const bootstrapRequest = useRef(null);
+
+  // Pages register here for live admin events; the returned function unsubscribes
+  const subscribeEvents = useCallback((listener) => {
+    eventListeners.current.add(listener);
+    return () => eventListeners.current.delete(listener);
+  }, []);
 
   useEffect(() => {
     const token = localStorage.getItem('novatech-token');
@@ -54,6 +75,93 @@ export function AdminLayout() {
     }
   }, [navigate]);
 
+  // One request for the principal, role flags, analytics, inbox, counts and settings;
+  // pages read it through useOutletContext() instead of fetching each piece. Pages
+  // showing data that changes while the admin is open (analytics, settings) call
+  // refreshBootstrap() on mount; a request already in flight is shared, so the
+  // page opened first does not fetch twice.
+  const refreshBootstrap = useCallback(() => {
+    const token = localStorage.getItem('novatech-token');
+    if (!token) return Promise.resolve(null);
+    if (!bootstrapRequest.current) {
+      bootstrapRequest.current = axios.get(`${API}/admin/bootstrap`, { headers: { Authorization: `Bearer ${token}` } })
+        .then(res => {
+          setBootstrap(res.data);
+          setUser(res.data.user);
+          setInboxStats(res.data.inbox);
+          return res.data;
+        })
+        .catch(() => null)
+        .finally(() => { bootstrapRequest.current = null; });
+    }
+    return bootstrapRequest.current;
+  }, []);
+
+  useEffect(() => {
+    refreshBootstrap();
+  }, [refreshBootstrap]);
+
+  // One idle Server-Sent Events connection instead of polling: the unread badge is
+  // refreshed from /submissions/stats (a few counter documents) only when the inbox changes.
+  // EventSource cannot send the JWT, so each connection is opened with a single-use
+  // ticket. When a stream ends (the server caps its lifetime) a new ticket is fetched
+  // and the stream resumes from the last event id it saw; a rejected ticket request
+  // means the session is over and stops the loop.
+  useEffect(() => {
+    const token = localStorage.getItem('novatech-token');
+    if (!token || !window.EventSource) return;
+    const headers = { Authorization: `Bearer ${token}` };
+    let source = null;
+    let retryTimer = null;
+    let stopped = false;
+    let lastEventId = '';
+    const fetchInboxStats = () => {
+      axios.get(`${API}/submissions/stats`, { headers })
+        .then(res => setInboxStats(res.data))
+        .catch(() => {});
+    };
+    const reconnectLater = () => {
+      if (!stopped) retryTimer = setTimeout(connect, ADMIN_EVENT_RETRY_MS);
+    };
+    const connect = async () => {
+      let ticket;
+      try {
+        ticket = (await axios.post(`${API}/admin/events/ticket`, null, { headers })).data.ticket;
+      } catch (error) {
+        if (error.response?.status !== 401) reconnectLater();
+        return;
+      }
+      if (stopped) return;
+      const params = new URLSearchParams({ ticket });
+      if (lastEventId) params.set('last_event_id', lastEventId);
+      source = new EventSource(`${API}/admin/events?${params}`);
+      ADMIN_EVENT_TYPES.forEach(type => {
+        source.addEventListener(type, (event) => {
+          if (event.lastEventId) lastEventId = event.lastEventId;
+          const data = event.data ? JSON.parse(event.data) : {};
+          if (type === 'visitors') setLiveVisitors(data.count);
+          if (INBOX_EVENT_TYPES.includes(type)) fetchInboxStats();
+          eventListeners.current.forEach(listener => listener(type, data));
+        });
+      });
+      source.addEventListener('expired', () => {
+        stopped = true;
+        source.close();
+      });
+      // The ticket is spent, so EventSource's own reconnect would be refused
+      source.onerror = () => {
+        source.close();
+        reconnectLater();
+      };
+    };
+    connect();
+    return () => {
+      stopped = true;
+      clearTimeout(retryTimer);
+      if (source) source.close();
+    };
+  }, []);
+
   const handleLogout = () => {
     localStorage.removeItem('novatech-token');
     localStorage.removeItem('novatech-user');
@@ -111,6 +219,11 @@ export function AdminLayout() {
               >
                 <item.icon className="w-5 h-5" />
                 {item.label}
+                {item.badge && inboxStats?.[item.badge] > 0 && (
+                  <span className="ml-auto min-w-[1.25rem] rounded-full bg-[#5B5BF7] px-1.5 py-0.5 text-center text-xs font-semibold text-white">
+                    {inboxStats[item.badge]}
+                  </span>
+                )}
               </Link>
             ))}
           </nav>
@@ -159,15 +272,23 @@ export function AdminLayout() {
               </span>
             </div>
 
-            <Link to="/" className="text-sm text-[#5B5BF7] hover:underline">
-              View Website →
-            </Link>
+            <div className="flex items-center gap-4">
+              {liveVisitors !== null && (
+                <span className="flex items-center gap-2 text-sm text-slate-600" data-testid="admin-live-visitors">
+                  <span className="w-2 h-2 rounded-full bg-emerald-500" />
+                  {liveVisitors} online
+                </span>
+              )}
+              <Link to="/" className="text-sm text-[#5B5BF7] hover:underline">
+                View Website →
+              </Link>
+            </div>
           </div>
         </header>
 
         {/* Page Content */}
         <main className="p-6">
-          <Outlet />
+          <Outlet context={{ bootstrap, refreshBootstrap, subscribeEvents }} />
         </main>
       </div>
     </div>
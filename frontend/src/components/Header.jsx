@@ -2,6 +2,7 @@ import React, { useState, useEffect } from 'react';
 import { Link, useLocation } from 'react-router-dom';
 import { useLanguage } from '../lib/LanguageContext';
 import { useTheme } from '../lib/ThemeContext';
+import { trackCtaClick } from '../lib/analytics';
 import { Menu, X, ChevronDown, Globe, Sun, Moon } from 'lucide-react';
 import { Button } from '../components/ui/button';
 import {
@@ -210,7 +211,7 @@ export function Header() {
             </DropdownMenu>
 
             {/* CTA Button */}
-            <Link to="/contact" className="hidden md:block">
+            <Link to="/contact" className="hidden md:block" onClick={() => trackCtaClick('header', '/contact')}>
               <Button 
                 data-testid="header-cta"
                 className="bg-[#5B5BF7] hover:bg-[#4A4AE0] text-white rounded-full px-6 shadow-lg shadow-blue-500/20"
@@ -1,6 +1,7 @@
 import React, { useState, useEffect, useCallback, useRef } from 'react';
 import { Link } from 'react-router-dom';
 import { useLanguage } from '../lib/LanguageContext';
+import { trackCtaClick } from '../lib/analytics';
 import { Button } from './ui/button';
 import { ChevronLeft, ChevronRight, ArrowRight } from 'lucide-react';
 import { motion, AnimatePresence } from 'framer-motion';
@@ -205,6 +206,7 @@ export function HeroCarousel({ slides, settings }) {
                   href={getCtaLink(staticSlide.cta_link)} 
                   target="_blank" 
                   rel="noopener noreferrer"
+                  onClick={() => trackCtaClick('hero', staticSlide.cta_link)}
                   data-testid="hero-cta"
                 >
                   <Button
@@ -216,7 +218,11 @@ export function HeroCarousel({ slides, settings }) {
                   </Button>
                 </a>
               ) : (
-                <Link to={getCtaLink(staticSlide.cta_link)} data-testid="hero-cta">
+                <Link
+                  to={getCtaLink(staticSlide.cta_link)}
+                  onClick={() => trackCtaClick('hero', staticSlide.cta_link)}
+                  data-testid="hero-cta"
+                >
                   <Button
                     size="lg"
                     className="bg-[#5B5BF7] hover:bg-[#4A4AE0] text-white rounded-full px-8 md:px-10 py-6 md:py-7 text-base md:text-lg font-semibold shadow-2xl shadow-blue-500/30 hover:-translate-y-1 hover:shadow-blue-500/40 transition-all duration-300"
@@ -4,8 +4,11 @@ import { Header } from './Header';
 import { Footer } from './Footer';
 import { WhatsAppButton } from './WhatsAppButton';
 import { CookieConsent } from './CookieConsent';
+import { useSessionHeartbeat } from '../lib/analytics';
 
 export function PublicLayout() {
+  useSessionHeartbeat();
+
   return (
     <div className="min-h-screen flex flex-col bg-white">
       <Header />
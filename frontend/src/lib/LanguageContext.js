@@ -4,10 +4,14 @@ import { translations, getLocalizedContent } from './translations';
 const LanguageContext = createContext();
 
 const STORAGE_KEY = 'novatech-lang-pref';
+const LANGUAGES = ['en', 'az', 'ru'];
 
 export function LanguageProvider({ children }) {
   const [language, setLanguageState] = useState(() => {
     if (typeof window !== 'undefined') {
+      // ?lang= comes from the hreflang alternates in the sitemap and feeds
+      const requested = new URLSearchParams(window.location.search).get('lang');
+      if (LANGUAGES.includes(requested)) return requested;
       return localStorage.getItem(STORAGE_KEY) || 'az';
     }
     return 'az';
@@ -19,7 +23,7 @@ export function LanguageProvider({ children }) {
   }, [language]);
 
   const setLanguage = (lang) => {
-    if (['en', 'az', 'ru'].includes(lang)) {
+    if (LANGUAGES.includes(lang)) {
       setLanguageState(lang);
     }
   };
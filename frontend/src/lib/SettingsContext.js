@@ -1,5 +1,6 @@
 import React, { createContext, useContext, useState, useEffect } from 'react';
 import axios from 'axios';
+import { cachedGet } from './manifest';
 
 const SettingsContext = createContext();
 
@@ -12,8 +13,7 @@ export function SettingsProvider({ children }) {
   useEffect(() => {
     const fetchSettings = async () => {
       try {
-        const res = await axios.get(`${API}/settings`);
-        setSettings(res.data);
+        setSettings(await cachedGet('/settings', ['settings']));
       } catch (error) {
         console.error('Error fetching settings:', error);
         // Set default settings on error
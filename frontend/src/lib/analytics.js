@@ -0,0 +1,93 @@
+import { useEffect } from 'react';
+
+const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
+const BATCH_URL = `${API}/analytics/batch`;
+
+const SESSION_KEY = 'novatech-session';
+const HEARTBEAT_INTERVAL_MS = 30000;
+const FLUSH_INTERVAL_MS = 15000;
+const MAX_BATCH_SIZE = 50; // must not exceed the backend's ANALYTICS_BATCH_MAX_EVENTS
+
+// Events are queued and sent together, so a visit costs a handful of requests
+// instead of one per page view, click and heartbeat
+let queue = [];
+
+// One session per tab; the backend closes it after an idle timeout
+export function getSessionId() {
+  let sessionId = sessionStorage.getItem(SESSION_KEY);
+  if (!sessionId) {
+    sessionId = window.crypto?.randomUUID
+      ? window.crypto.randomUUID()
+      : `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+    sessionStorage.setItem(SESSION_KEY, sessionId);
+  }
+  return sessionId;
+}
+
+function enqueue(event) {
+  queue.push({ ...event, session_id: getSessionId(), queued_at: Date.now() });
+  if (queue.length >= MAX_BATCH_SIZE) {
+    flush();
+  }
+}
+
+export function flush() {
+  if (queue.length === 0) return;
+  const now = Date.now();
+  const events = queue.splice(0, MAX_BATCH_SIZE).map(({ queued_at, ...event }) => ({
+    ...event,
+    age_ms: now - queued_at
+  }));
+  // A string body goes out as text/plain: no CORS preflight, and sendBeacon survives page unload
+  const body = JSON.stringify(events);
+  if (navigator.sendBeacon && navigator.sendBeacon(BATCH_URL, body)) {
+    return;
+  }
+  fetch(BATCH_URL, { method: 'POST', body, keepalive: true, headers: { 'Content-Type': 'text/plain' } })
+    .catch(() => {});
+}
+
+export function trackPageView(pagePath, pageTitle) {
+  enqueue({
+    type: 'pageview',
+    page_path: pagePath,
+    page_title: pageTitle
+  });
+}
+
+export function trackCtaClick(target, link) {
+  enqueue({
+    type: 'cta_click',
+    page_path: window.location.pathname,
+    target,
+    link: link || null
+  });
+}
+
+// Keeps the visitor's session alive while the tab is in view, flushes the queue
+// periodically and reports the page being left
+export function useSessionHeartbeat() {
+  useEffect(() => {
+    const heartbeat = setInterval(() => {
+      if (document.visibilityState === 'visible') {
+        enqueue({ type: 'heartbeat', page_path: window.location.pathname });
+      }
+    }, HEARTBEAT_INTERVAL_MS);
+    const flusher = setInterval(flush, FLUSH_INTERVAL_MS);
+    const handleVisibilityChange = () => {
+      if (document.visibilityState === 'hidden') flush();
+    };
+    const handlePageHide = () => {
+      enqueue({ type: 'heartbeat', page_path: window.location.pathname, leave: true });
+      flush();
+    };
+    document.addEventListener('visibilitychange', handleVisibilityChange);
+    window.addEventListener('pagehide', handlePageHide);
+    return () => {
+      clearInterval(heartbeat);
+      clearInterval(flusher);
+      document.removeEventListener('visibilitychange', handleVisibilityChange);
+      window.removeEventListener('pagehide', handlePageHide);
+    };
+  }, []);
+}
@@ -0,0 +1,45 @@
+import axios from 'axios';
+
+const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
+const CACHE_PREFIX = 'novatech-cache:';
+const MANIFEST_MAX_AGE_MS = 10000; // navigations within this window share one manifest request
+const VERSION_HEADER = 'x-collection-versions';
+
+let manifest = null;
+
+// Versions of the public collections; they change whenever an admin edits one
+export function getManifest() {
+  if (!manifest || Date.now() - manifest.fetchedAt > MANIFEST_MAX_AGE_MS) {
+    const request = axios.get(`${API}/manifest`).then(res => res.data.versions);
+    manifest = { fetchedAt: Date.now(), request };
+    request.catch(() => { manifest = null; });
+  }
+  return manifest.request;
+}
+
+// GET `path` through a localStorage copy that is reused for as long as the
+// collections it is built from keep their manifest versions. `collections` must
+// be the ones the endpoint stamps its versioned responses with.
+export async function cachedGet(path, collections) {
+  const key = CACHE_PREFIX + path;
+  try {
+    const versions = await getManifest();
+    const stamp = collections.map(name => versions[name]).join('.');
+    const cached = JSON.parse(localStorage.getItem(key));
+    if (cached?.stamp === stamp) return cached.data;
+  } catch {
+    // No manifest or an unreadable copy: fall back to a plain request
+  }
+  const res = await axios.get(`${API}${path}`, { params: { versioned: 1 } });
+  // Stored under the versions the server read at, which can trail the manifest
+  // (the copy is refetched next time) but never lead it
+  const stamp = res.headers[VERSION_HEADER];
+  if (stamp) {
+    try {
+      localStorage.setItem(key, JSON.stringify({ stamp, data: res.data }));
+    } catch {
+      // Storage full or disabled; the response is still used
+    }
+  }
+  return res.data;
+}
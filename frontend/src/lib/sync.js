@@ -0,0 +1,37 @@
+import axios from 'axios';
+
+const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
+
+// Local copies of content collections, kept current from /sync/{collection}:
+// the first call loads the whole collection, later calls (e.g. after an edit)
+// only transfer the documents changed and the keys deleted since the last one
+const replicas = {};
+const pending = {};
+
+async function pull(collection) {
+  const token = localStorage.getItem('novatech-token');
+  const headers = { Authorization: `Bearer ${token}` };
+  const replica = replicas[collection] || { revision: null, items: new Map() };
+  let hasMore = true;
+  while (hasMore) {
+    const params = replica.revision === null ? {} : { since: replica.revision };
+    const { data } = await axios.get(`${API}/sync/${collection}`, { headers, params });
+    if (data.reset) replica.items = new Map();
+    data.changed.forEach(doc => replica.items.set(doc[data.key], doc));
+    data.deleted.forEach(key => replica.items.delete(key));
+    replica.revision = data.revision;
+    hasMore = data.has_more;
+  }
+  replicas[collection] = replica;
+  return Array.from(replica.items.values());
+}
+
+// Calls for one collection run one after another, so deltas are applied in order
+export function syncCollection(collection) {
+  const run = () => pull(collection);
+  pending[collection] = (pending[collection] || Promise.resolve()).then(run, run);
+  return pending[collection];
+}
+
+export const byNewest = (a, b) => (b.created_at || '').localeCompare(a.created_at || '');
+export const byOrder = (a, b) => (a.order || 0) - (b.order || 0);
@@ -151,6 +151,7 @@ export const translations = {
       whatYouLearn: "What You Will Learn",
       curriculum: "Curriculum",
       faq: "Frequently Asked Questions",
+      relatedCourses: "Related Courses",
       applyNow: "Apply Now",
       price: "Price"
     },
@@ -378,6 +379,7 @@ export const translations = {
       whatYouLearn: "Nə Öyrənəcəksiniz",
       curriculum: "Kurikulum",
       faq: "Tez-tez Verilən Suallar",
+      relatedCourses: "Oxşar Kurslar",
       applyNow: "Müraciət Et",
       price: "Qiymət"
     },
@@ -605,6 +607,7 @@ export const translations = {
       whatYouLearn: "Чему вы научитесь",
       curriculum: "Программа",
       faq: "Часто задаваемые вопросы",
+      relatedCourses: "Похожие курсы",
       applyNow: "Подать заявку",
       price: "Цена"
     },
@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { useLanguage } from '../lib/LanguageContext';
+import { trackPageView } from '../lib/analytics';
 import { motion } from 'framer-motion';
 import { Target, Eye, BookOpen } from 'lucide-react';
 import axios from 'axios';
@@ -58,11 +59,7 @@ export function AboutPage() {
     fetchTeachers();
 
     // Track page view
-    axios.post(`${API}/analytics/pageview`, {
-      page_path: '/about',
-      page_title: 'About Us',
-      device_type: /Mobile|Android|iPhone/i.test(navigator.userAgent) ? 'mobile' : 'desktop'
-    }).catch(() => {});
+    trackPageView('/about', 'About Us');
   }, []);
 
   const values = [
@@ -11,6 +11,7 @@ import { Tabs, TabsContent, TabsList, TabsTrigger } from '../components/ui/tabs'
 import { Plus, Pencil, Trash2, Search, Eye, EyeOff, Image as ImageIcon, Type, MoveUp, MoveDown, X } from 'lucide-react';
 import { toast } from 'sonner';
 import axios from 'axios';
+import { syncCollection, byNewest } from '../lib/sync';
 import { ImageUploader } from '../components/ImageUploader';
 
 const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
@@ -44,8 +45,7 @@ export function AdminBlogs() {
 
   const fetchBlogs = async () => {
     try {
-      const res = await axios.get(`${API}/blogs?published_only=false`, { headers });
-      setBlogs(res.data);
+      setBlogs((await syncCollection('blogs')).sort(byNewest));
     } catch (error) {
       toast.error('Failed to load blog posts');
     } finally {
@@ -12,6 +12,7 @@ import { Tabs, TabsContent, TabsList, TabsTrigger } from '../components/ui/tabs'
 import { Plus, Pencil, Trash2, Search, MoveUp, MoveDown, X } from 'lucide-react';
 import { toast } from 'sonner';
 import axios from 'axios';
+import { syncCollection } from '../lib/sync';
 import { ImageUploader } from '../components/ImageUploader';
 
 const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
@@ -64,8 +65,7 @@ export function AdminCourses() {
 
   const fetchCourses = async () => {
     try {
-      const res = await axios.get(`${API}/courses?active_only=false`, { headers });
-      setCourses(res.data);
+      setCourses(await syncCollection('courses'));
     } catch (error) {
       toast.error('Failed to load courses');
     } finally {
@@ -23,34 +23,55 @@ import {
   TrendingUp,
   Calendar
 } from 'lucide-react';
+import { useOutletContext } from 'react-router-dom';
 import axios from 'axios';
 
 const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
 
 const COLORS = ['#5B5BF7', '#00C9A7', '#FFC107', '#FF6B6B', '#9B59B6'];
 
+const contentCounts = [
+  { key: 'courses', label: 'Courses' },
+  { key: 'faqs', label: 'FAQs' },
+  { key: 'blogs', label: 'Blog Posts' },
+  { key: 'testimonials', label: 'Testimonials' },
+  { key: 'teachers', label: 'Teachers' },
+  { key: 'slides', label: 'Hero Slides' },
+  { key: 'cta_sections', label: 'CTA Sections' },
+  { key: 'vacancies', label: 'Vacancies' },
+  { key: 'internships', label: 'Internships' }
+];
+
 export function AdminDashboard() {
-  const [analytics, setAnalytics] = useState(null);
-  const [loading, setLoading] = useState(true);
+  // The summary arrives with the admin bootstrap loaded by AdminLayout, refreshed
+  // on every visit so returning to the dashboard does not show the first load's numbers
+  const { bootstrap, refreshBootstrap } = useOutletContext() || {};
+  const analytics = bootstrap?.analytics;
+  const [trend, setTrend] = useState([]);
+
+  useEffect(() => {
+    refreshBootstrap?.();
+  }, [refreshBootstrap]);
 
   useEffect(() => {
-    const fetchAnalytics = async () => {
+    const fetchTrend = async () => {
       try {
         const token = localStorage.getItem('novatech-token');
-        const res = await axios.get(`${API}/analytics/summary`, {
-          headers: { Authorization: `Bearer ${token}` }
-        });
-        setAnalytics(res.data);
+        const headers = { Authorization: `Bearer ${token}` };
+        const trendRes = await axios.get(`${API}/analytics/timeseries?granularity=day`, { headers });
+        const values = trendRes.data.series[0]?.values || [];
+        setTrend(trendRes.data.buckets.map((bucket, i) => ({
+          date: new Date(bucket).toLocaleDateString(undefined, { month: 'short', day: 'numeric' }),
+          visits: values[i] || 0
+        })));
       } catch (error) {
         console.error('Error fetching analytics:', error);
-      } finally {
-        setLoading(false);
       }
     };
-    fetchAnalytics();
+    fetchTrend();
   }, []);
 
-  if (loading) {
+  if (!bootstrap) {
     return (
       <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-4 gap-6">
         {[1, 2, 3, 4].map(i => (
@@ -74,19 +95,35 @@ export function AdminDashboard() {
       }))
     : [];
 
+  // Countries are stored as ISO codes once the GeoIP table is in place
+  const countryName = (code) => {
+    if (!/^[A-Z]{2}$/.test(code)) return code;
+    try {
+      return new Intl.DisplayNames(['en'], { type: 'region' }).of(code);
+    } catch {
+      return code;
+    }
+  };
+
   const countryData = analytics?.country_breakdown 
     ? Object.entries(analytics.country_breakdown)
         .sort((a, b) => b[1] - a[1])
         .slice(0, 5)
-        .map(([name, value]) => ({ name, value }))
+        .map(([code, value]) => ({ name: countryName(code), value }))
     : [];
 
   const topPagesData = analytics?.top_pages?.slice(0, 5) || [];
 
+  const formatDuration = (seconds) => {
+    const total = Math.round(seconds || 0);
+    return total >= 60 ? `${Math.floor(total / 60)}m ${total % 60}s` : `${total}s`;
+  };
+
   const stats = [
     {
       title: 'Total Visits',
       value: analytics?.total_visits || 0,
+      detail: `Avg. time on site ${formatDuration(analytics?.avg_time_on_site)} (median ${formatDuration(analytics?.median_time_on_site)})`,
       icon: Eye,
       color: 'text-[#5B5BF7]',
       bg: 'bg-[#5B5BF7]/10'
@@ -94,6 +131,7 @@ export function AdminDashboard() {
     {
       title: 'Today',
       value: analytics?.visits_today || 0,
+      detail: `${(analytics?.unique_visitors_today || 0).toLocaleString()} unique visitors`,
       icon: Calendar,
       color: 'text-[#00C9A7]',
       bg: 'bg-[#00C9A7]/10'
@@ -101,6 +139,7 @@ export function AdminDashboard() {
     {
       title: 'This Week',
       value: analytics?.visits_this_week || 0,
+      detail: `${(analytics?.unique_visitors_this_week || 0).toLocaleString()} unique visitors`,
       icon: TrendingUp,
       color: 'text-orange-500',
       bg: 'bg-orange-100'
@@ -108,6 +147,7 @@ export function AdminDashboard() {
     {
       title: 'This Month',
       value: analytics?.visits_this_month || 0,
+      detail: `${(analytics?.unique_visitors_this_month || 0).toLocaleString()} unique visitors`,
       icon: Users,
       color: 'text-pink-500',
       bg: 'bg-pink-100'
@@ -132,6 +172,7 @@ export function AdminDashboard() {
                 <div>
                   <p className="text-sm text-slate-500 mb-1">{stat.title}</p>
                   <p className="text-3xl font-bold text-slate-900">{stat.value.toLocaleString()}</p>
+                  {stat.detail && <p className="text-xs text-slate-500 mt-1">{stat.detail}</p>}
                 </div>
                 <div className={`w-12 h-12 rounded-xl ${stat.bg} flex items-center justify-center`}>
                   <stat.icon className={`w-6 h-6 ${stat.color}`} />
@@ -142,6 +183,47 @@ export function AdminDashboard() {
         ))}
       </div>
 
+      {/* Content Counts */}
+      <Card className="border border-slate-100 shadow-sm">
+        <CardContent className="pt-6">
+          <div className="grid grid-cols-3 md:grid-cols-5 lg:grid-cols-9 gap-4">
+            {contentCounts.map(item => (
+              <div key={item.key}>
+                <p className="text-xs text-slate-500">{item.label}</p>
+                <p className="text-xl font-semibold text-slate-900">{(bootstrap.content_counts?.[item.key] || 0).toLocaleString()}</p>
+              </div>
+            ))}
+          </div>
+        </CardContent>
+      </Card>
+
+      {/* Visits Trend */}
+      <Card className="border border-slate-100 shadow-sm">
+        <CardHeader>
+          <CardTitle className="flex items-center gap-2">
+            <Calendar className="w-5 h-5 text-[#5B5BF7]" />
+            Visits (Last 30 Days)
+          </CardTitle>
+        </CardHeader>
+        <CardContent>
+          {trend.length > 0 ? (
+            <ResponsiveContainer width="100%" height={250}>
+              <LineChart data={trend}>
+                <CartesianGrid strokeDasharray="3 3" vertical={false} />
+                <XAxis dataKey="date" />
+                <YAxis allowDecimals={false} />
+                <Tooltip />
+                <Line type="monotone" dataKey="visits" stroke="#5B5BF7" strokeWidth={2} dot={false} />
+              </LineChart>
+            </ResponsiveContainer>
+          ) : (
+            <div className="h-[250px] flex items-center justify-center text-slate-400">
+              No data available
+            </div>
+          )}
+        </CardContent>
+      </Card>
+
       {/* Charts Row */}
       <div className="grid lg:grid-cols-2 gap-6">
         {/* Device Distribution */}
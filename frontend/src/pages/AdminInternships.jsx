@@ -10,6 +10,7 @@ import { Tabs, TabsContent, TabsList, TabsTrigger } from '../components/ui/tabs'
 import { Plus, Pencil, Trash2, Tag, Clock, Loader2 } from 'lucide-react';
 import { toast } from 'sonner';
 import axios from 'axios';
+import { syncCollection, byNewest } from '../lib/sync';
 
 const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
 
@@ -44,8 +45,7 @@ export function AdminInternships() {
 
   const fetchInternships = async () => {
     try {
-      const res = await axios.get(`${API}/internships?active_only=false`, { headers });
-      setInternships(res.data);
+      setInternships((await syncCollection('internships')).sort(byNewest));
     } catch (error) {
       toast.error('Failed to load internships');
     } finally {
@@ -1,4 +1,5 @@
 import React, { useState, useEffect } from 'react';
+import { useOutletContext } from 'react-router-dom';
 import { useLanguage } from '../lib/LanguageContext';
 import { useSettings } from '../lib/SettingsContext';
 import { Card, CardContent, CardHeader, CardTitle, CardDescription } from '../components/ui/card';
@@ -96,12 +97,36 @@ export function AdminSettings() {
   const token = localStorage.getItem('novatech-token');
   const headers = { Authorization: `Bearer ${token}` };
 
+  // Role flags and the settings come with the admin bootstrap loaded by AdminLayout,
+  // refreshed on mount so the form never starts from a copy older than this visit
+  const { refreshBootstrap } = useOutletContext() || {};
+
   useEffect(() => {
-    fetchSettings();
-    checkAdmin2Access();
     fetchPageSeo();
+    if (!refreshBootstrap) return;
+    refreshBootstrap().then(bootstrap => {
+      if (!bootstrap) {
+        toast.error('Failed to load settings');
+        setLoading(false);
+        return;
+      }
+      applySettings(bootstrap.settings);
+      applyRoles(bootstrap);
+    });
     // eslint-disable-next-line react-hooks/exhaustive-deps
-  }, []);
+  }, [refreshBootstrap]);
+
+  const applyRoles = (bootstrap) => {
+    setIsAdmin2(bootstrap.is_admin2);
+    setIsAdmin1(bootstrap.is_admin1);
+    if (bootstrap.is_admin2) {
+      setAccountForm(prev => ({ ...prev, new_email: bootstrap.user.email }));
+    }
+    // If Admin 1, fetch Admin 2 info
+    if (bootstrap.is_admin1) {
+      fetchAdmin2Info();
+    }
+  };
 
   const emptyLocalized = { en: '', az: '', ru: '' };
 
@@ -153,24 +178,6 @@ export function AdminSettings() {
     }));
   };
 
-  const checkAdmin2Access = async () => {
-    try {
-      const res = await axios.get(`${API}/auth/admin2/check`, { headers });
-      setIsAdmin2(res.data.is_admin2);
-      setIsAdmin1(res.data.is_admin1);
-      if (res.data.is_admin2) {
-        setAccountForm(prev => ({ ...prev, new_email: res.data.email }));
-      }
-      // If Admin 1, fetch Admin 2 info
-      if (res.data.is_admin1) {
-        fetchAdmin2Info();
-      }
-    } catch (error) {
-      setIsAdmin2(false);
-      setIsAdmin1(false);
-    }
-  };
-
   const fetchAdmin2Info = async () => {
     try {
       const res = await axios.get(`${API}/auth/admin2/info`, { headers });
@@ -216,26 +223,18 @@ export function AdminSettings() {
     }
   };
 
-  const fetchSettings = async () => {
-    try {
-      const res = await axios.get(`${API}/settings`, { headers });
-      const data = res.data;
-
-      setWhatsappNumber(data.whatsapp_number || '');
-      setContact({
-        phones: data.contact?.phones?.length > 0 ? data.contact.phones : [''],
-        email: data.contact?.email || '',
-        address: data.contact?.address || { en: '', az: '', ru: '' },
-        google_map_embed: data.contact?.google_map_embed || ''
-      });
-      setSocialMedia(data.social_media || []);
-      setWorkingHours(data.working_hours || { start: '09:00', end: '17:00' });
-      setAdminSecurityEnabled(data.admin_security_enabled !== false);
-    } catch (error) {
-      toast.error('Failed to load settings');
-    } finally {
-      setLoading(false);
-    }
+  const applySettings = (data) => {
+    setWhatsappNumber(data.whatsapp_number || '');
+    setContact({
+      phones: data.contact?.phones?.length > 0 ? data.contact.phones : [''],
+      email: data.contact?.email || '',
+      address: data.contact?.address || { en: '', az: '', ru: '' },
+      google_map_embed: data.contact?.google_map_embed || ''
+    });
+    setSocialMedia(data.social_media || []);
+    setWorkingHours(data.working_hours || { start: '09:00', end: '17:00' });
+    setAdminSecurityEnabled(data.admin_security_enabled !== false);
+    setLoading(false);
   };
 
   const handleSave = async () => {
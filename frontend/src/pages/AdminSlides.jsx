@@ -9,6 +9,7 @@ import { Switch } from '../components/ui/switch';
 import { Plus, Pencil, Trash2, GripVertical, Image, ChevronUp, ChevronDown } from 'lucide-react';
 import { toast } from 'sonner';
 import axios from 'axios';
+import { syncCollection, byOrder } from '../lib/sync';
 import { ImageUploader } from '../components/ImageUploader';
 
 const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
@@ -42,8 +43,7 @@ export function AdminSlides() {
 
   const fetchSlides = async () => {
     try {
-      const res = await axios.get(`${API}/slides?active_only=false`, { headers });
-      setSlides(res.data.sort((a, b) => a.order - b.order));
+      setSlides((await syncCollection('slides')).sort(byOrder));
     } catch (error) {
       toast.error('Failed to load slides');
     } finally {
@@ -6,6 +6,7 @@ import { Dialog, DialogContent, DialogHeader, DialogTitle, DialogDescription } f
 import { Badge } from '../components/ui/badge';
 import { Mail, Phone, MessageSquare, Calendar, Eye, Trash2, BookOpen } from 'lucide-react';
 import { toast } from 'sonner';
+import { useOutletContext } from 'react-router-dom';
 import axios from 'axios';
 
 const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
@@ -18,11 +19,27 @@ export function AdminSubmissions() {
 
   const token = localStorage.getItem('novatech-token');
   const headers = { Authorization: `Bearer ${token}` };
+  const { subscribeEvents } = useOutletContext() || {};
 
   useEffect(() => {
     fetchSubmissions();
   }, []);
 
+  // Live updates from the admin event stream instead of reloading the page
+  useEffect(() => {
+    if (!subscribeEvents) return undefined;
+    return subscribeEvents((type, data) => {
+      if (type === 'submission' || type === 'resync') {
+        fetchSubmissions();
+      } else if (type === 'submission_read') {
+        setSubmissions(prev => prev.map(s => (s.id === data.id ? { ...s, is_read: true } : s)));
+      } else if (type === 'submission_deleted') {
+        setSubmissions(prev => prev.filter(s => s.id !== data.id));
+      }
+    });
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [subscribeEvents]);
+
   const fetchSubmissions = async () => {
     try {
       const res = await axios.get(`${API}/submissions`, { headers });
@@ -10,6 +10,7 @@ import { Switch } from '../components/ui/switch';
 import { Plus, Pencil, Trash2 } from 'lucide-react';
 import { toast } from 'sonner';
 import axios from 'axios';
+import { syncCollection, byOrder } from '../lib/sync';
 import { ImageUploader } from '../components/ImageUploader';
 
 const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
@@ -40,8 +41,7 @@ export function AdminTeachers() {
 
   const fetchTeachers = async () => {
     try {
-      const res = await axios.get(`${API}/teachers?active_only=false`, { headers });
-      setTeachers(res.data);
+      setTeachers((await syncCollection('teachers')).sort(byOrder));
     } catch (error) {
       toast.error('Failed to load teachers');
     } finally {
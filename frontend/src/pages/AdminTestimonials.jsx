@@ -10,6 +10,7 @@ import { Switch } from '../components/ui/switch';
 import { Plus, Pencil, Trash2, Star } from 'lucide-react';
 import { toast } from 'sonner';
 import axios from 'axios';
+import { syncCollection } from '../lib/sync';
 import { ImageUploader } from '../components/ImageUploader';
 
 const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
@@ -40,8 +41,7 @@ export function AdminTestimonials() {
 
   const fetchTestimonials = async () => {
     try {
-      const res = await axios.get(`${API}/testimonials?active_only=false`, { headers });
-      setTestimonials(res.data);
+      setTestimonials(await syncCollection('testimonials'));
     } catch (error) {
       toast.error('Failed to load testimonials');
     } finally {
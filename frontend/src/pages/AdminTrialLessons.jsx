@@ -3,6 +3,7 @@ import { Card, CardContent, CardHeader, CardTitle } from '../components/ui/card'
 import { Button } from '../components/ui/button';
 import { Trash2, Calendar, User, Phone, BookOpen, AlertTriangle, Loader2 } from 'lucide-react';
 import { toast } from 'sonner';
+import { useOutletContext } from 'react-router-dom';
 import axios from 'axios';
 
 const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
@@ -15,12 +16,28 @@ export function AdminTrialLessons() {
 
   const token = localStorage.getItem('novatech-token');
   const headers = { Authorization: `Bearer ${token}` };
+  const { subscribeEvents } = useOutletContext() || {};
 
   useEffect(() => {
     fetchLessons();
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, []);
 
+  // Live updates from the admin event stream instead of reloading the page
+  useEffect(() => {
+    if (!subscribeEvents) return undefined;
+    return subscribeEvents((type, data) => {
+      if (type === 'trial_lesson' || type === 'resync') {
+        fetchLessons();
+      } else if (type === 'trial_lesson_deleted') {
+        setLessons(prev => prev.filter(l => l.id !== data.id));
+      } else if (type === 'trial_lessons_cleared') {
+        setLessons([]);
+      }
+    });
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [subscribeEvents]);
+
   const fetchLessons = async () => {
     try {
       const res = await axios.get(`${API}/trial-lessons`, { headers });
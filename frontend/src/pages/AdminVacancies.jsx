@@ -10,6 +10,7 @@ import { Tabs, TabsContent, TabsList, TabsTrigger } from '../components/ui/tabs'
 import { Plus, Pencil, Trash2, Briefcase, MapPin, Loader2 } from 'lucide-react';
 import { toast } from 'sonner';
 import axios from 'axios';
+import { syncCollection, byNewest } from '../lib/sync';
 
 const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
 
@@ -45,8 +46,7 @@ export function AdminVacancies() {
 
   const fetchVacancies = async () => {
     try {
-      const res = await axios.get(`${API}/vacancies?active_only=false`, { headers });
-      setVacancies(res.data);
+      setVacancies((await syncCollection('vacancies')).sort(byNewest));
     } catch (error) {
       toast.error('Failed to load vacancies');
     } finally {
@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { Link, useParams } from 'react-router-dom';
 import { useLanguage } from '../lib/LanguageContext';
+import { trackPageView } from '../lib/analytics';
 import { Card, CardContent } from '../components/ui/card';
 import { Button } from '../components/ui/button';
 import { motion } from 'framer-motion';
@@ -34,11 +35,7 @@ export function BlogPage() {
     fetchPosts();
 
     // Track page view
-    axios.post(`${API}/analytics/pageview`, {
-      page_path: '/blog',
-      page_title: 'Blog',
-      device_type: /Mobile|Android|iPhone/i.test(navigator.userAgent) ? 'mobile' : 'desktop'
-    }).catch(() => {});
+    trackPageView('/blog', 'Blog');
   }, []);
 
   // Manual date formatting for consistent output across all languages
@@ -168,13 +165,13 @@ export function BlogDetailPage() {
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const [postRes, allPostsRes] = await Promise.all([
+        const [postRes, relatedRes] = await Promise.all([
           axios.get(`${API}/blogs/${slug}`),
-          axios.get(`${API}/blogs`)
+          // Summary cards of the most similar posts, not the whole blog list
+          axios.get(`${API}/blogs/${slug}/related?limit=4`).catch(() => ({ data: [] }))
         ]);
         setPost(postRes.data);
-        // Get related posts (excluding current post)
-        setRelatedPosts(allPostsRes.data.filter(p => p.slug !== slug).slice(0, 4));
+        setRelatedPosts(relatedRes.data);
       } catch (error) {
         console.error('Error fetching blog post:', error);
       } finally {
@@ -184,11 +181,7 @@ export function BlogDetailPage() {
     fetchData();
 
     // Track page view
-    axios.post(`${API}/analytics/pageview`, {
-      page_path: `/blog/${slug}`,
-      page_title: 'Blog Post',
-      device_type: /Mobile|Android|iPhone/i.test(navigator.userAgent) ? 'mobile' : 'desktop'
-    }).catch(() => {});
+    trackPageView(`/blog/${slug}`, 'Blog Post');
   }, [slug]);
 
   // Manual date formatting for consistent output across all languages
@@ -435,7 +428,6 @@ export function BlogDetailPage() {
               {relatedPosts.map(relatedPost => {
                 // Get the correct image for this specific related post
                 const relatedPostImage = relatedPost.image_url ||
-                  relatedPost.content_blocks?.find(block => block.type === 'image')?.image_url || 
                   'https://images.unsplash.com/photo-1432821596592-e2c18b78144f?w=800';
                 return (
                   <Link 
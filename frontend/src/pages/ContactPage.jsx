@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { useLanguage } from '../lib/LanguageContext';
 import { useSettings } from '../lib/SettingsContext';
+import { trackPageView } from '../lib/analytics';
 import { Button } from '../components/ui/button';
 import { Input } from '../components/ui/input';
 import { Label } from '../components/ui/label';
@@ -25,11 +26,7 @@ export function ContactPage() {
 
   useEffect(() => {
     // Track page view
-    axios.post(`${API}/analytics/pageview`, {
-      page_path: '/contact',
-      page_title: 'Contact',
-      device_type: /Mobile|Android|iPhone/i.test(navigator.userAgent) ? 'mobile' : 'desktop'
-    }).catch(() => {});
+    trackPageView('/contact', 'Contact');
   }, []);
 
   const handleSubmit = async (e) => {
@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { useParams, Link } from 'react-router-dom';
 import { useLanguage } from '../lib/LanguageContext';
+import { trackPageView } from '../lib/analytics';
 import { Button } from '../components/ui/button';
 import { 
   Accordion, 
@@ -19,7 +20,7 @@ import { Input } from '../components/ui/input';
 import { Label } from '../components/ui/label';
 import { Textarea } from '../components/ui/textarea';
 import { motion } from 'framer-motion';
-import { Clock, Monitor, Award, GraduationCap, CheckCircle2, ArrowLeft } from 'lucide-react';
+import { Clock, Monitor, Award, GraduationCap, CheckCircle2, ArrowLeft, ArrowRight } from 'lucide-react';
 import { toast } from 'sonner';
 import axios from 'axios';
 
@@ -30,6 +31,7 @@ export function CourseDetailPage() {
   const { t, getContent } = useLanguage();
   const [course, setCourse] = useState(null);
   const [faqs, setFaqs] = useState([]);
+  const [related, setRelated] = useState([]);
   const [loading, setLoading] = useState(true);
   const [showModal, setShowModal] = useState(false);
   const [submitting, setSubmitting] = useState(false);
@@ -43,12 +45,11 @@ export function CourseDetailPage() {
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const [courseRes, faqsRes] = await Promise.all([
-          axios.get(`${API}/courses/${id}`),
-          axios.get(`${API}/faqs/${id}`)
-        ]);
-        setCourse(courseRes.data);
-        setFaqs(faqsRes.data);
+        // Course, ordered FAQs and related courses in one request
+        const res = await axios.get(`${API}/courses/${id}/page`);
+        setCourse(res.data.course);
+        setFaqs(res.data.faqs);
+        setRelated(res.data.related);
       } catch (error) {
         console.error('Error fetching course:', error);
       } finally {
@@ -58,11 +59,7 @@ export function CourseDetailPage() {
     fetchData();
 
     // Track page view
-    axios.post(`${API}/analytics/pageview`, {
-      page_path: `/courses/${id}`,
-      page_title: 'Course Detail',
-      device_type: /Mobile|Android|iPhone/i.test(navigator.userAgent) ? 'mobile' : 'desktop'
-    }).catch(() => {});
+    trackPageView(`/courses/${id}`, 'Course Detail');
   }, [id]);
 
   const handleSubmit = async (e) => {
@@ -313,6 +310,43 @@ export function CourseDetailPage() {
         </section>
       )}
 
+      {/* Related Courses */}
+      {related.length > 0 && (
+        <section className="py-16 md:py-24 bg-white dark:bg-slate-900" data-testid="related-courses-section">
+          <div className="max-w-7xl mx-auto px-4 sm:px-6 lg:px-8">
+            <h2 className="text-3xl font-bold text-slate-900 dark:text-white mb-8" style={{ fontFamily: 'Plus Jakarta Sans, sans-serif' }}>
+              {t('courseDetail.relatedCourses')}
+            </h2>
+            <div className="grid md:grid-cols-2 lg:grid-cols-3 gap-8">
+              {related.map(item => (
+                <Link
+                  key={item.id}
+                  to={`/courses/${item.id}`}
+                  className="group bg-slate-50 dark:bg-slate-800 rounded-2xl overflow-hidden border border-slate-100 dark:border-slate-700 hover:shadow-lg transition-shadow"
+                >
+                  <img
+                    src={item.image_url || 'https://images.unsplash.com/photo-1516321318423-f06f85e504b3?w=800'}
+                    alt={getContent(item.title)}
+                    className="w-full h-44 object-cover"
+                    loading="lazy"
+                  />
+                  <div className="p-6">
+                    <h3 className="text-lg font-bold text-slate-900 dark:text-white mb-2 group-hover:text-[#5B5BF7] transition-colors line-clamp-2">
+                      {getContent(item.title)}
+                    </h3>
+                    <div className="flex items-center gap-1 text-sm text-slate-500 dark:text-slate-400">
+                      <Clock className="w-4 h-4" />
+                      {item.duration}
+                      <ArrowRight className="ml-auto w-4 h-4 text-[#5B5BF7]" />
+                    </div>
+                  </div>
+                </Link>
+              ))}
+            </div>
+          </div>
+        </section>
+      )}
+
       {/* Application Modal */}
       <Dialog open={showModal} onOpenChange={setShowModal}>
         <DialogContent className="sm:max-w-md">
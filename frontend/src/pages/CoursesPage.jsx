@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
 import { useLanguage } from '../lib/LanguageContext';
+import { trackPageView } from '../lib/analytics';
 import { Button } from '../components/ui/button';
 import { Card, CardContent } from '../components/ui/card';
 import { Clock, ArrowRight } from 'lucide-react';
@@ -58,11 +59,7 @@ export function CoursesPage() {
     loadCourses();
     
     // Track page view
-    axios.post(`${API}/analytics/pageview`, {
-      page_path: '/courses',
-      page_title: 'Courses',
-      device_type: /Mobile|Android|iPhone/i.test(navigator.userAgent) ? 'mobile' : 'desktop'
-    }).catch(() => {});
+    trackPageView('/courses', 'Courses');
   }, []);
 
   // Handle filter change - completely separate from loading
@@ -2,6 +2,8 @@ import React, { useEffect, useState } from 'react';
 import { Link } from 'react-router-dom';
 import { useLanguage } from '../lib/LanguageContext';
 import { useSettings } from '../lib/SettingsContext';
+import { trackPageView } from '../lib/analytics';
+import { cachedGet } from '../lib/manifest';
 import { Button } from '../components/ui/button';
 import { Card, CardContent } from '../components/ui/card';
 import { Input } from '../components/ui/input';
@@ -89,20 +91,21 @@ export function HomePage() {
         // Seed database first
         await axios.post(`${API}/seed`);
 
-        const [coursesRes, testimonialsRes, slidesRes, ctaRes, blogsRes] = await Promise.all([
-          axios.get(`${API}/courses`),
-          axios.get(`${API}/testimonials`),
-          axios.get(`${API}/slides`),
-          axios.get(`${API}/cta-sections`).catch(() => ({ data: [] })),
-          axios.get(`${API}/blogs/homepage`).catch(() => ({ data: [] }))
+        // Reused from localStorage while /manifest reports the same collection versions
+        const [courseList, testimonialList, slideList, ctaSections, blogList] = await Promise.all([
+          cachedGet('/courses', ['courses']),
+          cachedGet('/testimonials', ['testimonials']),
+          cachedGet('/slides', ['slides']),
+          cachedGet('/cta-sections', ['cta_sections']).catch(() => []),
+          cachedGet('/blogs/homepage', ['blogs']).catch(() => [])
         ]);
-        setCourses(coursesRes.data.filter(c => c.is_popular).slice(0, 6));
-        setTestimonials(testimonialsRes.data);
-        setSlides(slidesRes.data);
-        setHomepageBlogs(blogsRes.data);
+        setCourses(courseList.filter(c => c.is_popular).slice(0, 6));
+        setTestimonials(testimonialList);
+        setSlides(slideList);
+        setHomepageBlogs(blogList);
 
         // Find home_cta section
-        const homeCta = ctaRes.data.find(s => s.section_key === 'home_cta');
+        const homeCta = ctaSections.find(s => s.section_key === 'home_cta');
         setCtaSection(homeCta);
       } catch (error) {
         console.error('Error fetching data:', error);
@@ -113,12 +116,7 @@ export function HomePage() {
     fetchData();
 
     // Track page view
-    axios.post(`${API}/analytics/pageview`, {
-      page_path: '/',
-      page_title: 'Home',
-      device_type: /Mobile|Android|iPhone/i.test(navigator.userAgent) ? 'mobile' : 'desktop',
-      country: 'Unknown'
-    }).catch(() => { });
+    trackPageView('/', 'Home');
   }, []);
 
   const features = [
@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { useLanguage } from '../lib/LanguageContext';
+import { trackPageView } from '../lib/analytics';
 import { Card, CardContent } from '../components/ui/card';
 import { Button } from '../components/ui/button';
 import { motion } from 'framer-motion';
@@ -40,11 +41,7 @@ export function InternshipsPage() {
 
   useEffect(() => {
     // Track page view
-    axios.post(`${API}/analytics/pageview`, {
-      page_path: '/internships',
-      page_title: 'Internships',
-      device_type: /Mobile|Android|iPhone/i.test(navigator.userAgent) ? 'mobile' : 'desktop'
-    }).catch(() => {});
+    trackPageView('/internships', 'Internships');
   }, []);
 
   const getCategoryColor = (category) => {
@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
 import { useLanguage } from '../lib/LanguageContext';
+import { trackPageView } from '../lib/analytics';
 import { Card, CardContent } from '../components/ui/card';
 import { Button } from '../components/ui/button';
 import { motion } from 'framer-motion';
@@ -28,11 +29,7 @@ export function VacanciesPage() {
     fetchVacancies();
 
     // Track page view
-    axios.post(`${API}/analytics/pageview`, {
-      page_path: '/vacancies',
-      page_title: 'Vacancies',
-      device_type: /Mobile|Android|iPhone/i.test(navigator.userAgent) ? 'mobile' : 'desktop'
-    }).catch(() => {});
+    trackPageView('/vacancies', 'Vacancies');
   }, []);
 
   const getJobTypeColor = (type) => {
@@ -103,7 +103,7 @@ echo "1. Start MongoDB:"
 echo "   ${YELLOW}mongod${NC}"
 echo ""
 echo "2. Start Backend (new terminal):"
-echo "   ${YELLOW}cd backend && source venv/bin/activate && uvicorn server:app --host 0.0.0.0 --port 8001 --reload${NC}"
+echo "   ${YELLOW}cd backend && source venv/bin/activate && uvicorn server:app --host 0.0.0.0 --port 8001 --reload --timeout-graceful-shutdown 5${NC}"
 echo ""
 echo "3. Start Frontend (new terminal):"
 echo "   ${YELLOW}cd frontend && yarn start${NC}"